@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark for redrawing only the changed parts of an ObjectCanvas
+
+Moves one small circle near the right edge of a wide canvas, and times
+the redraw against a full render -- with just thin lines and circles in
+the changed area, and with a wide line in it, which makes the redraw
+start from the left edge of the canvas (see _render_tile).
+
+run it with the width of the canvas:
+
+    python bench_object_canvas.py 20000
+"""
+
+import contextlib
+import io
+import sys
+import timeit
+
+import object_canvas as oc
+
+
+def make_canvas(width, wide_line):
+    """
+    a wide canvas with a row of circles and a thin line along it, and
+    a wide line near the right edge if wide_line is set
+
+    returns the canvas and the circle to move
+    """
+    canvas = oc.ObjectCanvas(size=(width, 200))
+    for x in range(0, width, 40):
+        canvas.add_object(oc.Circle((x, 100), 30, fill_color="red"))
+    canvas.add_object(oc.PolyLine([(0, 150), (width, 160)]))
+    circle = oc.Circle((width - 100, 50), 20, fill_color="blue")
+    canvas.add_object(circle)
+    if wide_line:
+        canvas.add_object(oc.PolyLine([(width - 120, 0), (width - 80, 200)],
+                                      line_width=5))
+    return canvas, circle
+
+
+def bench(width, wide_line):
+    """
+    the time for a full render, and for a redraw after moving the circle,
+    in ms -- the fastest of several runs
+    """
+    canvas, circle = make_canvas(width, wide_line)
+    objects = canvas.draw_objects
+    full = min(timeit.repeat(
+        lambda: oc._render_tile(((0, 0), canvas.size), objects,
+                                canvas.background),
+        number=1, repeat=5))
+    canvas.render_image()
+    step = [0]
+
+    def move():
+        step[0] = 1 - step[0]
+        circle.center = (width - 100 + step[0], 50)
+        canvas.render_image()
+    redraw = min(timeit.repeat(move, number=1, repeat=20))
+    return full * 1000, redraw * 1000
+
+
+def main(width=20000):
+    print("canvas {:,} x 200".format(width))
+    print("{:<24} {:>10} {:>10} {:>8}".format(
+        "", "full ms", "redraw ms", "speedup"))
+    for name, wide_line in (("thin lines and circles", False),
+                            ("with a wide line", True)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            full, redraw = bench(width, wide_line)
+        print("{:<24} {:>10.2f} {:>10.3f} {:>7.0f}x".format(
+            name, full, redraw, full / redraw))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -35,10 +35,21 @@ Its docs are here:
 https://pillow.readthedocs.io/en/4.3.x/index.html
 
 """
-from math import ceil
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from math import ceil, floor
 
 from PIL import Image, ImageDraw
 
+TILE_SIZE = 512  # pixels on a side for tiled rendering
+MAX_DIRTY_BOXES = 100  # more changed areas than this are drawn as one
+
+# the canvas being rendered by render_tiled -- set before the worker
+# processes are forked, so they have it without it being pickled
+_tiled_canvas = None
+
 
 class ObjectCanvas():
     """
@@ -52,6 +63,20 @@ class ObjectCanvas():
         self.size = size
         self.draw_objects = []
         self.background = background
+        # where the objects are, so render only has to look at the ones
+        # it will actually draw
+        self.index = GridIndex()
+        # order key of each object (by id) -- higher is drawn on top
+        self._order = {}
+        self._top = 0
+        self._bottom = 0
+        # the last full render, kept so only the parts that have changed
+        # since have to be drawn again -- and the background it was
+        # rendered with
+        self._image = None
+        self._image_background = None
+        # ((x_min, y_min), (x_max, y_max)) pixel boxes that need redrawing
+        self._dirty = []
 
     def add_object(self, draw_object, position="top"):
         # maybe overload the in=place addition operator?
@@ -68,23 +93,526 @@ class ObjectCanvas():
         """
         if position == "top":
             self.draw_objects.append(draw_object)
+            self._order[id(draw_object)] = self._top
+            self._top += 1
         elif position == "bottom":
             self.draw_objects.insert(0, draw_object)
+            self._bottom -= 1
+            self._order[id(draw_object)] = self._bottom
         else:
             self.draw_objects.insert(position, draw_object)
+            # no room between the keys -- renumber them all
+            self._order = {id(do): i for i, do in enumerate(self.draw_objects)}
+            self._top = len(self.draw_objects)
+            self._bottom = 0
+        self.index.add(draw_object)
+        canvases = draw_object.__dict__.setdefault("_canvases", [])
+        if not any(canvas is self for canvas in canvases):
+            canvases.append(self)
+        self.mark_dirty(draw_object.bounding_box)
+
+    def remove_object(self, draw_object):
+        """
+        Take an object off the canvas.
+
+        :param: draw_object -- DrawObject to remove
+        """
+        for i, do in enumerate(self.draw_objects):
+            if do is draw_object:
+                break
+        else:
+            raise ValueError("object is not on the canvas")
+        del self.draw_objects[i]
+        self.mark_dirty(self.index.bounding_box(draw_object))
+        if any(do is draw_object for do in self.draw_objects):
+            return  # it was on there twice -- still is once
+        self.index.remove(draw_object)
+        del self._order[id(draw_object)]
+        _remove_same(draw_object.__dict__.get("_canvases", []), self)
+
+    def update_object(self, draw_object):
+        """
+        Tell the canvas an object has changed.
+
+        This is called when any of a DrawObject's attributes are set,
+        so it only needs calling after changing one in place (like
+        appending to a PolyLine's vertices).
 
-    def render(self, filename):
+        :param: draw_object -- DrawObject that has changed
+        """
+        self.mark_dirty(self.index.bounding_box(draw_object))
+        self.index.remove(draw_object)
+        self.index.add(draw_object)
+        self.mark_dirty(draw_object.bounding_box)
+
+    def mark_dirty(self, box=None):
+        """
+        Mark part of the canvas as needing to be drawn again.
+
+        The canvas does this itself for objects that are added, removed
+        or changed, so this is only needed if draw_objects is changed
+        directly.
+
+        :param box=None: ((x_min, y_min), (x_max, y_max)) part of the
+                         canvas -- the whole canvas by default
+        """
+        if self._image is None:
+            return  # it will all be drawn anyway
+        width, height = self.size
+        if box is None:
+            box = ((0, 0), (width, height))
+        (x_min, y_min), (x_max, y_max) = box
+        # a pixel to spare all around, for rounding
+        box = ((max(floor(x_min) - 1, 0), max(floor(y_min) - 1, 0)),
+               (min(ceil(x_max) + 2, width), min(ceil(y_max) + 2, height)))
+        if box[0][0] < box[1][0] and box[0][1] < box[1][1]:
+            self._dirty.append(box)
+
+    def visible_objects(self, region=None):
+        """
+        The objects that show up in a region, in drawing order
+        (bottom first).
+
+        Only the objects near the region are looked at, so this takes
+        time in proportion to what is visible, not to the number of
+        objects on the canvas.
+
+        :param region=None: ((x_min, y_min), (x_max, y_max)) part of the
+                            canvas -- the whole canvas by default.
+        """
+        if region is None:
+            region = ((0, 0), self.size)
+        order = self._order
+        return sorted(self.index.query(region), key=lambda do: order[id(do)])
+
+    def render(self, filename, region=None):
         """
         render the drawing to a file with the given name
+
+        :param region=None: ((x_min, y_min), (x_max, y_max)) part of the
+                            canvas to render, for a viewport on a big
+                            canvas -- the whole canvas by default.
+                            Objects outside of it are not drawn at all,
+                            and the result is the same as that part of
+                            the whole canvas (with wide lines in it, it's
+                            drawn from the left edge of the canvas to
+                            x_max, and cut down -- see _render_tile).
         """
-        image = Image.new('RGBA', self.size, color=self.background)
-        drawer = ImageDraw.Draw(image)
+        if region is None:
+            image = self.render_image()
+        else:
+            image = _render_tile(region, self.visible_objects(region),
+                                 self.background)
+        image.save(filename)
+
+    def render_image(self):
+        """
+        render the whole canvas, and return it as a PIL Image
+
+        The image is kept, and the next time only the parts of it that
+        have changed are drawn again, with just the objects in them --
+        so after a small change to a busy canvas, this takes time in
+        proportion to what's in the area changed. (A part with a wide
+        line in it is drawn from the left edge of the canvas, so it
+        comes out the same as a full render -- so that part takes time
+        in proportion to how far right it is. See _render_tile.)
 
-        for do in self.draw_objects:
-            do.draw(drawer)
+        The image is the canvas's own copy, so don't change it.
+        """
+        size = tuple(self.size)
+        if (self._image is None or self._image.size != size or
+                self._image_background != self.background):
+            self._image = _render_tile(((0, 0), size),
+                                       self.visible_objects(),
+                                       self.background)
+            self._image_background = self.background
+        else:
+            for box in _merge_boxes(self._dirty):
+                # drawn by itself, so the objects in it are cut off at
+                # its edges and don't cover what's outside
+                tile = _render_tile(box, self.visible_objects(box),
+                                    self.background)
+                self._image.paste(tile, box[0])
+        self._dirty = []
+        return self._image
+
+    def render_tiled(self, filename=None, tile_size=TILE_SIZE,
+                     processes=None, tile_dir=None):
+        """
+        render the drawing in square tiles, in a pool of processes
+
+        Each row of tiles only draws the objects that are in it, so a big
+        canvas is spread over all the CPUs, and no process needs the
+        whole image in memory -- just a row of tiles at a time. The
+        result is exactly the same as render().
+
+        :param filename=None: name of file to render the whole image to
+
+        :param tile_size=TILE_SIZE: pixels on a side of each tile
+
+        :param processes=None: number of processes to use (defaults to
+                               the number of CPUs) -- 1 renders the rows
+                               one by one in this process
+
+        :param tile_dir=None: directory to write the tiles to, as a
+                              pyramid: tile_dir/0/ has the full size
+                              tiles, named column_row.png, tile_dir/1/
+                              has them at half size, four to a tile,
+                              and so on up to one tile for the whole
+                              canvas. The whole image is only put
+                              together if there is a filename too.
+        """
+        global _tiled_canvas
+        if filename is None and tile_dir is None:
+            raise ValueError("render_tiled needs a filename or a tile_dir")
+        width, height = self.size
+        # the tiles are drawn a row at a time (see _render_tile for why)
+        boxes = [((0, y), (width, min(y + tile_size, height)))
+                 for y in range(0, height, tile_size)]
+        columns = -(-width // tile_size)
+        tile_files = [None] * len(boxes)
+        if tile_dir is not None:
+            os.makedirs(os.path.join(tile_dir, "0"), exist_ok=True)
+            tile_files = [[_tile_file(tile_dir, 0, column, row)
+                           for column in range(columns)]
+                          for row in range(len(boxes))]
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        if processes == 1:
+            rows = (_render_row(box, self.visible_objects(box),
+                                self.background, tile_size, row_files)
+                    for box, row_files in zip(boxes, tile_files))
+            self._save_rows(filename, boxes, rows, tile_files, tile_size)
+        else:
+            # with fork, the workers already have the canvas -- otherwise
+            # the objects in each row have to be pickled and sent over
+            use_fork = "fork" in multiprocessing.get_all_start_methods()
+            if use_fork:
+                _tiled_canvas = self
+                context = multiprocessing.get_context("fork")
+            else:
+                context = None
+            try:
+                with ProcessPoolExecutor(processes,
+                                         mp_context=context) as pool:
+                    if use_fork:
+                        futures = [pool.submit(_render_canvas_row, box,
+                                               tile_size, row_files)
+                                   for box, row_files in zip(boxes,
+                                                             tile_files)]
+                    else:
+                        futures = [pool.submit(_render_row, box,
+                                               self.visible_objects(box),
+                                               self.background, tile_size,
+                                               row_files)
+                                   for box, row_files in zip(boxes,
+                                                             tile_files)]
+                    rows = (future.result() for future in futures)
+                    self._save_rows(filename, boxes, rows, tile_files,
+                                    tile_size)
+            finally:
+                _tiled_canvas = None
+        if tile_dir is not None:
+            _build_pyramid(tile_dir, tile_size, columns, len(boxes))
+
+    def _save_rows(self, filename, boxes, rows, tile_files, tile_size):
+        """
+        put the rows of tiles together into the whole image, if there is
+        a filename to save it to
+
+        :param rows: the row images, or None for the ones that were
+                     saved to their tile_files
+        """
+        if filename is None:
+            for _ in rows:  # wait for them all
+                pass
+            return
+        image = Image.new('RGBA', self.size, color=self.background)
+        for box, row, row_files in zip(boxes, rows, tile_files):
+            if row is not None:
+                image.paste(row, box[0])
+                continue
+            y = box[0][1]
+            for column, tile_file in enumerate(row_files):
+                image.paste(Image.open(tile_file), (column * tile_size, y))
         image.save(filename)
 
 
+def _render_tile(box, draw_objects, background):
+    """
+    render some draw objects to one tile (or any part) of a canvas
+
+    If all the objects draw the same when shifted sideways (see
+    DrawObject.shifts_exactly), the tile is drawn by itself. If not, it
+    is drawn from the left edge of the canvas, and what's left of it cut
+    off after: Pillow works out the edges of wide lines with float32
+    arithmetic on the x coordinates, which rounds differently when they
+    are shifted (and there's no shift that keeps it the same), so the
+    pixels only come out the same as a full render with the same x
+    coordinates. That makes a tile with a wide line in it take time in
+    proportion to its right edge, rather than its width. Shifting the y
+    coordinates is always exact.
+    """
+    (x_min, y_min), (x_max, y_max) = box
+    if all(do.shifts_exactly for do in draw_objects):
+        left = x_min
+    else:
+        left = min(x_min, 0)
+    image = Image.new('RGBA', (x_max - left, y_max - y_min),
+                      color=background)
+    drawer = ImageDraw.Draw(image)
+    if (left, y_min) != (0, 0):
+        drawer = OffsetDraw(drawer, (-left, -y_min))
+    for do in draw_objects:
+        do.draw(drawer)
+    if x_min != left:
+        image = image.crop((x_min - left, 0, x_max - left, y_max - y_min))
+    return image
+
+
+def _render_row(box, draw_objects, background, tile_size, tile_files=None):
+    """
+    render some draw objects to one row of tiles of a canvas
+
+    returns the row image -- or saves it, cut up into tiles, to
+    tile_files, and returns None
+    """
+    image = _render_tile(box, draw_objects, background)
+    if tile_files is None:
+        return image
+    for column, tile_file in enumerate(tile_files):
+        x = column * tile_size
+        image.crop((x, 0, min(x + tile_size, image.width),
+                    image.height)).save(tile_file)
+    return None
+
+
+def _render_canvas_row(box, tile_size, tile_files=None):
+    """
+    render one row of tiles of the canvas render_tiled is rendering
+    (in a forked worker process)
+    """
+    canvas = _tiled_canvas
+    return _render_row(box, canvas.visible_objects(box), canvas.background,
+                       tile_size, tile_files)
+
+
+def _tile_file(tile_dir, level, column, row):
+    return os.path.join(tile_dir, str(level), "{}_{}.png".format(column, row))
+
+
+def _build_pyramid(tile_dir, tile_size, columns, rows):
+    """
+    make the smaller levels of a tile pyramid from level 0: each tile
+    is four tiles of the level below, at half the size
+    """
+    level = 0
+    while columns > 1 or rows > 1:
+        next_columns = -(-columns // 2)
+        next_rows = -(-rows // 2)
+        os.makedirs(os.path.join(tile_dir, str(level + 1)), exist_ok=True)
+        for row in range(next_rows):
+            for column in range(next_columns):
+                children = {}
+                for r in range(2 * row, min(2 * row + 2, rows)):
+                    for c in range(2 * column, min(2 * column + 2, columns)):
+                        offset = ((c - 2 * column) * tile_size,
+                                  (r - 2 * row) * tile_size)
+                        children[offset] = Image.open(
+                            _tile_file(tile_dir, level, c, r))
+                width = max(x + tile.width
+                            for (x, y), tile in children.items())
+                height = max(y + tile.height
+                             for (x, y), tile in children.items())
+                parent = Image.new('RGBA', (width, height))
+                for offset, tile in children.items():
+                    parent.paste(tile, offset)
+                parent = parent.resize((-(-width // 2), -(-height // 2)),
+                                       Image.BOX)
+                parent.save(_tile_file(tile_dir, level + 1, column, row))
+        level += 1
+        columns, rows = next_columns, next_rows
+
+
+def overlaps(box1, box2):
+    """
+    whether two ((x_min, y_min), (x_max, y_max)) boxes overlap
+    """
+    (x_min1, y_min1), (x_max1, y_max1) = box1
+    (x_min2, y_min2), (x_max2, y_max2) = box2
+    return (x_min1 <= x_max2 and x_min2 <= x_max1 and
+            y_min1 <= y_max2 and y_min2 <= y_max1)
+
+
+class GridIndex:
+    """
+    A spatial index for draw objects: a uniform grid of square cells,
+    each with a list of the objects whose bounding box is in it.
+
+    Finding the objects in a region only looks at the cells the region
+    covers. Objects that cover a lot of cells (a frame around the whole
+    canvas, say) are kept in one separate list instead of in every cell,
+    and always checked.
+    """
+
+    def __init__(self, cell_size=64, max_cells=64):
+        """
+        :param cell_size=64: size of the cells, in pixels
+
+        :param max_cells=64: objects that cover more cells than this
+                             are kept in the separate list
+        """
+        self.cell_size = cell_size
+        self.max_cells = max_cells
+        self.cells = defaultdict(list)
+        self.large = []
+        # the bounding box of each object (by id), when it was added,
+        # and the cells it's in -- None if it's in large
+        self.where = {}
+
+    def __len__(self):
+        return len(self.where)
+
+    def _cell_ranges(self, box):
+        """
+        the ranges of cell columns and rows a box covers
+        """
+        (x_min, y_min), (x_max, y_max) = box
+        size = self.cell_size
+        return (range(floor(x_min / size), floor(x_max / size) + 1),
+                range(floor(y_min / size), floor(y_max / size) + 1))
+
+    def add(self, draw_object):
+        """
+        add an object to the index
+        """
+        if id(draw_object) in self.where:
+            return
+        box = draw_object.bounding_box
+        columns, rows = self._cell_ranges(box)
+        if len(columns) * len(rows) > self.max_cells:
+            self.large.append(draw_object)
+            self.where[id(draw_object)] = (box, None)
+            return
+        keys = [(i, j) for i in columns for j in rows]
+        for key in keys:
+            self.cells[key].append(draw_object)
+        self.where[id(draw_object)] = (box, keys)
+
+    def bounding_box(self, draw_object):
+        """
+        the bounding box an object had when it was added
+        """
+        return self.where[id(draw_object)][0]
+
+    def remove(self, draw_object):
+        """
+        remove an object from the index
+        """
+        _, keys = self.where.pop(id(draw_object))
+        if keys is None:
+            _remove_same(self.large, draw_object)
+            return
+        for key in keys:
+            _remove_same(self.cells[key], draw_object)
+            if not self.cells[key]:
+                del self.cells[key]
+
+    def query(self, region):
+        """
+        the objects whose bounding boxes overlap a region, in no
+        particular order
+
+        :param region: ((x_min, y_min), (x_max, y_max)) box to look in
+        """
+        columns, rows = self._cell_ranges(region)
+        if len(columns) * len(rows) <= len(self.cells):
+            cells = (self.cells.get((i, j), ()) for i in columns for j in rows)
+        else:
+            # the region is bigger than the part of the grid in use
+            cells = (objects for (i, j), objects in self.cells.items()
+                     if i in columns and j in rows)
+        found = {}
+        for objects in cells:
+            for do in objects:
+                found[id(do)] = do
+        for do in self.large:
+            found[id(do)] = do
+        return [do for do in found.values()
+                if overlaps(do.bounding_box, region)]
+
+
+def _merge_boxes(boxes):
+    """
+    merge overlapping pixel boxes, so no part is drawn twice
+
+    boxes that overlap are replaced by one box around both -- and if
+    there are a lot of boxes, they are all replaced by one box around
+    them all, as checking them all against each other would take longer
+    """
+    if len(boxes) > MAX_DIRTY_BOXES:
+        return [((min(x_min for (x_min, _), _ in boxes),
+                  min(y_min for (_, y_min), _ in boxes)),
+                 (max(x_max for _, (x_max, _) in boxes),
+                  max(y_max for _, (_, y_max) in boxes)))]
+    merged = []
+    for box in boxes:
+        (x_min, y_min), (x_max, y_max) = box
+        i = 0
+        while i < len(merged):
+            (x_min2, y_min2), (x_max2, y_max2) = merged[i]
+            if (x_min < x_max2 and x_min2 < x_max and
+                    y_min < y_max2 and y_min2 < y_max):
+                x_min, y_min = min(x_min, x_min2), min(y_min, y_min2)
+                x_max, y_max = max(x_max, x_max2), max(y_max, y_max2)
+                del merged[i]
+                i = 0  # the bigger box may overlap ones already passed
+            else:
+                i += 1
+        merged.append(((x_min, y_min), (x_max, y_max)))
+    return merged
+
+
+def _remove_same(objects, draw_object):
+    """
+    remove draw_object itself (not just an equal one) from a list
+    """
+    for i, do in enumerate(objects):
+        if do is draw_object:
+            del objects[i]
+            return
+
+
+class OffsetDraw:
+    """
+    Wraps a PIL ImageDraw so everything drawn on it is shifted by an
+    offset -- for rendering a part of the canvas that doesn't start at
+    (0, 0).
+
+    The coordinates (the first argument of all the ImageDraw drawing
+    methods) are shifted, either a sequence of (x, y) points or a flat
+    [x, y, x, y...] sequence.
+    """
+
+    def __init__(self, drawer, offset):
+        self.drawer = drawer
+        self.offset = offset
+
+    def _shift(self, xy):
+        dx, dy = self.offset
+        xy = list(xy)
+        if xy and not isinstance(xy[0], (int, float)):
+            return [(x + dx, y + dy) for x, y in xy]
+        return [v + (dy if i % 2 else dx) for i, v in enumerate(xy)]
+
+    def __getattr__(self, name):
+        method = getattr(self.drawer, name)
+
+        def shifted(xy, *args, **kwargs):
+            return method(self._shift(xy), *args, **kwargs)
+        return shifted
+
+
 class DrawObject:
     """
     base class for all draw objects
@@ -95,6 +623,41 @@ class DrawObject:
         # do nothing, but to make super happy
         super().__init__(*args, **kwargs)
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        # let the canvases it's on know, so they draw it again
+        for canvas in self.__dict__.get("_canvases", ()):
+            canvas.update_object(self)
+
+    def __getstate__(self):
+        # the canvases it's on don't go along when it's pickled
+        state = self.__dict__.copy()
+        state.pop("_canvases", None)
+        return state
+
+    @property
+    def shifts_exactly(self):
+        """
+        whether the object comes out the same, pixel for pixel, when it's
+        drawn moved sideways by a whole number of pixels -- if so, a part
+        of the canvas it's in can be drawn by itself (see _render_tile).
+
+        It isn't known for a new kind of object, so this is False unless
+        a subclass says otherwise.
+        """
+        return False
+
+    @property
+    def bounding_box(self):
+        """
+        the smallest box everything the object draws is in:
+        ((x_min, y_min), (x_max, y_max))
+
+        The canvas uses it to skip objects that aren't in view, so every
+        DrawObject needs one.
+        """
+        raise NotImplementedError
+
 
 class LineObject:
     """
@@ -142,6 +705,21 @@ class PolyLine(DrawObject, LineObject):
         """
         drawer.line(self.vertices, fill=self.line_color, width=self.line_width)
 
+    @property
+    def shifts_exactly(self):
+        # wider lines are filled in as polygons, with float32 math on
+        # the x coordinates -- and fractional x's get rounded
+        return (self.line_width <= 1 and
+                all(float(x).is_integer() for x, y in self.vertices))
+
+    @property
+    def bounding_box(self):
+        # the line sticks out half its width on each side
+        lw2 = int(ceil(self.line_width / 2))
+        xs = [x for x, y in self.vertices]
+        ys = [y for x, y in self.vertices]
+        return ((min(xs) - lw2, min(ys) - lw2), (max(xs) + lw2, max(ys) + lw2))
+
 
 class Circle(DrawObject, LineObject, FillObject):
     def __init__(self, center, diameter, **kwargs):
@@ -166,8 +744,14 @@ class Circle(DrawObject, LineObject, FillObject):
             bounds = ((c[0] - r, c[1] - r), (c[0] + r, c[1] + r))
             drawer.ellipse(bounds, fill=None, outline=self.line_color)
 
+    @property
+    def shifts_exactly(self):
+        # a fractional x gets rounded
+        return float(self.center[0]).is_integer()
 
-
-
-
-
+    @property
+    def bounding_box(self):
+        # the outermost ring draw() makes
+        r = self.diameter // 2 + int(ceil(self.line_width / 2))
+        c = self.center
+        return ((c[0] - r, c[1] - r), (c[0] + r, c[1] + r))
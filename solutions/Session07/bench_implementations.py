@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark and conformance check for all the html_render.py's
+
+There are lots of versions of html_render in the repo: the solutions
+for each step, and a bunch of student versions. This builds the same
+standard documents with each of them, renders them, checks the results
+against the step_8 solution, and reports how fast they render (in nodes
+per second) and how much memory they use.
+
+run it from anywhere, with the number of nodes for each document:
+
+    python bench_implementations.py 20000
+
+The implementations don't all have the same classes, or even the same
+API, so a document that uses a class (or attributes) an implementation
+doesn't have is reported as unsupported for that implementation.
+
+The outputs are compared after taking out all the indentation and line
+breaks (and the DOCTYPE), since those vary between the implementations,
+and aren't really what's being checked.
+"""
+
+import contextlib
+import glob
+import importlib.util
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+REPO = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+REFERENCE = os.path.join("solutions", "Session07", "step_8", "html_render.py")
+
+# how deep the deep document goes -- the recursive renderers
+# will fail if this is too close to the recursion limit
+DEPTH = 300
+
+
+def find_implementations():
+    """
+    returns the paths (from the top of the repo) of all the html_render.py's
+    """
+    paths = glob.glob(os.path.join(REPO, "**", "html_render.py"),
+                      recursive=True)
+    return sorted(os.path.relpath(path, REPO) for path in paths)
+
+
+def load(path):
+    """
+    import the html_render.py at path (from the top of the repo)
+
+    each one gets its own module name, so they don't clash.
+    """
+    name = "html_render_" + "_".join(
+        os.path.dirname(path).replace("-", "_").split(os.sep))
+    spec = importlib.util.spec_from_file_location(name,
+                                                  os.path.join(REPO, path))
+    module = importlib.util.module_from_spec(spec)
+    # some of them print things when they get imported
+    with contextlib.redirect_stdout(io.StringIO()):
+        spec.loader.exec_module(module)
+    return module
+
+
+# The documents are written as (class name, attributes, content) tuples,
+# with plain strings for text, so they can be built with any implementation.
+
+def deep_document(n_nodes):
+    """
+    paragraphs nested DEPTH deep, as many times as fit in n_nodes
+    """
+    body = ("Body", {}, [])
+    for i in range(max(n_nodes // (2 * DEPTH), 1)):
+        inner = "way down at the bottom {}".format(i)
+        for _ in range(DEPTH):
+            inner = ("P", {}, [inner])
+        body[2].append(inner)
+    return ("Html", {}, [body])
+
+
+def wide_document(n_nodes):
+    """
+    one list with n_nodes / 2 items in it
+    """
+    items = [("Li", {}, ["list item number {}".format(i)])
+             for i in range(n_nodes // 2)]
+    return ("Html", {}, [("Body", {}, [("Ul", {}, items)])])
+
+
+def attribute_document(n_nodes):
+    """
+    paragraphs with a bunch of attributes each
+    """
+    paragraphs = [("P", {"id": "para{}".format(i),
+                         "class": "report",
+                         "style": "text-align: center; color: red",
+                         "title": "paragraph number {}".format(i)},
+                   ["text {}".format(i)])
+                  for i in range(n_nodes // 2)]
+    return ("Html", {}, [("Body", {}, paragraphs)])
+
+
+def text_document(n_nodes):
+    """
+    paragraphs with lots of pieces of text in each
+    """
+    paragraphs = [("P", {}, ["Sentence {} of paragraph {}, with a bit of "
+                             "text in it to make it longer.".format(j, i)
+                             for j in range(9)])
+                  for i in range(n_nodes // 10)]
+    return ("Html", {}, [("Body", {}, paragraphs)])
+
+
+DOCUMENTS = [("deep", deep_document),
+             ("wide", wide_document),
+             ("attributes", attribute_document),
+             ("text", text_document)]
+
+
+# other names some of the implementations use for the classes
+ALIASES = {"Html": ["HTML"],
+           "P": ["Para"],
+           "Head": ["head"]}
+
+
+class Unsupported(Exception):
+    """
+    the implementation doesn't have what a document needs
+    """
+    pass
+
+
+def count_nodes(spec):
+    """
+    the number of elements and pieces of text in the document
+    """
+    count = 0
+    stack = [spec]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if not isinstance(node, str):
+            stack.extend(node[2])
+    return count
+
+
+def build(module, spec):
+    """
+    build the document in spec with the classes in module
+    """
+    if isinstance(spec, str):
+        return spec
+    name, attributes, content = spec
+    for cls_name in [name] + ALIASES.get(name, []):
+        cls = getattr(module, cls_name, None)
+        if cls is not None:
+            break
+    else:
+        raise Unsupported("no {} class".format(name))
+    try:
+        element = cls(**attributes)
+    except TypeError:
+        raise Unsupported("no attributes")
+    for stuff in content:
+        element.append(build(module, stuff))
+    return element
+
+
+def render(element):
+    out_file = io.StringIO()
+    # some of them print things as they render
+    with contextlib.redirect_stdout(io.StringIO()):
+        element.render(out_file)
+    return out_file.getvalue()
+
+
+def normalize(html):
+    """
+    take out the indentation, line breaks and DOCTYPE
+    """
+    lines = (line.strip() for line in html.splitlines())
+    return "".join(line for line in lines
+                   if line and line.upper() != "<!DOCTYPE HTML>")
+
+
+def run(module, spec, reference, repeat=3):
+    """
+    build and render spec with module
+
+    returns the status, nodes per second, and peak memory in MB
+    """
+    try:
+        element = build(module, spec)
+        output = render(element)
+    except Unsupported as err:
+        return "unsupported: {}".format(err), None, None
+    except RecursionError:
+        return "RecursionError", None, None
+    except Exception as err:
+        return "error: {}: {}".format(type(err).__name__, err), None, None
+    if normalize(output) != reference:
+        status = "differs"
+    else:
+        status = "ok"
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(element)
+        best = min(best, time.perf_counter() - start)
+    del element
+
+    tracemalloc.start()
+    try:
+        render(build(module, spec))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return status, count_nodes(spec) / best, peak / 1e6
+
+
+def main(n_nodes=20000, paths=None):
+    if paths is None:
+        paths = find_implementations()
+    reference_module = load(REFERENCE)
+    specs = [(name, make(n_nodes)) for name, make in DOCUMENTS]
+    references = {name: normalize(render(build(reference_module, spec)))
+                  for name, spec in specs}
+
+    print("{:<56} {:<11} {:<24} {:>12} {:>10}".format(
+          "implementation", "document", "status", "nodes/sec", "peak MB"))
+    for path in paths:
+        try:
+            module = load(path)
+        except Exception as err:
+            print("{:<56} import failed: {}: {}".format(
+                  path, type(err).__name__, err))
+            continue
+        for name, spec in specs:
+            status, speed, peak = run(module, spec, references[name])
+            if speed is None:
+                print("{:<56} {:<11} {}".format(path, name, status))
+            else:
+                print("{:<56} {:<11} {:<24} {:>12,.0f} {:>10.1f}".format(
+                      path, name, status, speed, peak))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]), sys.argv[2:] or None)
+    else:
+        main()
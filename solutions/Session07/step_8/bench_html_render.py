@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for html_render
+
+Builds a big synthetic document and times rendering it.
+
+run it with the number of nodes you want in the document:
+
+    python bench_html_render.py 1000000
+
+"""
+
+import cProfile
+import gc
+import io
+import multiprocessing
+import pstats
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import html_render as hr
+
+
+def make_document(n_nodes):
+    """
+    build a page with (about) n_nodes nodes in it
+
+    The body is a bunch of lists, each with a bunch of list items,
+    each with a paragraph of text -- a typical generated report.
+    """
+    page = hr.Html()
+    head = hr.Head()
+    head.append(hr.Meta(charset="UTF-8"))
+    head.append(hr.Title("A big generated page"))
+    page.append(head)
+
+    body = hr.Body()
+    page.append(body)
+    # each Li has an Li, a P, and a piece of text in it: 3 nodes
+    n_items = max(n_nodes // 3, 1)
+    ul = None
+    for i in range(n_items):
+        if i % 1000 == 0:
+            ul = hr.Ul(id="list{}".format(i // 1000))
+            body.append(ul)
+        ul.append(hr.Li(hr.P("This is item number {}".format(i))))
+    return page
+
+
+def make_wide_document(n_items):
+    """
+    build a page with one list with n_items items in it
+    """
+    page = hr.Html()
+    body = hr.Body()
+    page.append(body)
+    ul = hr.Ul()
+    body.append(ul)
+    for i in range(n_items):
+        ul.append(hr.Li(hr.P("This is item number {}".format(i),
+                             style="color: red")))
+    return page
+
+
+def make_deep_document(depth):
+    """
+    build a page with elements nested depth levels deep
+    """
+    page = hr.Html()
+    inner = hr.Body()
+    page.append(inner)
+    for i in range(depth):
+        new = hr.Title() if i % 2 else hr.A("#{}".format(i))
+        inner.append(new)
+        inner = new
+    inner.append("all the way down")
+    return page
+
+
+def count_nodes(element):
+    """
+    count the nodes in the tree (without recursing)
+    """
+    count = 0
+    stack = [element]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(getattr(node, "content", ()))
+    return count
+
+
+def naive_make_tags(element):
+    """
+    the way the tags used to get made: from scratch, every render
+    """
+    attrs = " ".join(['{}="{}"'.format(key, val)
+                      for key, val in element.attributes.items()])
+    if attrs.strip():
+        open_tag = "<{} {}>".format(element.tag, attrs.strip())
+    else:
+        open_tag = "<{}>".format(element.tag)
+    close_tag = "</{}>".format(element.tag)
+
+    return open_tag, close_tag
+
+
+def naive_render(element, out_file, cur_ind=""):
+    """
+    the way render used to work: a write for every little piece
+
+    kept here so there is something to compare against.
+    """
+    if isinstance(element, hr.TextWrapper):
+        out_file.write(cur_ind + element.text)
+        return
+    open_tag, close_tag = naive_make_tags(element)
+    if isinstance(element, hr.SelfClosingTag):
+        out_file.write(cur_ind + open_tag.replace(">", " />"))
+        return
+    if isinstance(element, hr.Html):
+        out_file.write(cur_ind + "<!DOCTYPE html>\n")
+    if isinstance(element, hr.OneLineTag):
+        out_file.write(cur_ind + open_tag)
+        for stuff in element.content:
+            naive_render(stuff, out_file)
+        out_file.write(close_tag)
+        return
+    out_file.write(cur_ind + open_tag + "\n")
+    for stuff in element.content:
+        naive_render(stuff, out_file, cur_ind + element.indent)
+        out_file.write("\n")
+    out_file.write(cur_ind + close_tag)
+
+
+def time_render(render, page, repeat=3):
+    """
+    time render(page, out_file) into a real file
+
+    returns the best time of repeat runs, in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        with tempfile.TemporaryFile("w") as out_file:
+            start = time.perf_counter()
+            render(page, out_file)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_buffered(page):
+    """
+    compare the buffered render to writing every piece separately
+    """
+    naive = time_render(naive_render, page)
+    buffered = time_render(lambda p, f: p.render(f), page)
+    print("naive render:    {:8.3f} s".format(naive))
+    print("buffered render: {:8.3f} s   ({:.1f}x faster)"
+          .format(buffered, naive / buffered))
+
+
+def bench_per_node(page):
+    """
+    the cost per node of the recursive and the stack based render
+    """
+    n_nodes = count_nodes(page)
+    naive = time_render(naive_render, page)
+    walked = time_render(lambda p, f: p.render(f), page)
+    print("recursive render: {:6.3f} us per node"
+          .format(naive / n_nodes * 1e6))
+    print("stack render:     {:6.3f} us per node"
+          .format(walked / n_nodes * 1e6))
+
+
+def bench_deep(depth=100000):
+    """
+    render a very deeply nested page
+    """
+    page = make_deep_document(depth)
+    try:
+        time_render(naive_render, page, repeat=1)
+        print("recursive render of depth {}: worked".format(depth))
+    except RecursionError:
+        print("recursive render of depth {}: RecursionError".format(depth))
+    walked = time_render(lambda p, f: p.render(f), page)
+    print("stack render of depth {}: {:.3f} s".format(depth, walked))
+
+
+def bench_cached(n_nodes):
+    """
+    re-render a page after a small change, with and without caching
+    """
+    page = make_document(n_nodes)
+    full = time_render(lambda p, f: p.render(f), page)
+
+    hr.Element.cache_output = True
+    try:
+        page = make_document(n_nodes)
+        first = time_render(lambda p, f: p.render(f), page, repeat=1)
+        ul = page.content[1].content[-1]
+
+        def edit_and_render(page, out_file):
+            ul.append(hr.Li("one more item"))
+            page.render(out_file)
+        edited = time_render(edit_and_render, page)
+    finally:
+        hr.Element.cache_output = False
+    print("full render:              {:8.4f} s".format(full))
+    print("first render, caching:    {:8.4f} s".format(first))
+    print("render after one append:  {:8.4f} s   ({:.0f}x faster)"
+          .format(edited, full / edited))
+
+
+def bench_tags(page):
+    """
+    profile a render, to see how much of the time goes to the tags
+    """
+    profile = cProfile.Profile()
+    with tempfile.TemporaryFile("w") as out_file:
+        profile.runcall(naive_render, page, out_file)
+    stats = pstats.Stats(profile)
+    tag_time = sum(timing[3] for func, timing in stats.stats.items()
+                   if func[2] == "naive_make_tags")
+    print("making the tags every render: {:4.1f}% of the time"
+          .format(100 * tag_time / stats.total_tt))
+
+    profile = cProfile.Profile()
+    with tempfile.TemporaryFile("w") as out_file:
+        profile.runcall(page.render, out_file)
+    stats = pstats.Stats(profile)
+    tag_time = sum(timing[3] for func, timing in stats.stats.items()
+                   if func[2] in ("make_tags", "_build_open_tag"))
+    print("precomputed tags:             {:4.1f}% of the time"
+          .format(100 * tag_time / stats.total_tt))
+
+
+def peak_memory(func, *args):
+    """
+    the peak memory allocated while running func(*args), in MB
+    """
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def bench_streaming(page):
+    """
+    peak memory of rendering to a StringIO vs. streaming the chunks
+    """
+    def to_string_io(page):
+        out_file = io.StringIO()
+        page.render(out_file)
+        return len(out_file.getvalue())
+
+    def streamed(page):
+        size = 0
+        for chunk in page.iter_render():
+            size += len(chunk)
+        return size
+
+    print("render to StringIO peak memory: {:8.1f} MB"
+          .format(peak_memory(to_string_io, page)))
+    print("iter_render peak memory:        {:8.1f} MB"
+          .format(peak_memory(streamed, page)))
+
+
+def bench_parallel(n_nodes):
+    """
+    serial vs. parallel render of one very wide list
+    """
+    page = make_wide_document(n_nodes // 3)
+    serial = time_render(lambda p, f: p.render(f), page)
+    print("serial render of a wide list:   {:8.3f} s".format(serial))
+    for processes in (1, 2, 4, 8):
+        if processes > multiprocessing.cpu_count():
+            break
+        parallel = time_render(
+            lambda p, f: p.render_parallel(f, processes=processes), page)
+        print("parallel render, {} processes:   {:8.3f} s   ({:.1f}x)"
+              .format(processes, parallel, serial / parallel))
+
+
+def bench_memory(n_nodes):
+    """
+    how much memory the document takes up, per node
+    """
+    tracemalloc.start()
+    try:
+        page = make_document(n_nodes)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    print("memory per node: {:6.1f} bytes".format(size / count_nodes(page)))
+
+
+def paragraph_text(i):
+    """
+    the five pieces of text in paragraph i of the text page
+    -- a few percent of them needing escaping
+    """
+    for j in range(5):
+        if (i + j) % 20:
+            yield "Sentence {} of paragraph {}, just some text.".format(j, i)
+        else:
+            yield "Donor {} gave <$100 & said \"thanks\"".format(i)
+
+
+def make_text_document(n_paragraphs, wrap):
+    """
+    build a page of mostly text
+
+    wrap is what to wrap each piece of text in before adding it
+    """
+    page = hr.Html()
+    body = hr.Body()
+    page.append(body)
+    for i in range(n_paragraphs):
+        p = hr.P()
+        for text in paragraph_text(i):
+            p.append(wrap(text))
+        body.append(p)
+    return page
+
+
+def no_escape(text):
+    """
+    stands in for html_render.escape, to render the same text without escaping
+    """
+    return text
+
+
+def bench_escaping(n_nodes):
+    """
+    building and rendering a text heavy page, with and without escaping
+
+    Both cases use TextWrappers, so they go through the same render
+    path -- the only difference is whether escape() does anything.
+    escape() is also timed on its own, on the same text.
+
+    (Escaping has come out at 2-5% slower than not, at 30,000 nodes.)
+    """
+    n_paragraphs = n_nodes // 6
+    times = {"raw": float("inf"), "escaped": float("inf")}
+    escape = hr.escape
+    for _ in range(15):
+        for name, escaper in (("raw", no_escape), ("escaped", escape)):
+            hr.escape = escaper
+            # the garbage collector going off part way through would
+            # be most of the difference -- so it's off, like in timeit
+            gc.collect()
+            gc.disable()
+            try:
+                with tempfile.TemporaryFile("w") as out_file:
+                    start = time.perf_counter()
+                    page = make_text_document(n_paragraphs, hr.TextWrapper)
+                    page.render(out_file)
+                    times[name] = min(times[name],
+                                      time.perf_counter() - start)
+            finally:
+                gc.enable()
+                hr.escape = escape
+    texts = [text for i in range(n_paragraphs) for text in paragraph_text(i)]
+    escape_time = min(timeit.repeat(lambda: [escape(t) for t in texts],
+                                    number=1, repeat=5))
+    print("text page, not escaped: {:8.3f} s".format(times["raw"]))
+    print("text page, escaped:     {:8.3f} s   ({:+.1f}%)"
+          .format(times["escaped"],
+                  100 * (times["escaped"] / times["raw"] - 1)))
+    print("escape() on its own:    {:8.3f} s   for {} pieces of text"
+          .format(escape_time, len(texts)))
+
+
+def make_site_page(title, news):
+    """
+    a mostly static page: a big navigation list and footer, with
+    a title and a few news items that change on every request
+    """
+    page = hr.Html()
+    head = hr.Head()
+    head.append(hr.Meta(charset="UTF-8"))
+    head.append(hr.Title(title))
+    page.append(head)
+    body = hr.Body()
+    nav = hr.Ul(id="nav")
+    for i in range(200):
+        nav.append(hr.Li(hr.A("/section/{}".format(i),
+                              "Section number {}".format(i))))
+    body.append(nav)
+    body.append(hr.H(1, title))
+    items = hr.Ul(id="news")
+    for item in news:
+        items.append(item)
+    body.append(items)
+    footer = hr.P("Copyright, contact details, and all the rest",
+                  style="font-size: small")
+    for i in range(50):
+        footer.append(hr.A("/legal/{}".format(i), "legal page {}".format(i)))
+    body.append(footer)
+    page.append(body)
+    return page
+
+
+def bench_template(n_requests=2000):
+    """
+    build and render a mostly static page from scratch for every
+    request, vs. filling in a Template
+    """
+    def news(i):
+        return [hr.Li("News item {} for request {}".format(j, i))
+                for j in range(5)]
+
+    start = time.perf_counter()
+    for i in range(n_requests):
+        out_file = io.StringIO()
+        make_site_page("Request {}".format(i), news(i)).render(out_file)
+    scratch = (time.perf_counter() - start) / n_requests
+
+    template = hr.Template(make_site_page(hr.Slot("title"),
+                                          [hr.Slot("news")]))
+    start = time.perf_counter()
+    for i in range(n_requests):
+        out_file = io.StringIO()
+        template.render(out_file, title="Request {}".format(i), news=news(i))
+    filled = (time.perf_counter() - start) / n_requests
+
+    print("page from scratch:    {:8.1f} us per request".format(scratch * 1e6))
+    print("filled in template:   {:8.1f} us per request   ({:.0f}x faster)"
+          .format(filled * 1e6, scratch / filled))
+
+
+class CountingFile:
+    """
+    a file that only counts how much gets written to it
+    """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+
+def bench_compact(page):
+    """
+    bytes written and render time, indented vs. compact vs. compressed
+    """
+    modes = [("indented", lambda p, f: p.render(f)),
+             ("compact", lambda p, f: p.render(f, compact=True)),
+             ("gzip indented", lambda p, f: p.render_compressed(f)),
+             ("gzip compact",
+              lambda p, f: p.render_compressed(f, compact=True)),
+             ("gzip compact, level 1",
+              lambda p, f: p.render_compressed(f, compact=True, level=1)),
+             ]
+    for name, render in modes:
+        best = float("inf")
+        for _ in range(3):
+            out_file = CountingFile()
+            start = time.perf_counter()
+            render(page, out_file)
+            best = min(best, time.perf_counter() - start)
+        print("{:<22} {:12,d} bytes {:8.3f} s".format(name, out_file.size,
+                                                       best))
+
+
+def main(n_nodes=1000000):
+    print("building a document with {} nodes".format(n_nodes))
+    bench_memory(n_nodes)
+    page = make_document(n_nodes)
+    bench_buffered(page)
+    bench_per_node(page)
+    bench_tags(page)
+    bench_streaming(page)
+    bench_compact(page)
+    bench_parallel(n_nodes)
+    bench_escaping(n_nodes)
+    bench_template()
+    bench_deep()
+    bench_cached(n_nodes)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -2,8 +2,286 @@
 
 """
 Chris's solution through step 8
+
+Rendering collects the output in a list of chunks, and writes it out
+in large blocks, rather than doing lots of tiny writes.
+
+The tree is walked by render_blocks, which uses a loop and a stack,
+rather than recursion, so elements can be nested as deeply as you like.
+It is a generator, so the blocks can be written to a file (render), or
+handed out a piece at a time (iter_render and aiter_render).
+
+Text and attribute values are escaped (& < > and " in attributes) when
+they are added, so it costs nothing at render time. Wrap text in Raw
+to put it in as is.
+
+render(compact=True) leaves out all the indentation and line breaks,
+and render_compressed gzips (or zlib compresses) the output as it goes.
+
+Template pre-renders a page once, leaving named Slots to be filled in
+with fresh content each time it is used.
+
+render_parallel farms the content of very wide elements (think a Ul
+with a hundred thousand Li's) out to a pool of processes.
 """
 
+import asyncio
+import io
+import multiprocessing
+import re
+import sys
+import types
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+# number of chunks collected before they get joined and written out
+FLUSH_CHUNKS = 4096
+# largest piece of text handed out by iter_render
+CHUNK_SIZE = 64 * 1024
+# elements with at least this much content get rendered in parallel
+WIDE_CONTENT = 1000
+# how many slices of a wide element each process gets
+SLICES_PER_PROCESS = 4
+# text up to this long gets a shared TextWrapper
+SHARED_TEXT_LENGTH = 64
+# most TextWrappers to keep around for sharing
+MAX_SHARED_TEXT = 100000
+
+
+def render_blocks(node, cur_ind="", flush_chunks=FLUSH_CHUNKS, replace=None,
+                  compact=False):
+    """
+    render node, and everything in it, yielding the text in blocks
+
+    Writing every tag, indent and newline separately is a lot of
+    tiny writes -- so the pieces are collected, and joined up into
+    a block every flush_chunks pieces.
+
+    This walks the tree with an explicit stack rather than by recursion,
+    so there is no limit to how deeply elements can be nested.
+
+    Each kind of node tells the walker how it renders:
+
+    leaves (text, self closing tags) have a _text(cur_ind) method that
+    returns the whole rendered node.
+
+    elements of a subclass that overrides render() get rendered with that,
+    the same as other objects with a render method (see RenderWrapper).
+
+    elements have a _wrap(cur_ind) method that returns the text that goes
+    before the content, the text that goes after it, and the indent
+    for the content, and a _child_sep that goes after each piece of content.
+
+    Elements with cache_output set keep their rendered text, and it gets
+    used as is until they (or something in them) change. An element only
+    gets cached if everything in it is cached too, so that when something
+    changes, _changed can stop going up the tree at the first element
+    that has nothing cached.
+
+    replace is an optional dict of id(element): content to use for that
+    element instead of its own content.
+
+    With compact set, there is no indentation, and no line breaks: the
+    elements use _compact_wrap() instead, which returns just the text
+    before and after the content, and pieces of text next to each other
+    get a space between them (see _compact_content). Elements that
+    override render() get compact=True passed along, so their render
+    needs to take it, like Element.render does. Compact output doesn't
+    get cached.
+    """
+    chunks = []
+    # saving the bound method -- it gets called for every chunk
+    append = chunks.append
+    # how many blocks have been handed out
+    flushes = 0
+    # start off as though node were the content of some outer element
+    children = iter((node,))
+    ind = "" if compact else cur_ind
+    sep = ""
+    close = None
+    # can the element being rendered be cached?
+    cacheable = True
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    while True:
+        for child in children:
+            if child.__class__ is TextWrapper:
+                # by far the most common leaf, so it gets a short cut
+                append(ind + child.text + sep)
+            elif child._leaf:
+                append(child._text(ind) + sep)
+                if not child._cacheable:
+                    cacheable = False
+            elif child._own_render and child is not node:
+                # a subclass with a render method of its own -- use it,
+                # like a RenderWrapper does
+                out_file = io.StringIO()
+                if compact:
+                    child.render(out_file, ind, compact=True)
+                else:
+                    child.render(out_file, ind)
+                append(out_file.getvalue() + sep)
+                cacheable = False
+            else:
+                text = None
+                if child.cache_output and child._cache and not compact:
+                    text = child._cache.get(ind)
+                if text is None:
+                    # go down a level -- save where we were
+                    push((children, ind, sep, close, cacheable,
+                          child, len(chunks), flushes))
+                    cacheable = True
+                    if compact:
+                        open_text, close = child._compact_wrap()
+                    else:
+                        open_text, close, ind = child._wrap(ind)
+                        sep = child._child_sep
+                    append(open_text)
+                    if replace is None:
+                        content = child.content
+                    else:
+                        content = replace.get(id(child), child.content)
+                    if compact:
+                        children = _compact_content(content)
+                    else:
+                        children = iter(content)
+                    break
+                append(text + sep)
+            # an element can have any number of leaves -- so check here
+            # too, not only when an element is done
+            if len(chunks) >= flush_chunks:
+                yield "".join(chunks)
+                chunks.clear()
+                flushes += 1
+        else:
+            # done with this element's content -- go back up a level
+            if not stack:
+                break
+            append(close)
+            (children, ind, sep, close, parent_cacheable,
+             elem, start, start_flushes) = pop()
+            # can only cache it if none of it has been handed out yet
+            cacheable = (cacheable and elem.cache_output and
+                         start_flushes == flushes and not compact)
+            if cacheable:
+                text = "".join(chunks[start:])
+                chunks[start:] = [text]
+                if elem._cache is None:
+                    elem._cache = {}
+                elem._cache[ind] = text
+            cacheable = cacheable and parent_cacheable
+            if sep:
+                append(sep)
+            if len(chunks) >= flush_chunks:
+                yield "".join(chunks)
+                # clear in place so that append is still valid
+                chunks.clear()
+                flushes += 1
+    if chunks:
+        yield "".join(chunks)
+
+
+def _compact_content(content):
+    """
+    yields the pieces of content, for compact output
+
+    With no line breaks, text (and inline elements, like links) that
+    are next to each other would run together, so they get a space
+    in between -- unless there already is one.
+    """
+    previous = None
+    for child in content:
+        if (previous is not None and previous._inline and child._inline and
+                not getattr(previous, "text", "")[-1:].isspace() and
+                not getattr(child, "text", "")[:1].isspace()):
+            yield _SPACE
+        yield child
+        previous = child
+
+
+class Attributes(dict):
+    """
+    The attributes of an Element
+
+    A dict that tells the element it belongs to when it gets changed,
+    so it can re-make its tags.
+    """
+    __slots__ = ("owner",)
+
+    def __init__(self, owner, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.owner = owner
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.owner._attributes_changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.owner._attributes_changed()
+
+    def clear(self):
+        super().clear()
+        self.owner._attributes_changed()
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self.owner._attributes_changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.owner._attributes_changed()
+        return item
+
+    def setdefault(self, key, default=None):
+        value = super().setdefault(key, default)
+        self.owner._attributes_changed()
+        return value
+
+    def __ior__(self, other):
+        super().__ior__(other)
+        self.owner._attributes_changed()
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.owner._attributes_changed()
+
+
+def escape(text):
+    """
+    escape the characters in text that mean something in html
+    """
+    # most text has nothing that needs escaping -- and checking
+    # for that is a lot faster than escaping it. When there is
+    # something, replace() is about ten times as fast as translate()
+    if "&" in text or "<" in text or ">" in text:
+        return (text.replace("&", "&amp;").replace("<", "&lt;")
+                .replace(">", "&gt;"))
+    return text
+
+
+def escape_attribute(value):
+    """
+    escape an attribute value -- same as escape, plus double quotes
+
+    Raw values are left alone.
+    """
+    if isinstance(value, Raw):
+        return value.text
+    value = str(value)
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return (value.replace("&", "&amp;").replace("<", "&lt;")
+                .replace(">", "&gt;").replace('"', "&quot;"))
+    return value
+
+
+# all the elements without attributes share this, rather than
+# each having an empty dict -- it's read only, so it stays empty
+NO_ATTRIBUTES = types.MappingProxyType({})
+
 
 class TextWrapper:
     """
@@ -13,27 +291,227 @@ class TextWrapper:
     This allows the Element classes to render either Element objects or
     plain text
 
+    The text gets escaped, so it shows up as it is.
+
+    TextWrappers for the same text get shared (see wrap_text),
+    so don't change the text of one.
     """
+    __slots__ = ("text",)
+    _leaf = True
+    _cacheable = True
+    # in compact output, gets a space between it and inline neighbors
+    _inline = True
+
     def __init__(self, text):
-        self.text = text
+        self.text = escape(text)
 
     def render(self, file_out, current_ind=""):
         file_out.write(current_ind + self.text)
 
+    def _text(self, cur_ind):
+        return cur_ind + self.text
+
+
+class Raw(TextWrapper):
+    """
+    Text that does not get escaped -- for when you have some html
+
+    Can be used as an attribute value as well.
+    """
+    __slots__ = ()
+
+    def __init__(self, text):
+        self.text = text
+
+
+# text: TextWrapper, for sharing
+_shared_text = {}
+
+# goes between text in compact output
+_SPACE = TextWrapper(" ")
+
+
+def wrap_text(text):
+    """
+    returns a TextWrapper for text
+
+    Short pieces of text tend to show up over and over again, so they
+    share one TextWrapper, rather than each having one of their own.
+    """
+    if len(text) > SHARED_TEXT_LENGTH:
+        return TextWrapper(text)
+    wrapper = _shared_text.get(text)
+    if wrapper is None:
+        wrapper = TextWrapper(text)
+        if len(_shared_text) < MAX_SHARED_TEXT:
+            _shared_text[text] = wrapper
+    return wrapper
+
+
+def _slot_names(cls):
+    """
+    the names of all the slots of a class, including the ones it inherits
+    """
+    names = []
+    for klass in cls.__mro__:
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend((slots,) if isinstance(slots, str) else slots)
+    return names
+
+
+# The wide elements being rendered by render_parallel. The worker
+# processes get these when they are forked, so they never need pickling.
+_wide_elements = []
+
+
+def _render_slice(i, start, stop, cur_ind, sep):
+    """
+    render a slice of the content of one of the wide elements
+
+    runs in the worker processes
+    """
+    content = _wide_elements[i].content[start:stop]
+    return render_content(content, cur_ind, sep)
+
+
+def render_content(content, cur_ind="", sep="\n"):
+    """
+    render a piece of content, or a list of them with sep in between
+
+    the content can be text, elements, or anything with a render method,
+    the same as what can be added to an Element.
+    """
+    if isinstance(content, (list, tuple)):
+        return sep.join(render_content(stuff, cur_ind, sep)
+                        for stuff in content)
+    if not hasattr(content, "_leaf"):
+        if hasattr(content, "render"):
+            content = RenderWrapper(content)
+        else:
+            content = wrap_text(str(content))
+    return "".join(render_blocks(content, cur_ind))
+
+
+def find_wide(node, cur_ind="", min_width=WIDE_CONTENT):
+    """
+    yields (element, indent of its content) for all the elements in
+    the tree with at least min_width pieces of content.
+
+    doesn't look inside the wide elements, or ones that are cached.
+    """
+    stack = [(node, cur_ind)]
+    while stack:
+        elem, ind = stack.pop()
+        if elem._leaf:
+            continue
+        if elem.cache_output and elem._cache and ind in elem._cache:
+            continue
+        content_ind = elem._wrap(ind)[2]
+        if len(elem.content) >= min_width:
+            yield elem, content_ind
+        else:
+            stack.extend((stuff, content_ind) for stuff in elem.content)
+
+
+class Rendered:
+    """
+    Stands in for a slice of content being rendered in another process
+    """
+    __slots__ = ("future",)
+    _leaf = True
+    _cacheable = True
+    _inline = False
+
+    def __init__(self, future):
+        self.future = future
+
+    def _text(self, cur_ind):
+        # the indent was already taken care of when it was rendered
+        return self.future.result()
+
+
+class RenderWrapper:
+    """
+    Wraps any other object with a render method, so that it can be
+    rendered along with the Elements
+    """
+    __slots__ = ("obj",)
+    _leaf = True
+    # no way to know when other objects change
+    _cacheable = False
+    _inline = False
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def render(self, file_out, current_ind=""):
+        self.obj.render(file_out, current_ind)
+
+    def _text(self, cur_ind):
+        out_file = io.StringIO()
+        self.obj.render(out_file, cur_ind)
+        return out_file.getvalue()
+
 
 class Element:
+    # slots instead of a __dict__ -- there can be an awful lot of elements
+    __slots__ = ("_parent", "_cache", "_attributes", "_open_tag", "content")
 
     tag = "html"
+    # only depends on the tag, so all the elements of a class share it
+    _close_tag = "</html>"
+    # the tag _close_tag was made for -- None if the class handles it
+    _class_tag = "html"
     indent = "    "
+    # set this to keep the rendered text of elements around, so
+    # that re-rendering only has to redo the parts that changed
+    cache_output = False
+    _leaf = False
+    # in compact output, gets a space between it and inline neighbors
+    _inline = False
+    _cacheable = True
+    # what goes after each piece of content
+    _child_sep = "\n"
+    # set for subclasses that override render()
+    _own_render = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._own_render = cls.render is not Element.render
+        # (subclasses can have a tag per instance, like H)
+        if isinstance(cls.tag, str):
+            cls._close_tag = "</{}>".format(cls.tag)
+            cls._class_tag = cls.tag
+        elif not isinstance(cls._close_tag, str):
+            # _close_tag is per instance too
+            cls._class_tag = None
 
     def __init__(self, content=None, **kwargs):
-        self.attributes = kwargs
-        self.content = []
+        # the element(s) this is in, and the rendered text for each indent
+        self._parent = None
+        self._cache = None
+        self._attributes = Attributes(self, kwargs) if kwargs else NO_ATTRIBUTES
+        self._open_tag = self._build_open_tag()
+        if self._class_tag is not None and self.tag is not self._class_tag:
+            # the tag was set on this element, not the class
+            self._set_close_tag()
+        self.content = () if self._leaf else []
         if content:
             # call the classes append method
             # so that it can do anything special it needs to do
             self.append(content)
 
+    def _set_close_tag(self):
+        """
+        make the close tag for an element with its own tag
+        """
+        try:
+            self._close_tag = "</{}>".format(self.tag)
+        except AttributeError:
+            raise TypeError("{} sets its tag per instance, so it needs a "
+                            "_close_tag slot as well (see H)"
+                            .format(type(self).__name__)) from None
+
     def append(self, content):
         """
         add a new piece of content or another element to this element
@@ -43,65 +521,289 @@ class Element:
         #       but that test was testing internal API --
         #       it's probably better remove it
         # if isinstance(content, Element):
-        if hasattr(content, 'render'):
+        if isinstance(content, Element):
+            content._add_parent(self)
+            self.content.append(content)
+        elif hasattr(content, '_leaf'):
             self.content.append(content)
+        elif hasattr(content, 'render'):
+            self.content.append(RenderWrapper(content))
         else:
-            self.content.append(TextWrapper(str(content)))
+            self.content.append(wrap_text(str(content)))
         # self.content.append(content)
+        self._changed()
+
+    def __getstate__(self):
+        """
+        for pickling -- leaves out the element this one is in, so that
+        pickling part of a tree doesn't drag the whole tree along.
+        """
+        state = {name: getattr(self, name)
+                 for name in _slot_names(type(self)) if hasattr(self, name)}
+        # subclasses without __slots__ have a __dict__ as well
+        state.update(getattr(self, "__dict__", {}))
+        state["_parent"] = None
+        state["_cache"] = None
+        state["_attributes"] = dict(self._attributes)
+        return state
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+        if self._attributes:
+            self._attributes = Attributes(self, self._attributes)
+        else:
+            self._attributes = NO_ATTRIBUTES
+        for stuff in self.content:
+            if isinstance(stuff, Element):
+                stuff._add_parent(self)
+
+    @property
+    def attributes(self):
+        if self._attributes is NO_ATTRIBUTES:
+            # about to get some attributes, most likely
+            self._attributes = Attributes(self)
+        return self._attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        self._attributes = Attributes(self, attributes)
+        self._attributes_changed()
+
+    def _attributes_changed(self):
+        """
+        re-make the open tag to match the new attributes
+        """
+        self._open_tag = self._build_open_tag()
+        self._changed()
+
+    def _add_parent(self, parent):
+        """
+        note that this element is in parent
+
+        Almost always an element is in just one other, so _parent is
+        that element -- it only becomes a list for an element that has
+        been added to more than one, so they all hear about changes.
+        """
+        current = self._parent
+        if current is None or current is parent:
+            self._parent = parent
+        elif current.__class__ is list:
+            if not any(elem is parent for elem in current):
+                current.append(parent)
+        else:
+            self._parent = [current, parent]
+
+    def _changed(self):
+        """
+        throw away the cached output of this element and
+        all the elements it is in -- they need to be re-rendered
+        """
+        self._cache = None
+        # start with the parent whatever this had cached -- leaves (like
+        # self closing tags) never have anything cached of their own
+        elem = self._parent
+        # if an element has nothing cached, neither do the ones it is in
+        while elem is not None:
+            if elem.__class__ is list:
+                # in more than one element
+                for parent in elem:
+                    if parent._cache is not None:
+                        parent._changed()
+                return
+            if elem._cache is None:
+                return
+            elem._cache = None
+            elem = elem._parent
+
+    def _build_open_tag(self):
+        """
+        create the open tag
+
+        This is done when the element is made, and again whenever
+        the attributes change -- not every time it is rendered.
+        """
+        if not self._attributes:
+            # lots of elements have this tag -- so share it
+            return sys.intern("<{}>".format(self.tag))
+        attrs = " ".join(['{}="{}"'.format(key, escape_attribute(val))
+                          for key, val in self._attributes.items()])
+        return "<{} {}>".format(self.tag, attrs.strip())
 
     def make_tags(self):
         """
-        create the tags
+        the tags
         -- in a separate method so different subclass's render methods can use it
         """
-        attrs = " ".join(['{}="{}"'.format(key, val) for key, val in self.attributes.items()])
-        if attrs.strip():
-            open_tag = "<{} {}>".format(self.tag, attrs.strip())
+        return self._open_tag, self._close_tag
+
+    def render(self, out_file, cur_ind="", compact=False):
+        """
+        render this element and everything in it to out_file
+
+        :param compact=False: leave out all the indentation and line breaks
+        """
+        for block in render_blocks(self, cur_ind, compact=compact):
+            out_file.write(block)
+
+    def render_compressed(self, out_file, cur_ind="", compact=False,
+                          method="gzip", level=6):
+        """
+        render this element and everything in it, compressing it as it
+        goes, to out_file -- which needs to be opened in binary mode.
+
+        :param compact=False: leave out all the indentation and line breaks
+        :param method="gzip": "gzip" or "zlib"
+        :param level=6: compression level, 1 (fastest) to 9 (smallest)
+        """
+        if method == "gzip":
+            wbits = 16 + zlib.MAX_WBITS
+        elif method == "zlib":
+            wbits = zlib.MAX_WBITS
         else:
-            open_tag = "<{}>".format(self.tag)
-        close_tag = "</{}>".format(self.tag)
+            raise ValueError("method must be 'gzip' or 'zlib', not {!r}"
+                             .format(method))
+        compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+        for block in render_blocks(self, cur_ind, compact=compact):
+            out_file.write(compressor.compress(block.encode("utf-8")))
+        out_file.write(compressor.flush())
+
+    def render_parallel(self, out_file, cur_ind="", processes=None,
+                        min_width=WIDE_CONTENT):
+        """
+        render this element and everything in it to out_file, with the
+        content of wide elements rendered in a pool of processes
 
-        return open_tag, close_tag
+        the output is exactly the same as render()
 
-    def render(self, out_file, cur_ind=""):
-        print("in render, type of self", type(self))
-        open_tag, close_tag = self.make_tags()
-        out_file.write(cur_ind + open_tag + "\n")
-        for stuff in self.content:
-            stuff.render(out_file, cur_ind + self.indent)
-            out_file.write("\n")
-        out_file.write(cur_ind + close_tag)
+        :param processes=None: number of processes to use
+                               (defaults to the number of CPUs)
+        :param min_width=WIDE_CONTENT: elements with at least this much
+                                       content get split up
+        """
+        global _wide_elements
+        wide = list(find_wide(self, cur_ind, min_width))
+        if not wide:
+            self.render(out_file, cur_ind)
+            return
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        n_slices = processes * SLICES_PER_PROCESS
+        # with fork, the workers already have the tree -- otherwise
+        # the content has to be pickled and sent over
+        use_fork = "fork" in multiprocessing.get_all_start_methods()
+        if use_fork:
+            _wide_elements = [elem for elem, _ in wide]
+            context = multiprocessing.get_context("fork")
+        else:
+            context = None
+        replace = {}
+        try:
+            with ProcessPoolExecutor(processes, mp_context=context) as pool:
+                for i, (elem, ind) in enumerate(wide):
+                    n_content = len(elem.content)
+                    step = -(-n_content // n_slices)
+                    slices = []
+                    for start in range(0, n_content, step):
+                        stop = start + step
+                        if use_fork:
+                            future = pool.submit(_render_slice, i, start,
+                                                 stop, ind, elem._child_sep)
+                        else:
+                            future = pool.submit(render_content,
+                                                 elem.content[start:stop],
+                                                 ind, elem._child_sep)
+                        slices.append(Rendered(future))
+                    replace[id(elem)] = slices
+                for block in render_blocks(self, cur_ind, replace=replace):
+                    out_file.write(block)
+        finally:
+            _wide_elements = []
+
+    def iter_render(self, cur_ind="", chunk_size=CHUNK_SIZE, compact=False):
+        """
+        render this element and everything in it, a piece at a time
+
+        A generator that yields the text in pieces no longer than
+        chunk_size, so a big page can be sent out as it is rendered,
+        without ever having all of it in memory.
+        """
+        for block in render_blocks(self, cur_ind, compact=compact):
+            if len(block) <= chunk_size:
+                yield block
+            else:
+                for i in range(0, len(block), chunk_size):
+                    yield block[i:i + chunk_size]
+
+    async def aiter_render(self, cur_ind="", chunk_size=CHUNK_SIZE,
+                           compact=False):
+        """
+        async version of iter_render
+
+        lets other tasks run between the pieces:
+
+            async for chunk in page.aiter_render():
+                await send(chunk)
+        """
+        for chunk in self.iter_render(cur_ind, chunk_size, compact):
+            yield chunk
+            await asyncio.sleep(0)
+
+    def _wrap(self, cur_ind):
+        """
+        returns what goes before the content, what goes after it,
+        and the indent for the content
+
+        subclasses that need to render differently override this.
+        """
+        return (cur_ind + self._open_tag + "\n",
+                cur_ind + self._close_tag,
+                cur_ind + self.indent)
+
+    def _compact_wrap(self):
+        """
+        returns what goes before the content and what goes after it,
+        for compact output
+        """
+        return self._open_tag, self._close_tag
 
 
 class OneLineTag(Element):
-    def render(self, out_file, cur_ind=""):
-        open_tag, close_tag = self.make_tags()
-        out_file.write(cur_ind + open_tag)
-        for stuff in self.content:
-            stuff.render(out_file)
-        out_file.write(close_tag)
+    __slots__ = ()
+    _child_sep = ""
+
+    def _wrap(self, cur_ind):
+        return cur_ind + self._open_tag, self._close_tag, ""
 
 
 class Html(Element):
+    __slots__ = ()
     tag = 'html'
 
-    def render(self, file_out, cur_ind=""):
-        file_out.write(cur_ind + "<!DOCTYPE html>\n")
-        super().render(file_out, cur_ind=cur_ind)
+    def _wrap(self, cur_ind):
+        open_text, close, ind = super()._wrap(cur_ind)
+        return cur_ind + "<!DOCTYPE html>\n" + open_text, close, ind
+
+    def _compact_wrap(self):
+        return "<!DOCTYPE html>" + self._open_tag, self._close_tag
 
 
 class Body(Element):
+    __slots__ = ()
     tag = "body"
 
 
 class P(Element):
+    __slots__ = ()
     tag = "p"
 
 class Head(Element):
+    __slots__ = ()
     tag = "head"
 
 
 class Title(OneLineTag):
+    __slots__ = ()
     tag = "title"
 
 
@@ -109,6 +811,7 @@ class SelfClosingTag(Element):
     """
     base class for tags that have no content
     """
+    __slots__ = ()
 
     def append(self, *args, **kwargs):
         """
@@ -117,17 +820,21 @@ class SelfClosingTag(Element):
         """
         raise TypeError("You can not add content to a self closing tag")
 
-    def render(self, out_file, ind=""):
-        # there is some repetition here -- maybe factor that out?
-        open_tag, _ = self.make_tags()
+    _leaf = True
+
+    def _build_open_tag(self):
         # make it a self closing tag by adding the /
-        out_file.write(ind + open_tag.replace(">", " />"))
+        return sys.intern(super()._build_open_tag()[:-1] + " />")
+
+    def _text(self, ind):
+        return ind + self._open_tag
 
 
 class Hr(SelfClosingTag):
     """
     Horizontal Rule
     """
+    __slots__ = ()
     tag = "hr"
 
 
@@ -135,6 +842,7 @@ class Br(SelfClosingTag):
     """
     Line break
     """
+    __slots__ = ()
     tag = "br"
 
 
@@ -142,7 +850,9 @@ class A(OneLineTag):
     """
     anchor element
     """
+    __slots__ = ()
     tag = "a"
+    _inline = True
 
     def __init__(self, link, *args, **kwargs):
         kwargs['href'] = link
@@ -155,6 +865,7 @@ class Ul(Element):
     """
     unordered list
     """
+    __slots__ = ()
     tag = "ul"
 
 
@@ -162,6 +873,7 @@ class Li(Element):
     """
     list element
     """
+    __slots__ = ()
     tag = "li"
 
 
@@ -169,10 +881,19 @@ class H(OneLineTag):
     """
     section head
     """
-    tag = "H"
+    # the tag goes with the instance, not the class
+    __slots__ = ("tag", "_close_tag")
+    # the tags for each level, made once for all the headers
+    levels = {level: ("h{}".format(level), "</h{}>".format(level))
+              for level in range(1, 7)}
 
     def __init__(self, level, *args, **kwargs):
-        self.tag = "h" + str(int(level))
+        level = int(level)
+        try:
+            self.tag, self._close_tag = self.levels[level]
+        except KeyError:
+            self.tag = "h{}".format(level)
+            self._close_tag = "</{}>".format(self.tag)
         super().__init__(*args, **kwargs)
 
 
@@ -180,4 +901,99 @@ class Meta(SelfClosingTag):
     """
     metadata tag
     """
+    __slots__ = ()
     tag = "meta"
+
+
+class Slot:
+    """
+    A named place in a Template, to be filled in when it gets rendered
+    """
+    __slots__ = ("name",)
+    _leaf = True
+    # the text is only a marker for the Template
+    _cacheable = False
+    _inline = False
+
+    def __init__(self, name):
+        self.name = name
+
+    def render(self, file_out, current_ind=""):
+        file_out.write(self._text(current_ind))
+
+    def _text(self, cur_ind):
+        # marks where the slot goes in the rendered text, with the
+        # slot (by id), and the indent its content needs
+        return "\0{}\0{}\0".format(id(self), cur_ind)
+
+
+# finds the markers written by Slot._text
+_SLOT_MARKER = re.compile("\0([0-9]+)\0([^\0]*)\0")
+
+
+class Template:
+    """
+    A page that is rendered once, then filled in over and over
+
+    Build the page as usual, with a Slot wherever the content will
+    change, then make a Template out of it. All the parts that don't
+    change are rendered to text right away, so filling it in is just
+    rendering the new content, and putting the pieces of text together:
+
+        page = Html()
+        body = Body()
+        body.append(H(1, Slot("title")))
+        body.append(Slot("content"))
+        page.append(body)
+        template = Template(page)
+        template.fill(title="A Title", content=P("some text"))
+
+    A slot can be filled with text, an element (or anything with a
+    render method), or a list of them.
+    """
+    def __init__(self, element, cur_ind=""):
+        # the slots (by id), and what goes between their pieces of content
+        slots = {}
+        stack = [element]
+        while stack:
+            elem = stack.pop()
+            for stuff in getattr(elem, "content", ()):
+                if isinstance(stuff, Slot):
+                    slots[str(id(stuff))] = (stuff.name, elem._child_sep)
+                else:
+                    stack.append(stuff)
+
+        text = "".join(render_blocks(element, cur_ind))
+        # fragments is the text that doesn't change, with the slots,
+        # as (name, indent, separator), in between
+        parts = _SLOT_MARKER.split(text)
+        self.fragments = [parts[0]]
+        for i in range(1, len(parts), 3):
+            name, sep = slots[parts[i]]
+            self.fragments.append((name, parts[i + 1], sep))
+            self.fragments.append(parts[i + 2])
+        self.slot_names = {name for name, sep in slots.values()}
+
+    def fill(self, **content):
+        """
+        returns the page, with the slots filled in with content
+        """
+        missing = self.slot_names - content.keys()
+        if missing:
+            raise KeyError("no content for slots: {}"
+                           .format(", ".join(sorted(missing))))
+        pieces = []
+        for fragment in self.fragments:
+            if fragment.__class__ is str:
+                pieces.append(fragment)
+            else:
+                name, ind, sep = fragment
+                pieces.append(render_content(content[name], ind, sep))
+        return "".join(pieces)
+
+    def render(self, out_file, **content):
+        """
+        render the page to out_file, with the slots filled in with content
+        """
+        out_file.write(self.fill(**content))
+
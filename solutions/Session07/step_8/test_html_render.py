@@ -3,10 +3,16 @@ test code for html_render.py
 
 Includes step 8
 """
+import asyncio
+import gzip
 import io
+import pickle
+import sys
+import zlib
 import pytest
 
-from html_render import (Element,
+from html_render import (NO_ATTRIBUTES,
+                         Element,
                          Html,
                          Body,
                          P,
@@ -20,6 +26,11 @@ from html_render import (Element,
                          Li,
                          H,
                          Meta,
+                         Raw,
+                         Slot,
+                         Template,
+                         escape,
+                         render_blocks,
                          )
 
 # utility function for testing render methods
@@ -442,3 +453,751 @@ def test_whole_thing():
         page.render(f)
 
     # assert False
+
+
+class CountingFile(io.StringIO):
+    """
+    A StringIO that keeps track of how many times write() is called
+    """
+    writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+def sample_page():
+    """
+    builds a small page that uses all the element types
+    """
+    page = Html()
+    head = Head()
+    head.append(Meta(charset="UTF-8"))
+    head.append(Title("Sample"))
+    page.append(head)
+
+    body = Body()
+    body.append(H(2, "Header"))
+    body.append(P("text", style="x"))
+    body.append(Hr())
+    ul = Ul(id="TheList")
+    ul.append(Li("one"))
+    item = Li()
+    item.append("a ")
+    item.append(A("http://google.com", "link"))
+    ul.append(item)
+    body.append(ul)
+    page.append(body)
+    return page
+
+
+SAMPLE_OUTPUT = """<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="UTF-8" />
+        <title>Sample</title>
+    </head>
+    <body>
+        <h2>Header</h2>
+        <p style="x">
+            text
+        </p>
+        <hr />
+        <ul id="TheList">
+            <li>
+                one
+            </li>
+            <li>
+                a 
+                <a href="http://google.com">link</a>
+            </li>
+        </ul>
+    </body>
+</html>"""
+
+
+def test_whole_page_exact():
+    """
+    the full page should render exactly the same as it always has
+    """
+    assert render_result(sample_page()) == SAMPLE_OUTPUT
+
+
+def test_render_single_write():
+    """
+    a small page should get written out all in one go
+    """
+    outfile = CountingFile()
+    sample_page().render(outfile)
+
+    assert outfile.writes == 1
+    assert outfile.getvalue() == SAMPLE_OUTPUT
+
+
+def test_render_flushes_in_blocks():
+    """
+    a big page gets written in a few large blocks, not all at once
+    """
+    ul = Ul()
+    for i in range(10000):
+        ul.append(Li("item {}".format(i)))
+    outfile = CountingFile()
+    ul.render(outfile)
+
+    assert 1 < outfile.writes < 100
+    assert outfile.getvalue() == render_result(ul)
+
+
+def test_render_no_print(capsys):
+    """
+    rendering should not print anything
+    """
+    render_result(sample_page())
+
+    assert capsys.readouterr().out == ""
+
+
+def test_deep_nesting():
+    """
+    nesting deeper than the recursion limit should still render
+    """
+    depth = sys.getrecursionlimit() * 2
+    top = inner = Body()
+    for i in range(depth):
+        new = Body()
+        inner.append(new)
+        inner = new
+    inner.append("way down here")
+    file_contents = render_result(top)
+
+    lines = file_contents.split("\n")
+    assert len(lines) == 2 * (depth + 1) + 1
+    assert lines[depth + 1] == Element.indent * (depth + 1) + "way down here"
+    assert lines[-1] == "</body>"
+
+
+def test_deep_one_line_tags():
+    depth = 100000
+    top = inner = Title()
+    for i in range(depth):
+        new = Title()
+        inner.append(new)
+        inner = new
+    inner.append("text")
+    file_contents = render_result(top, "  ")
+
+    assert file_contents == ("  " + "<title>" * (depth + 1) + "text" +
+                             "</title>" * (depth + 1))
+
+
+class Custom:
+    """
+    some other object with a render method
+    """
+    def render(self, out_file, cur_ind=""):
+        out_file.write(cur_ind + "custom")
+        out_file.write(" stuff")
+
+
+def test_other_render_objects():
+    """
+    anything with a render method can be added to an element
+    """
+    e = P(Custom())
+    e.append("text")
+
+    assert render_result(e) == "<p>\n    custom stuff\n    text\n</p>"
+
+
+class CustomElement(Element):
+    """
+    an Element subclass that renders itself its own way
+    """
+    tag = "c"
+
+    def render(self, out_file, cur_ind="", compact=False):
+        out_file.write(cur_ind + "<c>custom element</c>")
+
+
+class Wrapped(P):
+    """
+    an Element subclass that adds to the usual rendering
+    """
+    def render(self, out_file, cur_ind="", compact=False):
+        out_file.write(cur_ind + "<!-- wrapped -->")
+        if not compact:
+            out_file.write("\n")
+        super().render(out_file, cur_ind, compact)
+
+
+def test_element_subclass_render():
+    """
+    an Element subclass with its own render method gets rendered with it,
+    inside another element too
+    """
+    body = Body(CustomElement())
+    body.append(Wrapped("text"))
+
+    assert render_result(body) == ("<body>\n"
+                                   "    <c>custom element</c>\n"
+                                   "    <!-- wrapped -->\n"
+                                   "    <p>\n"
+                                   "        text\n"
+                                   "    </p>\n"
+                                   "</body>")
+    assert render_result(CustomElement()) == "<c>custom element</c>"
+
+
+@pytest.fixture
+def caching(monkeypatch):
+    """
+    turns on cache_output for all the elements for a test
+    """
+    monkeypatch.setattr(Element, "cache_output", True)
+
+
+def test_cache_filled(caching):
+    page = sample_page()
+    first = render_result(page)
+    ul = page.content[1].content[3]
+
+    assert first == SAMPLE_OUTPUT
+    assert page._cache[""] == SAMPLE_OUTPUT
+    assert ul._cache[2 * Element.indent].startswith(2 * Element.indent + "<ul")
+    assert render_result(page) == SAMPLE_OUTPUT
+
+
+def test_cache_append(caching):
+    """
+    appending to an element throws out the cache up the tree, but not
+    for anything else
+    """
+    page = sample_page()
+    render_result(page)
+    head, body = page.content
+    ul = body.content[3]
+    first_li = ul.content[0]
+
+    ul.append(Li("new item"))
+
+    assert ul._cache is None
+    assert body._cache is None
+    assert page._cache is None
+    assert head._cache is not None
+    assert first_li._cache is not None
+
+    uncached = sample_page()
+    uncached.content[1].content[3].append(Li("new item"))
+    assert render_result(page) == render_result(uncached)
+    assert "new item" in page._cache[""]
+
+
+def test_cache_attributes(caching):
+    page = sample_page()
+    render_result(page)
+    p = page.content[1].content[1]
+
+    p.attributes["id"] = "intro"
+
+    assert page._cache is None
+    assert 'id="intro"' in render_result(page)
+
+    del p.attributes["id"]
+    assert render_result(page) == SAMPLE_OUTPUT
+
+
+def test_cache_attributes_other_changes(caching):
+    """
+    all the ways of changing a dict should throw out the cache
+    """
+    page = sample_page()
+    p = page.content[1].content[1]
+    changes = [lambda attrs: attrs.__ior__({"id": "a"}),
+               lambda attrs: attrs.setdefault("lang", "en"),
+               lambda attrs: attrs.popitem(),
+               lambda attrs: attrs.update(id="b"),
+               lambda attrs: attrs.pop("id"),
+               ]
+    for change in changes:
+        render_result(page)
+        change(p.attributes)
+
+        assert page._cache is None
+        assert p._open_tag == p._build_open_tag()
+    p.attributes |= {"class": "x"}
+    assert 'class="x"' in render_result(page)
+
+
+def test_cache_self_closing_attributes(caching):
+    """
+    self closing tags have nothing cached of their own -- changing them
+    still throws out the cache of the elements they are in
+    """
+    meta = Meta(charset="UTF-8")
+    head = Head(meta)
+    hr = Hr()
+    body = Body(hr)
+    render_result(head)
+    render_result(body)
+
+    meta.attributes["charset"] = "latin-1"
+    hr.attributes["width"] = 400
+
+    assert '<meta charset="latin-1" />' in render_result(head)
+    assert '<hr width="400" />' in render_result(body)
+
+
+def test_cache_shared_child(caching):
+    """
+    an element in two others -- changing it throws out both their caches
+    """
+    shared = P("shared")
+    first = Body(shared)
+    second = Body(P("other"))
+    second.append(shared)
+    render_result(first)
+    render_result(second)
+
+    shared.append("more")
+
+    assert first._cache is None
+    assert second._cache is None
+    assert "more" in render_result(first)
+    assert "more" in render_result(second)
+
+
+def test_cache_per_indent(caching):
+    p = P("text")
+
+    assert render_result(p) == "<p>\n    text\n</p>"
+    assert render_result(p, "  ") == "  <p>\n      text\n  </p>"
+    assert set(p._cache) == {"", "  "}
+
+
+def test_cache_other_render_objects(caching):
+    """
+    other objects can't tell us when they change, so they
+    don't get cached
+    """
+    e = Body(P(Custom()))
+
+    render_result(e)
+
+    assert e._cache is None
+    assert e.content[0]._cache is None
+
+
+def test_no_cache_by_default():
+    page = sample_page()
+    render_result(page)
+
+    assert page._cache is None
+
+
+def test_tags_follow_attributes():
+    """
+    the tags are made ahead of time -- make sure they keep up
+    """
+    p = P("text")
+    assert p.make_tags() == ("<p>", "</p>")
+
+    p.attributes["id"] = "intro"
+    assert p.make_tags() == ('<p id="intro">', "</p>")
+
+    p.attributes.update(style="bold")
+    assert render_result(p).startswith('<p id="intro" style="bold">')
+
+    p.attributes = {}
+    assert render_result(p).startswith('<p>\n')
+
+
+def test_close_tags_shared():
+    assert P()._close_tag is P()._close_tag
+    assert H(2)._close_tag is H(2)._close_tag
+    assert H(2).make_tags() == ("<h2>", "</h2>")
+    assert H(10).make_tags() == ("<h10>", "</h10>")
+
+
+class Div(Element):
+    """
+    sets its tag per instance, without a slot for it
+    """
+    def __init__(self, *args, **kwargs):
+        self.tag = "div"
+        super().__init__(*args, **kwargs)
+
+
+class Span(Element):
+    """
+    sets its tag per instance, in a slot -- but has no slot for the close tag
+    """
+    __slots__ = ("tag",)
+
+    def __init__(self, *args, **kwargs):
+        self.tag = "span"
+        super().__init__(*args, **kwargs)
+
+
+def test_close_tag_per_instance():
+    assert render_result(Div("x")) == "<div>\n    x\n</div>"
+    assert render_result(Body(Div("x"))) == ("<body>\n    <div>\n"
+                                             "        x\n    </div>\n</body>")
+    assert Div().make_tags() == ("<div>", "</div>")
+    with pytest.raises(TypeError):
+        Span("x")
+
+
+def test_self_closing_attribute_with_gt():
+    hr = Hr(title="a > b")
+
+    assert render_result(hr) == '<hr title="a &gt; b" />'
+
+
+def big_list(n_items=10000):
+    ul = Ul()
+    for i in range(n_items):
+        ul.append(Li("item {}".format(i)))
+    return ul
+
+
+def test_iter_render():
+    page = sample_page()
+
+    assert "".join(page.iter_render()) == SAMPLE_OUTPUT
+    assert "".join(page.iter_render("  ")) == render_result(page, "  ")
+
+
+def test_iter_render_chunk_size():
+    ul = big_list()
+    chunks = list(ul.iter_render(chunk_size=1000))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 1000 for chunk in chunks)
+    assert "".join(chunks) == render_result(ul)
+
+
+def test_blocks_of_wide_text_element():
+    """
+    an element with lots of text (and nothing else) in it should still
+    come out in several blocks, not one big one
+    """
+    para = P()
+    for i in range(20000):
+        para.append("word {}".format(i))
+    ul = Ul()
+    for i in range(20000):
+        ul.append(Br())
+    for elem in (para, ul):
+        blocks = list(render_blocks(elem, flush_chunks=1000))
+
+        assert len(blocks) > 10
+        assert all(block.count("\n") <= 1000 for block in blocks)
+        assert "".join(blocks) == render_result(elem)
+
+
+def test_iter_render_lazy():
+    """
+    the first chunk should come out before the whole thing is rendered
+    """
+    ul = big_list()
+    chunks = ul.iter_render()
+    first = next(chunks)
+
+    assert first.startswith("<ul>")
+    assert "item 9999" not in first
+
+
+def test_aiter_render():
+    ul = big_list()
+
+    async def collect():
+        return [chunk async for chunk in ul.aiter_render(chunk_size=5000)]
+    chunks = asyncio.run(collect())
+
+    assert all(len(chunk) <= 5000 for chunk in chunks)
+    assert "".join(chunks) == render_result(ul)
+
+
+def wide_page(n_items=5000):
+    page = Html()
+    body = Body()
+    page.append(body)
+    body.append(P("before the list"))
+    body.append(big_list(n_items))
+    body.append(Title("after the list"))
+    title = Title()
+    for i in range(n_items):
+        title.append("word{} ".format(i))
+    body.append(title)
+    return page
+
+
+def render_parallel_result(element, ind="", **kwargs):
+    outfile = io.StringIO()
+    element.render_parallel(outfile, ind, **kwargs)
+    return outfile.getvalue()
+
+
+def test_render_parallel():
+    page = wide_page()
+
+    assert render_parallel_result(page, processes=2) == render_result(page)
+    assert (render_parallel_result(page, "  ", processes=3) ==
+            render_result(page, "  "))
+
+
+def test_render_parallel_not_wide():
+    page = sample_page()
+
+    assert render_parallel_result(page) == SAMPLE_OUTPUT
+
+
+def test_render_parallel_root_wide():
+    ul = big_list(2000)
+
+    assert render_parallel_result(ul, processes=2) == render_result(ul)
+
+
+def test_render_parallel_pickled(monkeypatch):
+    """
+    without fork, the content gets pickled over to the workers
+    """
+    monkeypatch.setattr("multiprocessing.get_all_start_methods",
+                        lambda: ["spawn"])
+    page = wide_page(2000)
+
+    assert render_parallel_result(page, processes=2) == render_result(page)
+
+
+def test_pickle_element():
+    page = sample_page()
+    ul = page.content[1].content[3]
+    copy = pickle.loads(pickle.dumps(ul))
+
+    assert copy._parent is None
+    assert copy.content[0]._parent is copy
+    assert render_result(copy) == render_result(ul)
+    copy.attributes["class"] = "x"
+    assert render_result(copy).startswith('<ul id="TheList" class="x">')
+
+
+def test_no_dict():
+    """
+    the elements use slots, to save memory
+    """
+    for element in (Element(), P("text"), H(2, "head"), Hr(), A("link"),
+                    TextWrapper("text")):
+        assert not hasattr(element, "__dict__")
+
+
+def test_shared_empty_attributes():
+    p1 = P("text")
+    p2 = Li()
+
+    assert p1._attributes is NO_ATTRIBUTES
+    assert p2._attributes is NO_ATTRIBUTES
+    assert p1._open_tag is P()._open_tag
+
+    p1.attributes["id"] = "this"
+
+    assert p2._attributes is NO_ATTRIBUTES
+    assert not NO_ATTRIBUTES
+    assert render_result(p1).startswith('<p id="this">')
+    assert render_result(p2) == "<li>\n</li>"
+
+
+def test_shared_text():
+    p1 = P("some text")
+    p2 = P("some text")
+
+    assert p1.content[0] is p2.content[0]
+    long_text = "x" * 1000
+    assert P(long_text).content[0] is not P(long_text).content[0]
+
+
+def test_pickle_header():
+    h = H(3, "A header", align="center")
+    copy = pickle.loads(pickle.dumps(h))
+
+    assert render_result(copy) == render_result(h)
+
+
+def test_escape():
+    assert escape("plain text") == "plain text"
+    assert escape("Tom & Jerry <3 > 2") == "Tom &amp; Jerry &lt;3 &gt; 2"
+    assert escape('"quotes" aren\'t escaped in text') == '"quotes" aren\'t escaped in text'
+
+
+def test_escaped_text():
+    p = P("Fish & Chips <b>")
+    p.append(3 < 4)
+
+    file_contents = render_result(p)
+
+    assert "Fish &amp; Chips &lt;b&gt;" in file_contents
+    assert "<b>" not in file_contents
+    assert "True" in file_contents
+
+
+def test_escaped_attributes():
+    a = A('http://example.com/?a=1&b="2"', "link")
+    a.attributes["title"] = "a < b"
+
+    file_contents = render_result(a)
+
+    assert 'href="http://example.com/?a=1&amp;b=&quot;2&quot;"' in file_contents
+    assert 'title="a &lt; b"' in file_contents
+
+
+def test_raw():
+    p = P(Raw("<b>bold</b> & stuff"))
+    p.attributes["onclick"] = Raw('alert("hi")')
+
+    file_contents = render_result(p)
+
+    assert "<b>bold</b> & stuff" in file_contents
+    assert 'onclick="alert("hi")"' in file_contents
+
+
+def template_page(title, items):
+    """
+    the same page, made with a Template or by hand
+    """
+    page = Html()
+    head = Head()
+    head.append(Title(title))
+    page.append(head)
+    body = Body()
+    body.append(P("static stuff at the top"))
+    ul = Ul(id="items")
+    for item in items:
+        ul.append(item)
+    body.append(ul)
+    body.append(Hr())
+    page.append(body)
+    return page
+
+
+def test_template():
+    template = Template(template_page(Slot("title"), [Slot("items")]))
+    items = [Li("one"), Li("two & three")]
+
+    result = template.fill(title="A Title", items=items)
+
+    assert result == render_result(template_page("A Title", items))
+
+
+def test_template_reuse():
+    template = Template(template_page(Slot("title"), [Slot("items")]))
+
+    first = template.fill(title="first", items=Li("only one"))
+    second = template.fill(title="second", items=[])
+
+    assert first == render_result(template_page("first", [Li("only one")]))
+    assert "<title>second</title>" in second
+    assert "first" not in second
+
+
+def test_template_render():
+    template = Template(P(Slot("text")), "  ")
+    outfile = io.StringIO()
+
+    template.render(outfile, text="some text")
+
+    assert outfile.getvalue() == "  <p>\n      some text\n  </p>"
+
+
+def test_template_missing_slot():
+    template = Template(P(Slot("text")))
+
+    with pytest.raises(KeyError):
+        template.fill()
+
+
+def test_slot_not_cached(caching):
+    p = P(Slot("text"))
+    Template(p)
+
+    assert p._cache is None
+
+
+COMPACT_OUTPUT = ('<!DOCTYPE html><html><head><meta charset="UTF-8" />'
+                  '<title>Sample</title></head><body><h2>Header</h2>'
+                  '<p style="x">text</p><hr /><ul id="TheList"><li>one</li>'
+                  '<li>a <a href="http://google.com">link</a></li></ul>'
+                  '</body></html>')
+
+
+def test_compact():
+    outfile = io.StringIO()
+    sample_page().render(outfile, "    ", compact=True)
+
+    assert outfile.getvalue() == COMPACT_OUTPUT
+
+
+def compact_result(element):
+    outfile = io.StringIO()
+    element.render(outfile, compact=True)
+    return outfile.getvalue()
+
+
+def test_compact_text_spaces():
+    """
+    text next to text (or a link) gets a space, where the line
+    break would have been -- but not if there already is one
+    """
+    p = P("Hello")
+    p.append("world")
+    p.append(A("http://x.org", "link"))
+    p.append(" spaced")
+    p.append(Br())
+    p.append("after")
+
+    assert compact_result(p) == ('<p>Hello world <a href="http://x.org">'
+                                 'link</a> spaced<br />after</p>')
+
+
+def test_compact_element_subclass_render():
+    body = Body(Wrapped("text"))
+    body.append(CustomElement())
+
+    assert compact_result(body) == ("<body><!-- wrapped --><p>text</p>"
+                                    "<c>custom element</c></body>")
+
+
+def test_compact_iter_render():
+    assert "".join(sample_page().iter_render(compact=True)) == COMPACT_OUTPUT
+
+
+def test_compact_not_cached(caching):
+    page = sample_page()
+    outfile = io.StringIO()
+    page.render(outfile, compact=True)
+
+    assert page._cache is None
+    assert render_result(page) == SAMPLE_OUTPUT
+    outfile = io.StringIO()
+    page.render(outfile, compact=True)
+    assert outfile.getvalue() == COMPACT_OUTPUT
+
+
+def test_render_gzip():
+    outfile = io.BytesIO()
+    sample_page().render_compressed(outfile)
+
+    assert gzip.decompress(outfile.getvalue()).decode() == SAMPLE_OUTPUT
+
+
+def test_render_zlib_compact():
+    ul = big_list()
+    outfile = io.BytesIO()
+    ul.render_compressed(outfile, compact=True, method="zlib", level=9)
+
+    result = zlib.decompress(outfile.getvalue()).decode()
+    assert result.startswith("<ul><li>item 0</li>")
+    assert "\n" not in result
+
+
+def test_render_compressed_bad_method():
+    with pytest.raises(ValueError):
+        P().render_compressed(io.BytesIO(), method="zip")
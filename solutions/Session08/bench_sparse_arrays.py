@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark suite for all the SparseArray's
+
+There are a few versions of SparseArray in the repo (the two solutions
+in sparse_array/, and student versions), and they make very different
+trade-offs -- a dict that has to be rebuilt on every delete, sorted
+blocks, compact arrays... This runs each of them through the same
+workload, for a few array lengths and densities, checks the results
+against a plain list, and reports the time per operation.
+
+run it from anywhere:
+
+    python bench_sparse_arrays.py
+
+or pick the lengths and densities:
+
+    python bench_sparse_arrays.py --lengths 10000 100000 --densities 0.01 0.1
+
+To catch regressions, save the results as a baseline, and compare
+against it after changing something:
+
+    python bench_sparse_arrays.py --save baseline.json
+    ... change things ...
+    python bench_sparse_arrays.py --baseline baseline.json
+
+Anything more than --tolerance times slower than the baseline (1.5 by
+default) is flagged. Timings are only comparable on the same machine,
+so the baseline isn't kept in the repo.
+
+Not every version supports everything (only some can slice, or
+insert); those are reported as unsupported. What is supported is
+decided before running anything (see supported()), so an exception
+while running is always reported as an error.
+"""
+
+import argparse
+import contextlib
+import glob
+import importlib.util
+import io
+import json
+import os
+import random
+import re
+import sys
+import timeit
+
+REPO = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+LENGTHS = (10000, 100000)
+DENSITIES = (0.01, 0.1)
+
+# how many times each operation is done for the timing
+COUNTS = {"construct": 1,
+          "get": 2000,
+          "set": 2000,
+          "append": 2000,
+          "insert middle": 200,
+          "delete middle": 200,
+          "slice": 20,
+          "iterate": 1,
+          "compare": 1}
+
+# how many times each timing is taken -- the fastest one is reported,
+# as the others are mostly other things on the machine getting in the way
+REPEAT = 5
+
+# the methods each operation needs (compare needs an __eq__ of its own)
+NEEDS = {"set": "__setitem__",
+         "append": "append",
+         "insert middle": "insert",
+         "delete middle": "__delitem__"}
+
+# operations that aren't supported in ways that can't be seen from the
+# methods: implementation: operations
+NOT_SUPPORTED = {
+    # __getitem__ only takes an index
+    os.path.join("solutions", "Session08", "sparse_array", "sparse_array.py"):
+        {"slice"},
+}
+
+
+def find_implementations():
+    """
+    returns the paths (from the top of the repo) of all the .py files
+    with a SparseArray class in them
+    """
+    paths = []
+    for path in glob.glob(os.path.join(REPO, "**", "*.py"), recursive=True):
+        if os.path.basename(path).startswith("test_"):
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            if re.search(r"^class SparseArray\b", f.read(), re.MULTILINE):
+                paths.append(os.path.relpath(path, REPO))
+    return sorted(paths)
+
+
+def load(path):
+    """
+    import the SparseArray class from the file at path (from the top of
+    the repo)
+
+    the file's directory goes on sys.path while it's imported, so it can
+    import its neighbors.
+    """
+    name = "sparse_" + "_".join(
+        os.path.splitext(path)[0].replace("-", "_").split(os.sep))
+    directory = os.path.dirname(os.path.join(REPO, path))
+    spec = importlib.util.spec_from_file_location(name,
+                                                  os.path.join(REPO, path))
+    module = importlib.util.module_from_spec(spec)
+    sys.path.insert(0, directory)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(directory)
+    return module
+
+
+def variants(path, module):
+    """
+    the (name, class) pairs to run for an implementation: one, or one
+    per kind of storage if it has more than one
+    """
+    cls = module.SparseArray
+    default = getattr(cls, "storage", None)
+    if default is None:
+        return [(path, cls)]
+    # all the kinds of storage in the module the default comes from
+    storage_module = sys.modules[default.__module__]
+    storages = [obj for obj in vars(storage_module).values()
+                if isinstance(obj, type) and hasattr(obj, "from_items")]
+    result = []
+    for storage in storages:
+        # a subclass, so the storage can be set without touching cls
+        variant = type(cls.__name__, (cls,), {"storage": storage})
+        result.append(("{} [{}]".format(path, storage.__name__), variant))
+    return result
+
+
+def make_data(length, density, seed=1):
+    """
+    a list of length values, with density of them non-zero
+    """
+    rand = random.Random(seed)
+    data = [0] * length
+    for index in rand.sample(range(length), int(length * density)):
+        data[index] = rand.randint(1, 100)
+    return data
+
+
+# Each operation takes an array built from the data (or the class, for
+# construct), the data, and a random.Random, does its thing COUNTS[name]
+# times, and returns the array and what it should equal afterwards, so
+# the result can be checked.
+
+def op_construct(cls, data, rand):
+    return cls(data), data
+
+
+def op_get(array, data, rand):
+    for _ in range(COUNTS["get"]):
+        index = rand.randrange(len(data))
+        if array[index] != data[index]:
+            raise AssertionError("wrong value")
+    return array, data
+
+
+def op_set(array, data, rand):
+    expected = list(data)
+    for i in range(COUNTS["set"]):
+        index = rand.randrange(len(data))
+        value = rand.randint(1, 100) if i % 2 else 0
+        array[index] = value
+        expected[index] = value
+    return array, expected
+
+
+def op_append(array, data, rand):
+    expected = list(data)
+    for i in range(COUNTS["append"]):
+        value = i % 7
+        array.append(value)
+        expected.append(value)
+    return array, expected
+
+
+def op_insert_middle(array, data, rand):
+    expected = list(data)
+    for i in range(COUNTS["insert middle"]):
+        value = i % 7
+        array.insert(len(expected) // 2, value)
+        expected.insert(len(expected) // 2, value)
+    return array, expected
+
+
+def op_delete_middle(array, data, rand):
+    expected = list(data)
+    for _ in range(COUNTS["delete middle"]):
+        del array[len(expected) // 2]
+        del expected[len(expected) // 2]
+    return array, expected
+
+
+def op_slice(array, data, rand):
+    quarter = len(data) // 4
+    for _ in range(COUNTS["slice"]):
+        part = array[quarter:-quarter:3]
+    return part, data[quarter:-quarter:3]
+
+
+def op_iterate(array, data, rand):
+    for _ in array:
+        pass
+    return array, data
+
+
+def op_compare(array, data, rand):
+    if not array == data:
+        raise AssertionError("not equal")
+    return array, data
+
+
+OPERATIONS = [("construct", op_construct),
+              ("get", op_get),
+              ("set", op_set),
+              ("append", op_append),
+              ("insert middle", op_insert_middle),
+              ("delete middle", op_delete_middle),
+              ("slice", op_slice),
+              ("iterate", op_iterate),
+              ("compare", op_compare)]
+
+
+def same(array, expected):
+    """
+    whether array has the same values as the expected list
+    """
+    if len(array) != len(expected):
+        return False
+    return all(array[i] == value for i, value in enumerate(expected))
+
+
+def supported(path, cls, name):
+    """
+    whether the implementation at path (with class cls) supports an
+    operation
+    """
+    if name in NOT_SUPPORTED.get(path, ()):
+        return False
+    if name == "compare":
+        # every class has an __eq__ -- object's only checks identity
+        return cls.__eq__ is not object.__eq__
+    return name not in NEEDS or hasattr(cls, NEEDS[name])
+
+
+def run(cls, name, operation, data):
+    """
+    run one operation
+
+    returns the status and the time per operation in microseconds (None
+    if it didn't work). The array an operation works on is built before
+    the clock starts, so only construct times building one. Each of the
+    REPEAT runs starts over with a new array, and the fastest is used.
+    """
+    state = {}
+
+    def setup():
+        state["subject"] = cls if name == "construct" else cls(data)
+        state["rand"] = random.Random(2)
+
+    def timed():
+        state["result"] = operation(state["subject"], data, state["rand"])
+
+    try:
+        elapsed = min(timeit.repeat(timed, setup, number=1, repeat=REPEAT))
+    except NotImplementedError:
+        return "unsupported: NotImplementedError", None
+    except Exception as err:
+        return "error: {}: {}".format(type(err).__name__, err), None
+    array, expected = state["result"]
+    try:
+        status = "ok" if same(array, expected) else "differs"
+    except Exception as err:
+        status = "differs: {}".format(type(err).__name__)
+    return status, elapsed / COUNTS[name] * 1e6
+
+
+def benchmark(paths, lengths, densities):
+    """
+    run all the operations on all the implementations
+
+    returns a dict of results: {"implementation|length|density|operation":
+                                {"status": ..., "us": ...}}
+    """
+    results = {}
+    for path in paths:
+        try:
+            module = load(path)
+        except Exception as err:
+            print("{}: import failed: {}: {}".format(
+                path, type(err).__name__, err))
+            continue
+        for name, cls in variants(path, module):
+            for length in lengths:
+                for density in densities:
+                    data = make_data(length, density)
+                    for op_name, operation in OPERATIONS:
+                        if supported(path, cls, op_name):
+                            status, us = run(cls, op_name, operation, data)
+                        else:
+                            status, us = "unsupported", None
+                        key = "|".join([name, str(length), str(density),
+                                        op_name])
+                        results[key] = {"status": status, "us": us}
+    return results
+
+
+def report(results, baseline=None, tolerance=1.5):
+    """
+    print the results as a table, with the change from the baseline if
+    there is one
+
+    returns the number of regressions
+    """
+    regressions = 0
+    print("{:<58} {:>7} {:>7} {:<14} {:>12}  {}".format(
+        "implementation", "length", "density", "operation",
+        "us/op", "status"))
+    for key, result in results.items():
+        name, length, density, op_name = key.split("|")
+        if result["us"] is None:
+            timing = ""
+        else:
+            timing = "{:12,.2f}".format(result["us"])
+        status = result["status"]
+        old = (baseline or {}).get(key)
+        if old and old["us"] and result["us"] is not None:
+            ratio = result["us"] / old["us"]
+            status += "  {:.2f}x baseline".format(ratio)
+            if ratio > tolerance:
+                status += "  <-- SLOWER"
+                regressions += 1
+        print("{:<58} {:>7} {:>7} {:<14} {:>12}  {}".format(
+            name, length, density, op_name, timing, status))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="benchmark all the SparseArray implementations")
+    parser.add_argument("paths", nargs="*",
+                        help="implementations to run (default: all)")
+    parser.add_argument("--lengths", type=int, nargs="+", default=LENGTHS)
+    parser.add_argument("--densities", type=float, nargs="+",
+                        default=DENSITIES)
+    parser.add_argument("--save", help="save the results here as a baseline")
+    parser.add_argument("--baseline", help="compare with this baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="how many times slower is a regression")
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.paths or find_implementations(),
+                        args.lengths, args.densities)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = report(results, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+    if baseline is not None:
+        print("{} regression(s)".format(regressions))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
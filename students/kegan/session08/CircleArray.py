@@ -0,0 +1,404 @@
+"""
+Kathryn Egan
+"""
+import math
+from array import array
+from operator import add, mul, truediv
+from Circle import Circle, Sphere
+
+
+class CircleView(Circle):
+    """ A Circle that is one item of a CircleArray: its radius is read
+    from and written to the array's buffer, so nothing is copied.
+
+    A view follows its position in the array, not the circle that was
+    there, so after sorting the array it sees whatever circle is there now.
+    """
+
+    def __init__(self, circles, index):
+        """ Initializes view of given item. O(1)
+        Args:
+            circles (CircleArray) : array the circle is in
+            index (int) : forward index of circle in array
+        """
+        self._circles = circles
+        self._index = index
+
+    @property
+    def _radius(self):
+        """ Returns radius from the array's buffer. """
+        return self._circles._radii[self._index]
+
+    @_radius.setter
+    def _radius(self, radius):
+        """ Sets radius in the array's buffer. """
+        self._circles._radii[self._index] = radius
+
+
+class SphereView(CircleView, Sphere):
+    """ A Sphere that is one item of a SphereArray. """
+
+
+class CircleArray:
+    """ Defines functionality for many circles at once. Instead of a
+    Circle object for each circle, a CircleArray keeps all the radii in
+    one buffer of floats (8 bytes each, instead of about 100 for a
+    Circle and its float), and does the math for all of them in one
+    pass over the buffer.
+
+    Indexing gives a Circle that is a view onto the buffer, and
+    iterating gives one for each circle, for code that works with
+    one Circle at a time.
+
+    For all O notation,
+      k = number of elements in parameter
+      n = number of circles in CircleArray
+    """
+
+    _item = Circle  # class of new circles
+    _view = CircleView  # class of items, as views
+
+    def __init__(self, radii=()):
+        """ Initializes CircleArray. Raises ValueError if any radius
+        is <= 0. O(k)
+        Args:
+            radii (iterable) :
+                radius of each circle, as numbers or Circles
+        """
+        self._radii = self._check(array('d', map(float, radii)))
+
+    @staticmethod
+    def _check(radii):
+        """ Raises ValueError if any of the radii is <= 0. O(n)
+        Args:
+            radii (array) : radii to check
+        Returns:
+            array : radii
+        """
+        if radii and min(radii) <= 0:
+            raise ValueError('Radius must be >0')
+        return radii
+
+    def _new(self, radii):
+        """ Returns a new array of the same type with the given radii,
+        without copying them. O(n)
+        Args:
+            radii (array) : radii of new array
+        Returns:
+            CircleArray : new array
+        """
+        new = type(self).__new__(type(self))
+        new._radii = self._check(radii)
+        return new
+
+    @classmethod
+    def from_diameters(cls, diameters):
+        """ Returns new CircleArray with given diameters. O(k)
+        Args:
+            diameters (iterable) : diameter of each circle
+        Returns:
+            CircleArray : circles with given diameters
+        """
+        return cls(d / 2 for d in map(float, diameters))
+
+    @property
+    def radius(self):
+        """ Returns the radii of the circles. O(n)
+        Returns:
+            array : radius of each circle, as a copy
+        """
+        return array('d', self._radii)
+
+    @radius.setter
+    def radius(self, radii):
+        """ Sets the radii of the circles. O(k)
+        Args:
+            radii (iterable) : radius of each circle
+        """
+        radii = self._check(array('d', map(float, radii)))
+        if len(radii) != len(self):
+            raise ValueError('Need {} radii'.format(len(self)))
+        self._radii = radii
+
+    @property
+    def diameter(self):
+        """ Returns the diameters of the circles. O(n)
+        Returns:
+            array : diameter of each circle
+        """
+        return array('d', [r * 2 for r in self._radii])
+
+    @property
+    def area(self):
+        """ Returns the areas of the circles. O(n)
+        Returns:
+            array : area of each circle
+        """
+        return array('d', [math.pi * r ** 2 for r in self._radii])
+
+    def __len__(self):
+        """ Returns the number of circles. O(1)
+        Returns:
+            int : number of circles
+        """
+        return len(self._radii)
+
+    def _iforward(self, index):
+        """ Converts a backwards index counting from end of array
+        to a forward index. Raises IndexError if index is out of range.
+        Args:
+            index (int) : index to convert
+        Returns:
+            int : given index as forward index
+        """
+        forward = len(self) + index if index < 0 else index
+        if forward < 0 or forward >= len(self):
+            raise IndexError('Index out of range')
+        return forward
+
+    def __getitem__(self, index):
+        """ Returns the circle at given index, as a view, or the
+        circles in the range as a new array if index is a slice.
+        O(1) for an index, O(circles in range) for a slice
+        Args:
+            index (int or slice) : index of circle(s) to return
+        Returns:
+            Circle or CircleArray : circle at index or circles in range
+        """
+        if isinstance(index, slice):
+            return self._new(self._radii[index])
+        return self._view(self, self._iforward(index))
+
+    def __setitem__(self, index, circle):
+        """ Sets the circle at given index. O(1)
+        Args:
+            index (int) : index of circle to change
+            circle (Circle or number) : circle, or its radius
+        """
+        radius = float(circle)
+        if radius <= 0:
+            raise ValueError('Radius must be >0')
+        self._radii[self._iforward(index)] = radius
+
+    def __delitem__(self, index):
+        """ Deletes circle at given index. O(n)
+        Args:
+            index (int) : index of circle to delete
+        """
+        del self._radii[self._iforward(index)]
+
+    def __iter__(self):
+        """ Yields a view of each circle in order. O(n) """
+        view = self._view
+        for i in range(len(self)):
+            yield view(self, i)
+
+    def append(self, circle):
+        """ Appends given circle. O(1)
+        Args:
+            circle (Circle or number) : circle, or its radius
+        """
+        radius = float(circle)
+        if radius <= 0:
+            raise ValueError('Radius must be >0')
+        self._radii.append(radius)
+
+    def extend(self, circles):
+        """ Appends the given circles. O(k)
+        Args:
+            circles (iterable) : circles, or their radii
+        """
+        if isinstance(circles, CircleArray):
+            self._radii.extend(circles._radii)
+        else:
+            self._radii.extend(self._check(array('d', map(float, circles))))
+
+    def _operate(self, other, op):
+        """ Returns the radii after doing op with other to each radius:
+        elementwise for another CircleArray, or the same for all for a
+        number or Circle. Raises ValueError if a CircleArray is a
+        different length. O(n)
+        Args:
+            other (CircleArray or Circle or number) : other operand
+            op (function) : operation on two radii
+        Returns:
+            array : resulting radii
+        """
+        if isinstance(other, CircleArray):
+            if len(other) != len(self):
+                raise ValueError('CircleArrays are different lengths')
+            return array('d', map(op, self._radii, other._radii))
+        other = float(other)
+        return array('d', [op(r, other) for r in self._radii])
+
+    def __add__(self, other):
+        """ Returns new array with each radius plus the given array's
+        radius, or plus the given number or Circle's radius. O(n)
+        Args:
+            other (CircleArray or Circle or number) : what to add
+        Returns:
+            CircleArray : new array with radii added
+        """
+        return self._new(self._operate(other, add))
+
+    def __radd__(self, other):
+        """ Adds commutative functionality for adding numbers. """
+        return self.__add__(other)
+
+    def __iadd__(self, other):
+        """ Adds to each radius in place. O(n) """
+        self._radii = self._check(self._operate(other, add))
+        return self
+
+    def __mul__(self, other):
+        """ Returns new array with each radius times the given array's
+        radius, or times the given number or Circle's radius. O(n)
+        Args:
+            other (CircleArray or Circle or number) : what to multiply by
+        Returns:
+            CircleArray : new array with radii multiplied
+        """
+        return self._new(self._operate(other, mul))
+
+    def __rmul__(self, other):
+        """ Adds commutative functionality for multiplying numbers. """
+        return self.__mul__(other)
+
+    def __imul__(self, other):
+        """ Multiplies each radius in place. O(n) """
+        self._radii = self._check(self._operate(other, mul))
+        return self
+
+    def __truediv__(self, other):
+        """ Returns new array with each radius divided by the given
+        array's radius, or by the given number or Circle's radius. O(n)
+        Args:
+            other (CircleArray or Circle or number) : what to divide by
+        Returns:
+            CircleArray : new array with radii divided
+        """
+        return self._new(self._operate(other, truediv))
+
+    def total(self):
+        """ Returns one circle with all the radii added up, like
+        sum() of the circles would. O(n)
+        Returns:
+            Circle : circle with total radius
+        """
+        return self._item(math.fsum(self._radii))
+
+    def argsort(self, reverse=False):
+        """ Returns the indexes that would put the circles in order of
+        radius (the same order as sorting the Circles). O(n log n)
+        Args:
+            reverse (bool) : largest first if True
+        Returns:
+            list : indexes of circles in sorted order
+        """
+        return sorted(range(len(self)), key=self._radii.__getitem__,
+                      reverse=reverse)
+
+    def sort(self, reverse=False):
+        """ Sorts the circles by radius in place. O(n log n)
+        Args:
+            reverse (bool) : largest first if True
+        """
+        self._radii = array('d', sorted(self._radii, reverse=reverse))
+
+    def take(self, indexes):
+        """ Returns new array with the circles at the given indexes,
+        in that order (e.g. from argsort). O(k)
+        Args:
+            indexes (iterable) : indexes of circles to take
+        Returns:
+            CircleArray : circles at indexes
+        """
+        radii = self._radii
+        return self._new(array('d', [radii[i] for i in indexes]))
+
+    def compress(self, selectors):
+        """ Returns new array with the circles whose selector is true,
+        like itertools.compress. O(n)
+        Args:
+            selectors (iterable) : one truth value per circle
+        Returns:
+            CircleArray : circles that are selected
+        """
+        return self._new(array('d', [r for r, keep in zip(self._radii,
+                                                          selectors)
+                                     if keep]))
+
+    def between(self, low=None, high=None):
+        """ Returns new array with the circles with low <= radius <= high.
+        O(n)
+        Args:
+            low (Circle or number) : smallest radius to keep, if any
+            high (Circle or number) : largest radius to keep, if any
+        Returns:
+            CircleArray : circles in range
+        """
+        low = -math.inf if low is None else float(low)
+        high = math.inf if high is None else float(high)
+        return self._new(array('d', [r for r in self._radii
+                                     if low <= r <= high]))
+
+    def __eq__(self, other):
+        """ Returns whether other is the same kind of array with the
+        same radii. O(n)
+        Args:
+            other (CircleArray) : array to compare against
+        Returns:
+            bool : True if the radii are the same, False otherwise
+        """
+        if not isinstance(other, CircleArray):
+            return NotImplemented
+        return type(self) is type(other) and self._radii == other._radii
+
+    def __str__(self):
+        """ Returns array as string. O(n)
+        Returns:
+            str : array as string
+        """
+        return '{}, r=[{}]'.format(
+            type(self).__name__,
+            ', '.join('{:.1f}'.format(r) for r in self._radii))
+
+    def __repr__(self):
+        """ Returns representation of array. O(n)
+        Returns:
+            str : representation of array
+        """
+        return '{}({})'.format(type(self).__name__, list(self._radii))
+
+
+class SphereArray(CircleArray):
+    """ Defines functionality for many spheres at once. """
+
+    _item = Sphere
+    _view = SphereView
+
+    @classmethod
+    def from_volumes(cls, volumes):
+        """ Returns new SphereArray with given volumes. O(k)
+        Args:
+            volumes (iterable) : volume of each sphere
+        Returns:
+            SphereArray : spheres with given volumes
+        """
+        return cls((v * 3 / (4 * math.pi)) ** (1 / 3) for v in volumes)
+
+    @property
+    def area(self):
+        """ Returns the surface areas of the spheres. O(n)
+        Returns:
+            array : surface area of each sphere
+        """
+        return array('d', [4 * (math.pi * r ** 2) for r in self._radii])
+
+    @property
+    def volume(self):
+        """ Returns the volumes of the spheres. O(n)
+        Returns:
+            array : volume of each sphere
+        """
+        return array('d', [(4 / 3) * math.pi * r ** 3 for r in self._radii])
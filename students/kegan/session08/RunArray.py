@@ -0,0 +1,447 @@
+"""
+Kathryn Egan
+"""
+from bisect import bisect_right
+from itertools import repeat
+
+
+class RunArray(list):
+    """ Defines functionality for a run-length encoded array. Instead
+    of storing every value, a RunArray stores runs of the same value,
+    as the index each run starts at and its value, so a million 7's in
+    a row take up as much room as one.
+
+    Runs next to each other never have the same value (they get merged
+    when they are changed), so there is only one way to store any array.
+
+    For all O notation,
+      k = number of elements in parameter
+      n = number of values in RunArray
+      r = number of runs in RunArray
+    """
+
+    def __init__(self, array=[]):
+        """ Initializes RunArray. O(k), or O(r) if array is a RunArray
+        Args:
+            array (iterable) :
+                values to convert to RunArray in an iterable object
+        """
+        self._starts = []  # index each run starts at, in order
+        self._values = []  # value of each run
+        self._length = 0  # length of array
+        self.extend(array)
+
+    def runs(self):
+        """ Yields the runs in this RunArray in order. O(r)
+        Yields:
+            (int, int, value) : start, length and value of each run
+        """
+        for i, start in enumerate(self._starts):
+            yield start, self._end(i) - start, self._values[i]
+
+    def _end(self, run):
+        """ Returns the index after the end of the given run. O(1)
+        Args:
+            run (int) : run number
+        Returns:
+            int : where the next run starts
+        """
+        if run + 1 < len(self._starts):
+            return self._starts[run + 1]
+        return self._length
+
+    def _run(self, index):
+        """ Returns the number of the run the given index is in. O(log r)
+        Args:
+            index (int) : forward index in range
+        Returns:
+            int : run number
+        """
+        return bisect_right(self._starts, index) - 1
+
+    def _iforward(self, index):
+        """ Converts a backwards index counting from end of array
+        to a forward index. Raises IndexError if index is out of range.
+        Args:
+            index (int) : index to convert
+        Returns:
+            int : given index as forward index
+        """
+        forward = len(self) + index if index < 0 else index
+        if forward < 0 or forward >= len(self):
+            raise IndexError('Index out of range')
+        return forward
+
+    def _shift(self, run, amount):
+        """ Moves the starts of the given run and all the runs after
+        it by amount. O(r)
+        """
+        starts = self._starts
+        starts[run:] = [start + amount for start in starts[run:]]
+
+    def _merge(self, low, high):
+        """ Merges any runs with the same value as the run before them,
+        from run low to run high. O(r)
+        Args:
+            low (int) : first run to check
+            high (int) : last run to check
+        """
+        for run in range(min(high, len(self._starts) - 1), max(low, 1) - 1,
+                         -1):
+            if self._values[run] == self._values[run - 1]:
+                del self._starts[run]
+                del self._values[run]
+
+    def __len__(self):
+        """ Returns the length of this array. O(1)
+        Returns:
+            int : length of RunArray
+        """
+        return self._length
+
+    def __getitem__(self, index):
+        """ Returns the item at given index or the items in
+        the range if index is a slice object. Raises IndexError
+        if given index integer is outside scope of array.
+        O(log r) for an index, O(runs in range) for a slice
+        Args:
+            index (int or slice or tuple) :
+                index of value to return
+                slice object specifying indexes of values to return
+                tuple of slice objects
+        Returns:
+            value or RunArray :
+                value at given index or
+                RunArray containing values in range specified by slice(s)
+        """
+        if isinstance(index, slice):
+            return self._slice(index)
+        if isinstance(index, tuple):
+            result = RunArray()
+            for s in index:
+                result.extend(self._slice(s))
+            return result
+        return self._values[self._run(self._iforward(index))]
+
+    def _slice(self, slice):
+        """ Returns items in slice as another RunArray. Each run adds
+        however many of its indexes the slice steps on. O(runs in range)
+        Args:
+            slice (slice) :
+                slice object specifying start, stop, step of desired range
+        Returns:
+            RunArray :
+                RunArray containing values in range specified by slice
+        """
+        indexes = range(*slice.indices(len(self)))
+        result = RunArray()
+        if not indexes:
+            return result
+        # work with the indexes in increasing order, and reverse at the end
+        forward = indexes if indexes.step > 0 else indexes[::-1]
+        first = self._run(forward[0])
+        last = self._run(forward[-1])
+        for run in range(first, last + 1):
+            # how many of the indexes are before the start and end of run
+            before_start = self._count_before(forward, self._starts[run])
+            before_end = self._count_before(forward, self._end(run))
+            result._add_run(before_end - before_start, self._values[run])
+        if indexes.step < 0:
+            result.reverse()
+        return result
+
+    @staticmethod
+    def _count_before(indexes, index):
+        """ Returns how many of the increasing indexes are before index.
+        O(1)
+        Args:
+            indexes (range) : indexes with a positive step
+            index (int) : index to count up to
+        Returns:
+            int : number of indexes less than index
+        """
+        count = -(-(index - indexes.start) // indexes.step)
+        return max(0, min(len(indexes), count))
+
+    def _add_run(self, length, value):
+        """ Adds a run to the end of this RunArray, merging it into the
+        last run if it has the same value. O(1)
+        Args:
+            length (int) : length of run
+            value : value of run
+        """
+        if length <= 0:
+            return
+        if not self._values or self._values[-1] != value:
+            self._starts.append(self._length)
+            self._values.append(value)
+        self._length += length
+
+    def __setitem__(self, index, value):
+        """ Sets item at given index to given value, splitting the
+        run it is in and merging with the runs around it as needed.
+        Raises IndexError if index is out of range. O(r)
+        Args:
+            index (int) : index of value to change
+            value : desired value
+        """
+        index = self._iforward(index)
+        run = self._run(index)
+        old = self._values[run]
+        if old == value:
+            return
+        start = self._starts[run]
+        end = self._end(run)
+        # the run becomes (up to) three: before, index, after
+        starts = [index]
+        values = [value]
+        if start < index:
+            starts.insert(0, start)
+            values.insert(0, old)
+        if index + 1 < end:
+            starts.append(index + 1)
+            values.append(old)
+        self._starts[run:run + 1] = starts
+        self._values[run:run + 1] = values
+        self._merge(run, run + len(starts))
+
+    def __delitem__(self, index):
+        """ Deletes item at given index.
+        Raises IndexError if index is out of range. O(r)
+        Args:
+            index (int) : index of value to delete
+        """
+        index = self._iforward(index)
+        run = self._run(index)
+        if self._end(run) - self._starts[run] == 1:
+            # run is gone
+            del self._starts[run]
+            del self._values[run]
+            self._shift(run, -1)
+            self._merge(run, run)
+        else:
+            self._shift(run + 1, -1)
+        self._length -= 1
+
+    def insert(self, index, value):
+        """ Inserts given value at given index. O(r)
+        Args:
+            index (int) : index to insert value at
+            value : value to insert
+        """
+        index = len(self) + index if index < 0 else index
+        index = max(0, min(len(self), index))
+        if index == len(self):
+            self._add_run(1, value)
+            return
+        run = self._run(index)
+        if self._values[run] == value:
+            # goes in this run
+            self._shift(run + 1, 1)
+        elif index == self._starts[run] and run and \
+                self._values[run - 1] == value:
+            # goes at the end of the run before
+            self._shift(run, 1)
+        elif index == self._starts[run]:
+            # new run before this one
+            self._starts.insert(run, index)
+            self._values.insert(run, value)
+            self._shift(run + 1, 1)
+        else:
+            # splits this run
+            self._starts[run + 1:run + 1] = [index, index + 1]
+            self._values[run + 1:run + 1] = [value, self._values[run]]
+            self._shift(run + 3, 1)
+        self._length += 1
+
+    def append(self, value):
+        """ Appends the given value to the end of this RunArray. O(1)
+        Args:
+            value : value to append to this RunArray
+        """
+        self._add_run(1, value)
+
+    def extend(self, other):
+        """ Extends this RunArray with the given array.
+        O(k), or O(r) for another RunArray
+        Args:
+            other (iterable) :
+                values to append to this RunArray as iterable object
+        """
+        if isinstance(other, RunArray):
+            for _, length, value in list(other.runs()):
+                self._add_run(length, value)
+            return
+        for value in other:
+            self._add_run(1, value)
+
+    def __iter__(self):
+        """ Yields items in this RunArray in order. O(n) """
+        for _, length, value in self.runs():
+            yield from repeat(value, length)
+
+    def __reversed__(self):
+        """ Yields items in this RunArray in reverse. O(n) """
+        for _, length, value in reversed(list(self.runs())):
+            yield from repeat(value, length)
+
+    def reverse(self):
+        """ Reverses the items in this RunArray. O(r) """
+        runs = list(self.runs())
+        self._starts = []
+        self._values = []
+        self._length = 0
+        for _, length, value in reversed(runs):
+            self._add_run(length, value)
+
+    def __contains__(self, value):
+        """ Returns whether this RunArray contains given value. O(r)
+        Args:
+            value : value to search for
+        Returns:
+            bool : whether given value is in RunArray
+        """
+        return value in self._values
+
+    def index(self, value):
+        """ Returns first index of given value.
+        Raises ValueError if value is not in this RunArray. O(r)
+        Args:
+            value : value to search for
+        Returns:
+            int : first index of value
+        """
+        for start, _, v in self.runs():
+            if v == value:
+                return start
+        raise ValueError('Value not in array')
+
+    def count(self, value):
+        """ Counts number of instances of value. O(r)
+        Args:
+            value : value to count
+        Returns:
+            int : count of given value
+        """
+        return sum(length for _, length, v in self.runs() if v == value)
+
+    def __add__(self, other):
+        """ Adds given iterable to new RunArray copy, returns copy.
+        Args:
+            other (iterable) : values to append to RunArray
+        Returns:
+            RunArray : new RunArray copy with given values appended
+        """
+        new = RunArray(self)
+        new.extend(other)
+        return new
+
+    def __iadd__(self, other):
+        """ Adds given iterable to this RunArray and returns self.
+        Args:
+            other (iterable) : values to append RunArray
+        Returns:
+            self : this RunArray with values added
+        """
+        self.extend(other)
+        return self
+
+    def __mul__(self, value):
+        """ Multiplies this RunArray by the given integer. O(value * r)
+        Args:
+            value (int) : number of copies of RunArray in result
+        Returns:
+            RunArray :
+                new RunArray with [value] number of copies of original
+        """
+        new = RunArray()
+        for i in range(value):
+            new.extend(self)
+        return new
+
+    def __rmul__(self, value):
+        """ Provides commutative multiplication for RunArray. """
+        return self.__mul__(value)
+
+    def _compare(self, other):
+        """ Compares this RunArray to other the way lists compare:
+        by the first value that is different, or by length if one
+        runs out first. O(k)
+        Args:
+            other (iterable) : object to compare
+        Returns:
+            int : negative if self < other, 0 if equal, positive if greater
+        """
+        other = iter(other)
+        length = 0
+        for a, b in zip(self, other):
+            if a != b:
+                return -1 if a < b else 1
+            length += 1
+        if length < len(self):
+            return 1
+        return -1 if next(other, self) is not self else 0
+
+    def __eq__(self, other):
+        """ Returns whether this RunArray is equivalent to
+        another RunArray or another iterable.
+        O(r) if other is a RunArray, else O(k)
+        Args:
+            other (iterable) : object to compare
+        Returns:
+            bool :
+                True if other has same values and no more or fewer
+                values that this RunArray, False otherwise
+        """
+        try:
+            if len(other) != len(self):
+                return False
+        # iterable with no length function
+        except TypeError:
+            pass
+        if isinstance(other, RunArray):
+            # there is only one way to store the same values
+            return (self._starts == other._starts and
+                    self._values == other._values)
+        other = iter(other)
+        length = 0
+        for a, b in zip(self, other):
+            if a != b:
+                return False
+            length += 1
+        return length == len(self) and next(other, self) is self
+
+    def __ne__(self, other):
+        """ Returns whether this RunArray is not equivalent to other. """
+        return not self.__eq__(other)
+
+    def __lt__(self, other):
+        """ Returns whether self is less than other object. """
+        return self._compare(other) < 0
+
+    def __gt__(self, other):
+        """ Returns whether self is greater than other object. """
+        return self._compare(other) > 0
+
+    def __le__(self, other):
+        """ Returns whether self is less than or equal to other object. """
+        return self._compare(other) <= 0
+
+    def __ge__(self, other):
+        """ Returns whether self is greater than or equal to other object.
+        """
+        return self._compare(other) >= 0
+
+    def __str__(self):
+        """ Returns this RunArray as a string. O(n)
+        Returns:
+            str : this RunArray as a string
+        """
+        return '[' + ', '.join(map(repr, self)) + ']'
+
+    def __repr__(self):
+        """ Returns a representation of this RunArray. O(n)
+        Returns:
+            str : this RunArray as a string
+        """
+        return str(self)
@@ -1,29 +1,143 @@
 """
 Kathryn Egan
 """
+import math
+import numbers
+import weakref
+from bisect import bisect_left, insort
+from itertools import repeat
+from sparse_storage import BlockStorage
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for to_dense
+    numpy = None
 
 
 class SparseArray(list):
     """ Defines functionality for a sparse array. A sparse array
     stores only non-zero values.
+
+    Slices are views: they share the stored values of the array they
+    were taken from, and only get their own copy when one of them is
+    changed. Value at index i of an array is stored under index
+    start + i * step, so a slice (or a reversed array) is just a
+    different start and step on the same stored values.
+
     For all O notation,
       k = number of elements in parameter
       m = number of non-zero values in SparseArray
       n = number of values including virtual zeros in SparseArray
+      r = number of non-zero values stored in range of a view
+
+    + and * work like they do for lists (joining and repeating).
+    The numeric operations are methods: add, multiply, dot, sum,
+    min, max and norm.
+
+    The non-zero values can be kept in a BlockStorage (the default),
+    which is fast to change anywhere, or an ArrayStorage, which takes
+    much less memory but is slow to change, so is best for arrays that
+    are built once and then frozen. Arrays made from an array (slices,
+    results of operations) use the same kind of storage.
+
+    index_values() turns on an index from each non-zero value to the
+    indexes it is at, which makes in, index and count fast, at the
+    cost of memory and of inserts and deletes in the middle becoming
+    O(m) (every index after the change has to move).
     """
 
-    def __init__(self, array=[]):
-        """ Initializes SparseArray. O(n)
+    storage = BlockStorage  # default kind of storage for non-zero values
+
+    def __init__(self, array=[], storage=None):
+        """ Initializes SparseArray. O(n), or O(1) if array is a
+        SparseArray (the values are shared until either one changes)
         Args:
             array (iterable) :
                 values to convert to SparseArray in an iterable object
+            storage (class) :
+                BlockStorage or ArrayStorage to keep the non-zero
+                values in, None for the default
         """
-        self._data = {}  # index : non-zero value
         self._length = len(array)  # length of array w/ zeros
-        self._reversed = False  # array is reversed
-        for i, num in enumerate(array):
-            if num != 0:
-                self._data[i] = num
+        self._indexed = False  # keep an index of values
+        self._positions = None  # value : sorted indexes, None if not built
+        if isinstance(array, SparseArray):
+            if storage in (None, type(array._data)):
+                self._share(array, array._start, array._step)
+                return
+            items = array.nonzero()
+        else:
+            items = ((i, num) for i, num in enumerate(array) if num != 0)
+        self._start = 0  # stored index of first value
+        self._step = 1  # distance between stored indexes of values
+        # arrays (still around) using the same stored values
+        self._users = weakref.WeakValueDictionary({id(self): self})
+        self._whole = True  # all the stored values are in range
+        # index : non-zero value
+        self._data = (storage or self.storage).from_items(items)
+
+    def _share(self, other, start, step):
+        """ Makes this SparseArray a view on the stored values of
+        another SparseArray. O(1)
+        Args:
+            other (SparseArray) : array to share values with
+            start (int) : stored index of first value
+            step (int) : distance between stored indexes of values
+        """
+        self._data = other._data
+        self._start = start
+        self._step = step
+        self._users = other._users
+        self._users[id(self)] = self
+        self._whole = (other._whole and start == other._start and
+                       step == other._step and len(self) == len(other))
+
+    def _own(self, force=False):
+        """ Gives this SparseArray its own copy of its values if they
+        are shared with another array that is still around, or frozen,
+        or if it is a view on part of them, so that they can be changed.
+        O(r) if a copy is made, else O(1)
+        Args:
+            force (bool) : make a copy (in forward order) regardless
+        """
+        if (force or len(self._users) > 1 or not self._whole or
+                self._data.frozen):
+            self._data = type(self._data).from_items(self.nonzero())
+            self._start = 0
+            self._step = 1
+            self._users.pop(id(self), None)
+            self._users = weakref.WeakValueDictionary({id(self): self})
+            self._whole = True
+
+    def nonzero(self):
+        """ Yields index, value pairs for the non-zero values in
+        this SparseArray, in order of index. O(r)
+        Yields:
+            (int, int) : index and non-zero value
+        """
+        return self._nonzero()
+
+    def _nonzero(self, reverse=False):
+        """ Yields index, value pairs for the non-zero values in
+        this SparseArray, in order of index. O(r)
+        Args:
+            reverse (bool) : yield from the last index back instead
+        Yields:
+            (int, int) : index and non-zero value
+        """
+        if not len(self):
+            return
+        start = self._start
+        step = self._step
+        end = start + (len(self) - 1) * step
+        if step > 0:
+            items = self._data.items(start, end + 1, reverse=reverse)
+        else:
+            items = self._data.items(end, start + 1, reverse=not reverse)
+        for stored, value in items:
+            offset = stored - start
+            if offset % step == 0:
+                yield offset // step, value
 
     @property
     def data(self):
@@ -32,7 +146,7 @@ class SparseArray(list):
         Returns:
             dic int:int : indexes mapped to non-zero values
         """
-        return self._data
+        return dict(self.nonzero())
 
     def _iforward(self, index):
         """ Converts a backwards index counting from end of array
@@ -60,10 +174,22 @@ class SparseArray(list):
         if index is not None:
             return len(self) - index - 1
 
+    def _istored(self, index):
+        """ Returns the index the value at the given (forward) index
+        is stored under, which is different from the index when this
+        SparseArray is a view or virtually reversed. O(1)
+        Args:
+            index (int) : forward index
+        Returns:
+            int : index in stored data
+        """
+        return self._start + index * self._step
+
     def __getitem__(self, index):
         """ Returns the item at given index or the items in
         the range if index is a slice object. Raises IndexError
-        if given index integer is outside scope of array. O(k * m)
+        if given index integer is outside scope of array.
+        O(log m) for an index, O(1) for a slice, O(r) for a tuple
         Args:
             index (int or slice or tuple) :
                 index of value to return
@@ -80,22 +206,20 @@ class SparseArray(list):
         except TypeError:
             try:
                 return self._slice(index)
-            # index is a tuple not a slice O(k * k) <-inefficient
+            # index is a tuple not a slice O(r)
             except AttributeError:
-                result = SparseArray()
+                result = SparseArray(storage=type(self._data))
                 for s in index:
                     result.extend(self._slice(s))
                 return result
-        else:  # O(1)
+        else:  # O(log m)
             if index < 0 or index >= len(self):
                 raise IndexError('Index out of range')
-            index = self._ireverse(index) if self._reversed else index
-            if index in self._data:
-                return self._data[index]
-            return 0
+            return self._data.get(self._istored(index))
 
     def _slice(self, slice):
-        """ Returns items in slice as another SparseArray. O(k)
+        """ Returns items in slice as a SparseArray view on this
+        one's values. O(1)
         Args:
             slice (slice) :
                 slice object specifying start, stop, step of desired range
@@ -103,37 +227,12 @@ class SparseArray(list):
             SparseArray :
                 SparseArray containing values in range specified by slice
         """
-        from math import fabs
-        step = 1 if slice.step is None else slice.step
-        start = self._inormalize(slice.start, 0, step < 0)
-        stop = self._inormalize(slice.stop, len(self), step < 0)
+        start, stop, step = slice.indices(len(self))
         result = SparseArray()
-        for i in range(start, stop, int(fabs(step))):
-            i = self._ireverse(i) if step < 0 else i
-            result.append(self[i])
+        result._length = len(range(start, stop, step))
+        result._share(self, self._istored(start), self._step * step)
         return result
 
-    def _inormalize(self, index, sub, reverse):
-        """ Returns normalized index. Substitutes index with given
-        sub if index is None, and reverses index if a reversed
-        index is required. O(1)
-        Args:
-            index (int) : index to normalize
-            initial (bool) : whether this index starts the desired array
-            reverse (bool) : whether the desired array is reversed
-        Returns:
-            int : normalized index
-        """
-        # convert any backwards index to forwards
-        index = self._iforward(index)
-        # get reversed version of index if array is reversed
-        index = self._ireverse(index) if reverse else index
-        # apply limit if index does not exist
-        index = sub if index is None else index
-        # apply limit if index goes beyond either end of array
-        index = self._ilimit(index)
-        return index
-
     def _ilimit(self, index):
         """ Applies limit of 0 or length of array to index,
         whichever is closer to non-viable index. If this
@@ -156,7 +255,7 @@ class SparseArray(list):
 
     def __setitem__(self, index, value):
         """ Sets item at given index to given value.
-        Raises IndexError if index is out of range. O(1)
+        Raises IndexError if index is out of range. O(log m)
         Args:
             index (int) : index of value to change
             value (int) : desired value
@@ -164,38 +263,56 @@ class SparseArray(list):
         index = self._iforward(index)
         if index < 0 or index >= len(self):
             raise IndexError('Index out of range')
+        self._own()
+        stored = self._istored(index)
+        if self._positions is not None:
+            old = self._data.get(stored)
+            if old != 0:
+                self._index_remove(index, old)
+            if value != 0:
+                self._index_add(index, value)
         if value != 0:
-            self._data[index] = value
+            self._data.set(stored, value)
         # setting a non-zero value to zero pops value
-        elif index in self._data:
-            self._data.pop(index)
+        else:
+            self._data.pop(stored)
 
     def __delitem__(self, index):
         """ Deletes item at given index.
-        Raises IndexError if index is out of range. O(m)
+        Raises IndexError if index is out of range.
+        O(log m), or O(m) in the middle with the index of values
         Args:
             index (int) : index of value to delete
         """
         index = self._iforward(index)
         if index < 0 or index >= len(self):
             raise IndexError('Index out of range')
-        deleted = {}
-        for k, v in self._data.items():
-            if k < index:
-                deleted[k] = v
-            elif k > index:
-                deleted[k - 1] = v
-            # do not add deleted index to output
-        self._data = deleted
+        self._own()
+        old = self._data.pop(self._istored(index))
+        if old is not None:
+            self._index_remove(index, old)
+        self._index_shift(index + 1, -1)
+        index = self._istored(index)
+        # move everything after deleted index down one
+        self._data.shift(index + 1, -1)
+        # which moves the first value if reversed
+        if self._step < 0:
+            self._start -= 1
         self._length -= 1
 
     def __iter__(self):
-        """ Yields items in this SparseArray in order. O(n) """
-        for key in range(len(self)):
-            yield self[key]
+        """ Yields items in this SparseArray in order, filling in
+        the zeros between non-zero values a run at a time. O(n) """
+        previous = -1
+        for index, value in self.nonzero():
+            yield from repeat(0, index - previous - 1)
+            yield value
+            previous = index
+        yield from repeat(0, len(self) - previous - 1)
 
     def __contains__(self, value):
-        """ Returns whether this SparseArray contains given value. O(m)
+        """ Returns whether this SparseArray contains given value.
+        O(r), or O(1) with the index of values
         Args:
             value (int) : value to search for
         Returns:
@@ -203,11 +320,14 @@ class SparseArray(list):
         """
         # presence of zeros is determined by len of
         # stored data being less than virtual length
-        if value == 0 and len(self) > len(self._data):
-            return True
-        for k, v in self._data.items():
+        if value == 0:
+            return len(self) > self._count_nonzero()
+        if self._indexed:
+            return value in self._value_index()
+        for _, v in self.nonzero():
             if v == value:
                 return True
+        return False
 
     def __add__(self, other):
         """ Adds given iterable to new SparseArray copy,
@@ -240,7 +360,7 @@ class SparseArray(list):
             SparseArray :
                 new SparseArray with [value] number of copies of original
         """
-        new = SparseArray()
+        new = SparseArray(storage=type(self._data))
         for i in range(value):
             new.extend(self)
         return new
@@ -249,9 +369,48 @@ class SparseArray(list):
         """ Provides commutative multiplication for SparseArray. """
         return self.__mul__(value)
 
+    def _count_nonzero(self):
+        """ Returns the number of non-zero values.
+        O(1) if this SparseArray has its own values, else O(r)
+        Returns:
+            int : number of non-zero values
+        """
+        if self._whole:
+            return len(self._data)
+        return sum(1 for _ in self.nonzero())
+
+    def _compare(self, other):
+        """ Compares this SparseArray to other the way lists compare:
+        by the first value that is different, or by length if one
+        runs out first. O(r + k) if other is a SparseArray, else O(k)
+        Args:
+            other (iterable) : object to compare
+        Returns:
+            int : negative if self < other, 0 if equal, positive if greater
+        """
+        if isinstance(other, SparseArray):
+            # only indexes where one of them is non-zero can differ
+            length = min(len(self), len(other))
+            for index, a, b in self._merge(other):
+                if index >= length:
+                    break
+                if a != b:
+                    return -1 if a < b else 1
+            return len(self) - len(other)
+        other = iter(other)
+        length = 0
+        for a, b in zip(self, other):
+            if a != b:
+                return -1 if a < b else 1
+            length += 1
+        if length < len(self):
+            return 1
+        return -1 if next(other, self) is not self else 0
+
     def __eq__(self, other):
         """ Returns whether this SparseArray is equivalent to
-        another SparseArray or another iterable. O(k)
+        another SparseArray or another iterable.
+        O(r + k) if other is a SparseArray, else O(k)
         Args:
             other (iterable) : object to compare
         Returns:
@@ -265,14 +424,20 @@ class SparseArray(list):
         # iterable with no length function
         except TypeError:
             pass
-        for index, value in enumerate(other):
-            if self[index] != value:
+        if isinstance(other, SparseArray):
+            return list(self.nonzero()) == list(other.nonzero())
+        other = iter(other)
+        length = 0
+        for a, b in zip(self, other):
+            if a != b:
                 return False
-        return True
+            length += 1
+        # neither one can be longer
+        return length == len(self) and next(other, self) is self
 
     def __ne__(self, other):
         """ Returns whether this SparseArray is not equivalent to
-        another SparseArray or another iterable. O(k)
+        another SparseArray or another iterable.
         Args:
             other (iterable) : object to compare
         Returns:
@@ -282,7 +447,7 @@ class SparseArray(list):
         return not self.__eq__(other)
 
     def __lt__(self, other):
-        """ Returns whether self is less than other object. O(k)
+        """ Returns whether self is less than other object.
         Args:
             other (iterable) : object to compare
         Returns:
@@ -290,21 +455,10 @@ class SparseArray(list):
                 True if self is less than other
                 False if self is greater than or equal to other
         """
-        index = None
-        for index, value in enumerate(other):
-            # indexes in self exhausted = other is longer
-            if len(self) <= index:
-                return True
-            if self[index] < value:
-                return True
-            if self[index] > value:
-                return False
-        return (
-            False if index is None
-            else index >= len(self))
+        return self._compare(other) < 0
 
     def __gt__(self, other):
-        """ Returns whether self is greater than other object. O(k)
+        """ Returns whether self is greater than other object.
         Args:
             other (iterable) : object to compare
         Returns:
@@ -312,21 +466,10 @@ class SparseArray(list):
                 True if self is greater than other
                 False if self is less than or equal to other
         """
-        index = None
-        for index, value in enumerate(other):
-            # indexes in self exhausted = other is longer
-            if len(self) <= index:
-                return False
-            if self[index] < value:
-                return False
-            if self[index] > value:
-                return True
-        return (
-            0 < len(self) if index is None
-            else index < len(self) - 1)
+        return self._compare(other) > 0
 
     def __le__(self, other):
-        """ Returns whether self is less than or equal to other object. O(k)
+        """ Returns whether self is less than or equal to other object.
         Args:
             other (iterable) : object to compare
         Returns:
@@ -334,10 +477,10 @@ class SparseArray(list):
                 True if self is less than or equal to other
                 False if self is greater than other
         """
-        return not self.__gt__(other)
+        return self._compare(other) <= 0
 
     def __ge__(self, other):
-        """ Returns whether self is greater than or equal to other object. O(k)
+        """ Returns whether self is greater than or equal to other object.
         Args:
             other (iterable) : object to compare
         Returns:
@@ -345,7 +488,7 @@ class SparseArray(list):
                 True if self is greater than or equal to other
                 False if self is less than other
         """
-        return not self.__lt__(other)
+        return self._compare(other) >= 0
 
     def __len__(self):
         """ Returns the length of this array including zeroes. O(1)
@@ -359,7 +502,7 @@ class SparseArray(list):
         Returns:
             str : this SparseArray as a string
         """
-        return str(list(self))
+        return '[' + ', '.join(map(repr, self)) + ']'
 
     def __repr__(self):
         """ Returns a representation of this SparseArray. O(n)
@@ -369,70 +512,407 @@ class SparseArray(list):
         return str(self)
 
     def append(self, value):
-        """ Appends the given value to the end of this SparseArray. O(1)
+        """ Appends the given value to the end of this SparseArray.
+        O(log m)
         Args:
             value (int) : value to append to this SparseArray
         """
-        if value != 0:
-            self._data[len(self)] = value
-        self._length += 1
+        self.insert(len(self), value)
 
     def extend(self, other):
-        """ Extends this SparseArray with the given array. O(k)
+        """ Extends this SparseArray with the given array.
+        O(k), or O(r log m) if other is a SparseArray
         Args:
             other (iterable) :
                 values to append to this SparseArray as iterable object
         """
+        if isinstance(other, SparseArray):
+            # only the non-zero values need to be added
+            items = list(other.nonzero())
+            length = len(other)
+            self._own(force=self._step != 1)  # copy in forward order
+            for index, value in items:
+                self._data.set(self._istored(len(self) + index), value)
+            self._length += length
+            self._positions = None
+            return
         for num in other:
             self.append(num)
 
     def __reversed__(self):
-        """ Provides an iterator on this SparseArray in reverse. O(m)? """
-        for i in range(len(self)):
-            yield self[self._ireverse(i)]
+        """ Yields items in this SparseArray in reverse, walking the
+        stored values from the other end. O(n) """
+        following = len(self)
+        for index, value in self._nonzero(reverse=True):
+            yield from repeat(0, following - index - 1)
+            yield value
+            following = index
+        yield from repeat(0, following)
 
     def reverse(self):
-        """ Reverses the items in this SparseArray by toggling
-        variable indicating virtually reversed state. O(m) """
-        self._reversed = not self._reversed
+        """ Reverses the items in this SparseArray by starting at
+        the other end of the stored values and stepping backwards. O(1)
+        """
+        self._start = self._istored(len(self) - 1)
+        self._step = -self._step
+        self._positions = None
 
     def index(self, value):
         """ Returns first index of given value.
-        Raises ValueError if value is not in this SparseArray. O(n)
+        Raises ValueError if value is not in this SparseArray.
+        O(r), or O(1) for a non-zero value with the index of values
         Args:
             value (int) : value to search for
         Returns:
             int : first index of value
         """
-        for index in range(len(self)):
-            if self[index] == value:
-                return index
+        if value != 0 and self._indexed:
+            positions = self._value_index().get(value)
+            if positions:
+                return positions[0]
+        elif value == 0:
+            # first zero is the first gap between non-zero values
+            expected = 0
+            for index, _ in self.nonzero():
+                if index != expected:
+                    break
+                expected += 1
+            if expected < len(self):
+                return expected
+        else:
+            for index, v in self.nonzero():
+                if v == value:
+                    return index
         raise ValueError('Value not in array')
 
     def insert(self, index, value):
-        """ Inserts given value at given index. O(m)
+        """ Inserts given value at given index.
+        O(log m), or O(m) in the middle with the index of values
         Args:
             index (int) : index to insert value at
             value (int) : value to insert
         """
         index = self._iforward(index)
         index = self._ilimit(index)
-        inserted = {}
+        self._own()
+        self._index_shift(index, 1)
+        if value != 0:
+            self._index_add(index, value)
+        if self._step > 0:
+            index = self._istored(index)
+        else:
+            # when reversed, inserting before an index
+            # is inserting after it in the stored data,
+            # and moves the first value up one
+            index = self._istored(index) + 1
+            self._start += 1
+        # move everything from index on up one
+        self._data.shift(index, 1)
         if value != 0:
-            inserted[index] = value
-        for i, v in self._data.items():
-            i = i if i < index else i + 1
-            inserted[i] = v
-        self._data = inserted
+            self._data.set(index, value)
         self._length += 1
 
     def count(self, value):
-        """ Counts number of instances of value. O(m)
+        """ Counts number of instances of value.
+        O(r), or O(1) with the index of values
         Args:
             value (int) : value to count
         Returns:
             int : count of given value
         """
         if value == 0:
-            return len(self) - len(self._data)
-        return sum([1 for _, v in self._data.items() if v == value])
+            return len(self) - self._count_nonzero()
+        if self._indexed:
+            return len(self._value_index().get(value, ()))
+        return sum([1 for _, v in self.nonzero() if v == value])
+
+    def freeze(self):
+        """ Freezes the stored values, so they are never changed in
+        place: views and copies can share them for good, and changing
+        this SparseArray gives it its own copy first. With an
+        ArrayStorage, also packs the values as compactly as they go.
+        Returns:
+            SparseArray : this SparseArray
+        """
+        self._data.freeze()
+        return self
+
+    def index_values(self, on=True):
+        """ Turns the index from values to where they are on or off.
+        The index gets built the first time it is needed. O(1)
+        Args:
+            on (bool) : whether to keep the index
+        Returns:
+            SparseArray : this SparseArray
+        """
+        self._indexed = on
+        self._positions = None
+        return self
+
+    def _value_index(self):
+        """ Returns the index from each non-zero value to the sorted
+        indexes it is at, building it if need be.
+        O(r) to build, else O(1)
+        Returns:
+            dict value:list of int : where each non-zero value is
+        """
+        if self._positions is None:
+            self._positions = {}
+            for index, value in self.nonzero():
+                self._positions.setdefault(value, []).append(index)
+        return self._positions
+
+    def _index_add(self, index, value):
+        """ Adds a non-zero value at index to the index of values,
+        if it is built. O(log m + number of indexes of value)
+        """
+        if self._positions is not None:
+            insort(self._positions.setdefault(value, []), index)
+
+    def _index_remove(self, index, value):
+        """ Removes a non-zero value at index from the index of
+        values, if it is built. O(log m + number of indexes of value)
+        """
+        if self._positions is not None:
+            positions = self._positions[value]
+            del positions[bisect_left(positions, index)]
+            if not positions:
+                del self._positions[value]
+
+    def _index_shift(self, index, amount):
+        """ Adds amount to all the indexes at or after the given index
+        in the index of values, if it is built. Only the values stored
+        at or after index are looked at, so nothing is done at the end
+        (for append). O(log m + number of indexes after index)
+        """
+        if self._positions is None or index >= len(self):
+            return
+        first = self._istored(index)
+        last = self._istored(len(self) - 1)
+        after = {value for _, value in
+                 self._data.items(min(first, last), max(first, last) + 1)}
+        for value in after:
+            positions = self._positions[value]
+            i = bisect_left(positions, index)
+            positions[i:] = [p + amount for p in positions[i:]]
+
+    @classmethod
+    def _from_items(cls, length, items, storage=None):
+        """ Makes a SparseArray from index, value pairs. O(r)
+        Args:
+            length (int) : length of array w/ zeros
+            items (iterable) :
+                (index, non-zero value) pairs in order of index
+            storage (class) : kind of storage, None for the default
+        Returns:
+            SparseArray : array with the given values
+        """
+        return cls._from_storage(
+            length, (storage or cls.storage).from_items(items))
+
+    @classmethod
+    def _from_storage(cls, length, data):
+        """ Makes a SparseArray on already stored values. O(1)
+        Args:
+            length (int) : length of array w/ zeros
+            data (BlockStorage or ArrayStorage) :
+                non-zero values, stored under indexes 0 to length - 1
+        Returns:
+            SparseArray : array with the given values
+        """
+        result = cls(storage=type(data))
+        result._length = length
+        result._data = data
+        return result
+
+    @classmethod
+    def from_dense(cls, array, storage=None):
+        """ Makes a SparseArray from a dense array, such as a list or
+        a one dimensional numpy array. O(n)
+        Args:
+            array (iterable) : values to convert to SparseArray
+            storage (class) : kind of storage, None for the default
+        Returns:
+            SparseArray : SparseArray with the values in array
+        """
+        if numpy is not None and isinstance(array, numpy.ndarray):
+            # let numpy find the non-zeros
+            indexes = numpy.flatnonzero(array)
+            return cls._from_items(
+                len(array), zip(indexes.tolist(), array[indexes].tolist()),
+                storage)
+        return cls(array, storage)
+
+    def to_dense(self):
+        """ Returns this SparseArray as a numpy array.
+        Raises ImportError if numpy is not installed. O(n)
+        Returns:
+            numpy.ndarray : values in this SparseArray w/ zeros
+        """
+        if numpy is None:
+            raise ImportError('to_dense needs numpy')
+        items = list(self.nonzero())
+        values = [v for _, v in items]
+        dense = numpy.zeros(len(self), dtype=numpy.array(values).dtype)
+        dense[[i for i, _ in items]] = values
+        return dense
+
+    def _other(self, other):
+        """ Returns other as a SparseArray the same length as this one.
+        Raises ValueError if the lengths are different.
+        Args:
+            other (iterable) : array to use in an operation with this one
+        Returns:
+            SparseArray : other as a SparseArray
+        """
+        if not isinstance(other, SparseArray):
+            other = SparseArray(other)
+        if len(other) != len(self):
+            raise ValueError('Arrays are different lengths')
+        return other
+
+    def _merge(self, other, both=False):
+        """ Yields index, value in self, value in other for the
+        indexes where either array (or with both, each array) has
+        a non-zero value, in order of index. O(r + k)
+        Args:
+            other (SparseArray) : array to merge with
+            both (bool) : only yield indexes where both are non-zero
+        Yields:
+            (int, int, int) : index and the values in self and other
+        """
+        mine = self.nonzero()
+        theirs = other.nonzero()
+        i, a = next(mine, (None, 0))
+        j, b = next(theirs, (None, 0))
+        while i is not None and j is not None:
+            if i == j:
+                yield i, a, b
+                i, a = next(mine, (None, 0))
+                j, b = next(theirs, (None, 0))
+            elif i < j:
+                if not both:
+                    yield i, a, 0
+                i, a = next(mine, (None, 0))
+            else:
+                if not both:
+                    yield j, 0, b
+                j, b = next(theirs, (None, 0))
+        if both:
+            return
+        # whichever one is left
+        if i is not None:
+            yield i, a, 0
+            for i, a in mine:
+                yield i, a, 0
+        if j is not None:
+            yield j, 0, b
+            for j, b in theirs:
+                yield j, 0, b
+
+    def add(self, other):
+        """ Returns the elementwise sum of this SparseArray and other.
+        O(r + k) for an array, O(r) for zero, O(n) for any other number
+        (which makes all the zeros non-zero)
+        Args:
+            other (number or iterable) :
+                number to add to each value, or array of values to add
+        Returns:
+            SparseArray : new SparseArray with the sums
+        """
+        if isinstance(other, numbers.Number):
+            if other == 0:
+                return self._from_items(
+                    len(self), self.nonzero(), type(self._data))
+            values = dict(self.nonzero())
+            return SparseArray(
+                [values.get(i, 0) + other for i in range(len(self))],
+                type(self._data))
+        other = self._other(other)
+        return self._from_items(len(self), (
+            (i, a + b) for i, a, b in self._merge(other) if a + b != 0),
+            type(self._data))
+
+    def multiply(self, other):
+        """ Returns the elementwise product of this SparseArray and other.
+        O(r + k) for an array, O(r) for a number
+        Args:
+            other (number or iterable) :
+                number to multiply each value by, or array of values
+        Returns:
+            SparseArray : new SparseArray with the products
+        """
+        if isinstance(other, numbers.Number):
+            items = ((i, v * other) for i, v in self.nonzero())
+        else:
+            # only indexes non-zero in both can be non-zero
+            items = ((i, a * b) for i, a, b in
+                     self._merge(self._other(other), both=True))
+        return self._from_items(
+            len(self), ((i, v) for i, v in items if v != 0),
+            type(self._data))
+
+    def dot(self, other):
+        """ Returns the dot product of this SparseArray and other. O(r + k)
+        Args:
+            other (iterable) : array the same length as this one
+        Returns:
+            number : sum of the products of the values
+        """
+        return sum(a * b for _, a, b in
+                   self._merge(self._other(other), both=True))
+
+    def sum(self):
+        """ Returns the sum of the values in this SparseArray. O(r)
+        Returns:
+            number : sum of the values
+        """
+        return sum(v for _, v in self.nonzero())
+
+    def _extreme(self, pick):
+        """ Returns the min or max value, counting any zeros.
+        Raises ValueError if this SparseArray is empty. O(r)
+        Args:
+            pick (function) : min or max
+        Returns:
+            number : smallest or largest value
+        """
+        if not len(self):
+            raise ValueError('{}() of empty SparseArray'.format(
+                pick.__name__))
+        values = [v for _, v in self.nonzero()]
+        if len(values) < len(self):
+            values.append(0)
+        return pick(values)
+
+    def min(self):
+        """ Returns the smallest value in this SparseArray.
+        Raises ValueError if this SparseArray is empty. O(r)
+        Returns:
+            number : smallest value
+        """
+        return self._extreme(min)
+
+    def max(self):
+        """ Returns the largest value in this SparseArray.
+        Raises ValueError if this SparseArray is empty. O(r)
+        Returns:
+            number : largest value
+        """
+        return self._extreme(max)
+
+    def norm(self, order=2):
+        """ Returns the norm of this SparseArray. O(r)
+        Args:
+            order (number) :
+                which norm -- 2 for Euclidean, 1 for sum of absolute
+                values, math.inf for largest absolute value
+        Returns:
+            float : norm of the values
+        """
+        values = [abs(v) for _, v in self.nonzero()]
+        if order == math.inf:
+            return max(values, default=0)
+        if order <= 0:
+            raise ValueError('Order must be positive')
+        return sum(v ** order for v in values) ** (1 / order)
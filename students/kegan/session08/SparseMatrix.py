@@ -0,0 +1,466 @@
+"""
+Kathryn Egan
+
+A two dimensional sparse matrix, to go with SparseArray.
+
+The non-zero values are stored compressed by row (CSR) or by column
+(CSC): for CSR, the column indexes and values of row 0, then row 1,
+and so on, in two arrays, with a third array (indptr) saying where each
+row starts. CSC is the same thing with rows and columns swapped. So
+for CSR, getting a row is cheap and getting a column means looking in
+every row; for CSC it's the other way around.
+
+For all O notation,
+  m = number of non-zero values in the matrix
+  r = number of non-zero values in the rows (or columns) involved
+  R, C = number of rows and columns
+"""
+from array import array
+from bisect import bisect_left
+from SparseArray import SparseArray
+from sparse_storage import ArrayStorage, pack_values
+
+try:
+    import numpy
+except ImportError:  # numpy is only needed for to_dense
+    numpy = None
+
+FORMATS = ('csr', 'csc')
+
+
+class SparseMatrix:
+    """ Defines functionality for a two dimensional sparse matrix,
+    stored in CSR or CSC format. Rows (for CSR) or columns (for CSC)
+    come out as SparseArray views on the stored values.
+    """
+
+    def __init__(self, triples=(), shape=None, format='csr'):
+        """ Initializes SparseMatrix from COO (row, column, value)
+        triples, in any order. Values for the same row and column are
+        added up; zeros are not stored. O(m log m)
+        Args:
+            triples (iterable) : (row, column, value) triples
+            shape (tuple of int) :
+                number of rows and columns, None to make it just
+                big enough for the triples
+            format (str) : 'csr' or 'csc'
+        """
+        if format not in FORMATS:
+            raise ValueError('Format must be csr or csc')
+        triples = list(triples)
+        if shape is None:
+            shape = (max((t[0] for t in triples), default=-1) + 1,
+                     max((t[1] for t in triples), default=-1) + 1)
+        for row, column, _ in triples:
+            if not (0 <= row < shape[0] and 0 <= column < shape[1]):
+                raise IndexError('Index out of range')
+        if format == 'csc':
+            triples = [(column, row, value) for row, column, value in triples]
+        triples.sort(key=lambda t: (t[0], t[1]))
+        self._setup(shape, format, *self._compress(
+            shape[format == 'csc'], triples))
+
+    def _setup(self, shape, format, indptr, indices, values):
+        """ Sets the stored values. O(1)
+        Args:
+            shape (tuple of int) : number of rows and columns
+            format (str) : 'csr' or 'csc'
+            indptr (array) : where each row (column) starts in indices
+            indices (array) : column (row) of each value
+            values (array or list) : non-zero values
+        """
+        self._shape = tuple(shape)
+        self._format = format
+        self._indptr = indptr
+        self._indices = indices
+        self._values = values
+
+    @classmethod
+    def _make(cls, shape, format, indptr, indices, values):
+        """ Makes a SparseMatrix on already compressed values. O(1) """
+        matrix = cls.__new__(cls)
+        matrix._setup(shape, format, indptr, indices, values)
+        return matrix
+
+    @staticmethod
+    def _compress(n_major, triples):
+        """ Compresses sorted (major, minor, value) triples, adding up
+        the values of duplicates and leaving out zeros. O(m)
+        Args:
+            n_major (int) : number of rows for CSR, columns for CSC
+            triples (list) : triples sorted by major then minor index
+        Returns:
+            (array, array, array or list) : indptr, indices, values
+        """
+        indptr = array('q', [0]) * (n_major + 1)
+        indices = array('q')
+        values = []
+        previous = None
+        for major, minor, value in triples:
+            if (major, minor) == previous:
+                values[-1] += value
+                continue
+            # drop the last one if its values added up to zero
+            if values and values[-1] == 0:
+                indptr[previous[0] + 1] -= 1
+                indices.pop()
+                values.pop()
+            previous = (major, minor)
+            indptr[major + 1] += 1
+            indices.append(minor)
+            values.append(value)
+        if values and values[-1] == 0:
+            indptr[previous[0] + 1] -= 1
+            indices.pop()
+            values.pop()
+        for major in range(n_major):
+            indptr[major + 1] += indptr[major]
+        return indptr, indices, pack_values(values)
+
+    @classmethod
+    def from_dense(cls, rows, format='csr'):
+        """ Makes a SparseMatrix from a dense matrix: a list of lists,
+        or a two dimensional numpy array. O(R * C)
+        Args:
+            rows (iterable) : rows of values
+            format (str) : 'csr' or 'csc'
+        Returns:
+            SparseMatrix : matrix with the non-zero values in rows
+        """
+        rows = list(rows)
+        n_columns = len(rows[0]) if rows else 0
+        triples = [(i, j, value) for i, row in enumerate(rows)
+                   for j, value in enumerate(row) if value != 0]
+        return cls(triples, (len(rows), n_columns), format)
+
+    def to_dense(self):
+        """ Returns this SparseMatrix as a numpy array.
+        Raises ImportError if numpy is not installed. O(R * C)
+        Returns:
+            numpy.ndarray : values in this SparseMatrix w/ zeros
+        """
+        if numpy is None:
+            raise ImportError('to_dense needs numpy')
+        dense = numpy.zeros(self._shape,
+                            dtype=numpy.array(list(self._values)).dtype)
+        for row, column, value in self.triples():
+            dense[row, column] = value
+        return dense
+
+    @property
+    def shape(self):
+        """ Returns the number of rows and columns.
+        Returns:
+            tuple of int : rows, columns
+        """
+        return self._shape
+
+    @property
+    def format(self):
+        """ Returns how the values are stored: 'csr' or 'csc'. """
+        return self._format
+
+    @property
+    def nnz(self):
+        """ Returns the number of non-zero values stored. O(1) """
+        return len(self._indices)
+
+    def __len__(self):
+        """ Returns the number of rows. O(1) """
+        return self._shape[0]
+
+    def __repr__(self):
+        """ Returns a representation of this SparseMatrix. O(1) """
+        return 'SparseMatrix({}x{}, {} non-zero, {})'.format(
+            self._shape[0], self._shape[1], self.nnz, self._format)
+
+    def _is_csr(self):
+        return self._format == 'csr'
+
+    def triples(self):
+        """ Yields (row, column, value) for each non-zero value, in
+        the order they are stored. O(m) """
+        indptr = self._indptr
+        indices = self._indices
+        values = self._values
+        for major in range(len(indptr) - 1):
+            for k in range(indptr[major], indptr[major + 1]):
+                if self._is_csr():
+                    yield major, indices[k], values[k]
+                else:
+                    yield indices[k], major, values[k]
+
+    def _index(self, index, axis):
+        """ Returns a forward index along axis (0 for rows, 1 for
+        columns). Raises IndexError if index is out of range. O(1)
+        """
+        size = self._shape[axis]
+        forward = index + size if index < 0 else index
+        if not 0 <= forward < size:
+            raise IndexError('Index out of range')
+        return forward
+
+    def _major(self, major):
+        """ Returns a stored row (column for CSC) as a SparseArray
+        view on the stored values -- changing it gives it its own
+        copy, and leaves the matrix alone. O(1) (O(r) if the values
+        are not numbers of one type, and have to be copied)
+        """
+        low = self._indptr[major]
+        high = self._indptr[major + 1]
+        values = self._values
+        if isinstance(values, array):
+            values = memoryview(values)
+        data = ArrayStorage.view(memoryview(self._indices)[low:high],
+                                 values[low:high])
+        return SparseArray._from_storage(self._shape[self._is_csr()], data)
+
+    def _minor(self, minor):
+        """ Returns a column (row for CSC) as a new SparseArray, by
+        looking for it in each row (column). O(R log C) for CSR """
+        indices = self._indices
+        indptr = self._indptr
+        items = []
+        for major in range(len(indptr) - 1):
+            high = indptr[major + 1]
+            k = bisect_left(indices, minor, indptr[major], high)
+            if k < high and indices[k] == minor:
+                items.append((major, self._values[k]))
+        return SparseArray._from_items(len(indptr) - 1, items, ArrayStorage)
+
+    def row(self, index):
+        """ Returns a row as a SparseArray.
+        O(1) for CSR (a view), O(C log R) for CSC
+        Args:
+            index (int) : row number
+        Returns:
+            SparseArray : values in the row
+        """
+        index = self._index(index, 0)
+        return self._major(index) if self._is_csr() else self._minor(index)
+
+    def column(self, index):
+        """ Returns a column as a SparseArray.
+        O(1) for CSC (a view), O(R log C) for CSR
+        Args:
+            index (int) : column number
+        Returns:
+            SparseArray : values in the column
+        """
+        index = self._index(index, 1)
+        return self._minor(index) if self._is_csr() else self._major(index)
+
+    def __iter__(self):
+        """ Yields the rows as SparseArrays. O(R) for CSR """
+        for index in range(self._shape[0]):
+            yield self.row(index)
+
+    def get(self, row, column):
+        """ Returns the value at row, column. O(log C) for CSR
+        Args:
+            row (int) : row number
+            column (int) : column number
+        Returns:
+            value at row, column
+        """
+        major = self._index(row, 0)
+        minor = self._index(column, 1)
+        if not self._is_csr():
+            major, minor = minor, major
+        high = self._indptr[major + 1]
+        k = bisect_left(self._indices, minor, self._indptr[major], high)
+        if k < high and self._indices[k] == minor:
+            return self._values[k]
+        return 0
+
+    def __getitem__(self, index):
+        """ Returns a value, a row or column, or a part of the matrix:
+            matrix[i] : row i
+            matrix[i, j] : value at row i, column j
+            matrix[i, a:b:c] : part of row i
+            matrix[a:b:c, j] : part of column j
+            matrix[a:b:c] or matrix[a:b:c, d:e:f] : rows (and columns)
+        Args:
+            index (int or slice or tuple) : what to return
+        Returns:
+            value, SparseArray or SparseMatrix
+        """
+        if not isinstance(index, tuple):
+            index = (index, slice(None))
+        row, column = index
+        if isinstance(row, slice):
+            if isinstance(column, slice):
+                return self._part(row, column)
+            return self.column(column)[row]
+        if isinstance(column, slice):
+            return self.row(row)[column]
+        return self.get(row, column)
+
+    def _part(self, rows, columns):
+        """ Returns the given rows and columns as a new SparseMatrix
+        in the same format. O(r)
+        Args:
+            rows (slice) : rows to include
+            columns (slice) : columns to include
+        Returns:
+            SparseMatrix : part of this matrix
+        """
+        rows = range(*rows.indices(self._shape[0]))
+        columns = range(*columns.indices(self._shape[1]))
+        majors, minors = (rows, columns) if self._is_csr() else (
+            columns, rows)
+        indptr = array('q', [0])
+        indices = array('q')
+        values = []
+        if minors:
+            low_minor = min(minors[0], minors[-1])
+            high_minor = max(minors[0], minors[-1]) + 1
+        for major in majors:
+            if minors:
+                high = self._indptr[major + 1]
+                low = bisect_left(self._indices, low_minor,
+                                  self._indptr[major], high)
+                high = bisect_left(self._indices, high_minor, low, high)
+                # positions in the part, for minors in range
+                found = []
+                for k in range(low, high):
+                    offset = self._indices[k] - minors[0]
+                    if offset % minors.step == 0:
+                        found.append((offset // minors.step, k))
+                if minors.step < 0:
+                    found.reverse()
+                for minor, k in found:
+                    indices.append(minor)
+                    values.append(self._values[k])
+            indptr.append(len(indices))
+        return self._make((len(rows), len(columns)), self._format,
+                          indptr, indices, pack_values(values))
+
+    def transpose(self):
+        """ Returns the transpose of this matrix. CSR for a matrix is
+        CSC for its transpose, so this shares the stored values. O(1)
+        Returns:
+            SparseMatrix : transpose, in the other format
+        """
+        return self._make((self._shape[1], self._shape[0]),
+                          'csc' if self._is_csr() else 'csr',
+                          self._indptr, self._indices, self._values)
+
+    @property
+    def T(self):
+        """ Returns the transpose of this matrix. O(1) """
+        return self.transpose()
+
+    def _convert(self):
+        """ Returns the same matrix in the other format, by counting
+        how many values are in each minor index, then putting each
+        value in place. O(m + R + C)
+        Returns:
+            SparseMatrix : same matrix, other format
+        """
+        n_minor = self._shape[self._is_csr()]
+        indptr = array('q', [0]) * (n_minor + 1)
+        for minor in self._indices:
+            indptr[minor + 1] += 1
+        for minor in range(n_minor):
+            indptr[minor + 1] += indptr[minor]
+        nnz = self.nnz
+        indices = array('q', [0]) * nnz
+        values = [0] * nnz
+        next_free = indptr[:-1]
+        # going through in major order leaves each minor sorted
+        for major in range(len(self._indptr) - 1):
+            for k in range(self._indptr[major], self._indptr[major + 1]):
+                minor = self._indices[k]
+                position = next_free[minor]
+                indices[position] = major
+                values[position] = self._values[k]
+                next_free[minor] += 1
+        return self._make(self._shape, 'csc' if self._is_csr() else 'csr',
+                          indptr, indices, pack_values(values))
+
+    def to_csr(self):
+        """ Returns this matrix in CSR format. O(1) if it already is,
+        else O(m + R + C) """
+        return self if self._is_csr() else self._convert()
+
+    def to_csc(self):
+        """ Returns this matrix in CSC format. O(1) if it already is,
+        else O(m + R + C) """
+        return self._convert() if self._is_csr() else self
+
+    def dot(self, other):
+        """ Returns the product of this matrix and a vector (as a
+        SparseArray) or another matrix (as a SparseMatrix in CSR).
+        Raises ValueError if the sizes don't match.
+        O(m) for a vector with CSR, O(r) with CSC (r = values in the
+        columns where the vector is non-zero); for a matrix, O(number
+        of products of non-zero values)
+        Args:
+            other (SparseArray or iterable or SparseMatrix) :
+                vector or matrix to multiply by
+        Returns:
+            SparseArray or SparseMatrix : the product
+        """
+        if isinstance(other, SparseMatrix):
+            return self._matrix_product(other)
+        if not isinstance(other, SparseArray):
+            other = SparseArray(other)
+        if len(other) != self._shape[1]:
+            raise ValueError('Sizes do not match')
+        indptr = self._indptr
+        indices = self._indices
+        values = self._values
+        if self._is_csr():
+            vector = dict(other.nonzero())
+            items = []
+            for row in range(self._shape[0]):
+                total = 0
+                for k in range(indptr[row], indptr[row + 1]):
+                    x = vector.get(indices[k])
+                    if x is not None:
+                        total += values[k] * x
+                if total != 0:
+                    items.append((row, total))
+        else:
+            # add up the columns where the vector is non-zero
+            sums = {}
+            for column, x in other.nonzero():
+                for k in range(indptr[column], indptr[column + 1]):
+                    row = indices[k]
+                    sums[row] = sums.get(row, 0) + values[k] * x
+            items = sorted((row, total) for row, total in sums.items()
+                           if total != 0)
+        return SparseArray._from_items(self._shape[0], items, ArrayStorage)
+
+    def _matrix_product(self, other):
+        """ Returns the product of this matrix and another, in CSR.
+        Each row of the result adds up the rows of other picked out by
+        the non-zero values in the same row of this one.
+        """
+        if self._shape[1] != other._shape[0]:
+            raise ValueError('Sizes do not match')
+        a = self.to_csr()
+        b = other.to_csr()
+        indptr = array('q', [0])
+        indices = array('q')
+        values = []
+        for row in range(a._shape[0]):
+            sums = {}
+            for k in range(a._indptr[row], a._indptr[row + 1]):
+                x = a._values[k]
+                middle = a._indices[k]
+                for p in range(b._indptr[middle], b._indptr[middle + 1]):
+                    column = b._indices[p]
+                    sums[column] = sums.get(column, 0) + x * b._values[p]
+            for column in sorted(sums):
+                if sums[column] != 0:
+                    indices.append(column)
+                    values.append(sums[column])
+            indptr.append(len(indices))
+        return self._make((a._shape[0], b._shape[1]), 'csr',
+                          indptr, indices, pack_values(values))
+
+    def __matmul__(self, other):
+        """ Returns self @ other, the same as self.dot(other). """
+        return self.dot(other)
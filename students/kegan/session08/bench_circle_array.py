@@ -0,0 +1,63 @@
+"""
+Kathryn Egan
+
+Compares a CircleArray to a list of Circles: memory, total area,
+sorting, and adding up the circles.
+
+run it with the number of circles:
+
+    python bench_circle_array.py 1000000
+"""
+import math
+import random
+import sys
+import time
+import tracemalloc
+from Circle import Circle
+from CircleArray import CircleArray
+
+
+def memory(make):
+    """ Returns MB allocated by make() for what it returns. """
+    tracemalloc.start()
+    try:
+        built = make()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size / 1e6
+
+
+def timed(func):
+    """ Returns the time func() takes, in ms. """
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(n=1000000):
+    rand = random.Random(1)
+    radii = [rand.uniform(0.1, 100) for _ in range(n)]
+    circles = [Circle(r) for r in radii]
+    array = CircleArray(radii)
+    print('{:,} circles'.format(n))
+    print('{:<12} {:>8} {:>10} {:>10} {:>10}'.format(
+        'kind', 'MB', 'area ms', 'sort ms', 'sum ms'))
+    print('{:<12} {:>8.1f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+        'Circles', memory(lambda: [Circle(r) for r in radii]),
+        timed(lambda: math.fsum(c.area for c in circles)),
+        timed(lambda: sorted(circles)),
+        timed(lambda: sum(circles))))
+    print('{:<12} {:>8.1f} {:>10.1f} {:>10.1f} {:>10.1f}'.format(
+        'CircleArray', memory(lambda: CircleArray(radii)),
+        timed(lambda: math.fsum(array.area)),
+        timed(lambda: array[:].sort()),
+        timed(array.total)))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
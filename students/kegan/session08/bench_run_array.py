@@ -0,0 +1,80 @@
+"""
+Kathryn Egan
+
+Compares RunArray to a list and a SparseArray on data that is mostly
+long runs of the same (non-zero) value: memory, random lookups, and
+slicing.
+
+run it with the length of the array and the average run length:
+
+    python bench_run_array.py 1000000 100
+"""
+import random
+import sys
+import time
+import tracemalloc
+from RunArray import RunArray
+from SparseArray import SparseArray
+
+
+def run_data(n, run_length, seed=1):
+    """ Returns n values in runs of about run_length of the same
+    value, with values from 1 to 5, as a list. """
+    rand = random.Random(seed)
+    data = []
+    while len(data) < n:
+        data.extend([rand.randint(1, 5)] * rand.randint(1, 2 * run_length))
+    return data[:n]
+
+
+def memory(kind, data):
+    """ Returns MB allocated building kind from data. """
+    tracemalloc.start()
+    try:
+        built = kind(data)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size / 1e6
+
+
+def lookups(built, n=100000):
+    """ Returns time per random lookup, in microseconds. """
+    rand = random.Random(2)
+    indexes = [rand.randrange(len(built)) for _ in range(n)]
+    start = time.perf_counter()
+    for index in indexes:
+        built[index]
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def slicing(built, n=100):
+    """ Returns time per slice of a tenth of the array with a step of
+    3, in milliseconds. """
+    length = len(built)
+    start = time.perf_counter()
+    for i in range(n):
+        built[i:i + length // 10:3]
+    return (time.perf_counter() - start) / n * 1e3
+
+
+def main(n=1000000, run_length=100):
+    data = run_data(n, run_length)
+    print('{:,} values, runs of about {}'.format(n, run_length))
+    print('{:<12} {:>8} {:>10} {:>10}'.format(
+        'kind', 'MB', 'lookup us', 'slice ms'))
+    for kind in (list, SparseArray, RunArray):
+        built = kind(data)
+        print('{:<12} {:>8.2f} {:>10.2f} {:>10.3f}'.format(
+            kind.__name__, memory(kind, data), lookups(built),
+            slicing(built)))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        main(int(sys.argv[1]), int(sys.argv[2]))
+    elif len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,113 @@
+"""
+Kathryn Egan
+
+Compares SparseMatrix to a dense matrix at different densities:
+memory, matrix-vector products and matrix-matrix products.
+
+The dense matrix is a numpy array if numpy is installed, or else
+a list of lists (which is a lot slower than numpy, so not a fair
+fight for the dense side).
+
+run it with the number of rows (and columns):
+
+    python bench_sparse_matrix.py 2000
+"""
+import random
+import sys
+import time
+import tracemalloc
+from SparseMatrix import SparseMatrix
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DENSITIES = (0.0001, 0.001, 0.01, 0.1)
+
+
+def random_triples(n, density, seed=1):
+    """ Returns (row, column, value) triples for an n x n matrix
+    with about density * n * n non-zero values. """
+    rand = random.Random(seed)
+    return [(rand.randrange(n), rand.randrange(n), rand.random())
+            for _ in range(max(int(density * n * n), 1))]
+
+
+def to_dense(n, triples):
+    """ Returns the matrix as a numpy array, or a list of lists. """
+    if numpy is not None:
+        dense = numpy.zeros((n, n))
+    else:
+        dense = [[0.0] * n for _ in range(n)]
+    for row, column, value in triples:
+        dense[row][column] += value
+    return dense
+
+
+def dense_product(a, b):
+    """ Returns a @ b for dense matrices (or a matrix and a vector). """
+    if numpy is not None:
+        return a @ b
+    if not isinstance(b[0], list):
+        return [sum(x * y for x, y in zip(row, b)) for row in a]
+    columns = list(zip(*b))
+    return [[sum(x * y for x, y in zip(row, column)) for column in columns]
+            for row in a]
+
+
+def best_time(func, *args, repeat=3):
+    """ Returns the best time of repeat runs of func(*args), in ms. """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def size(make):
+    """ Returns MB allocated by make() for what it returns. """
+    tracemalloc.start()
+    try:
+        built = make()
+        allocated = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return allocated / 1e6
+
+
+def main(n=2000):
+    print('{} x {} matrices, dense baseline: {}'.format(
+        n, n, 'numpy' if numpy is not None else 'lists (no numpy)'))
+    print('{:>8} {:>9} {:>9} {:>11} {:>11} {:>11} {:>11}'.format(
+        'density', 'sparse MB', 'dense MB', 'sparse Mv', 'dense Mv',
+        'sparse MM', 'dense MM'))
+    # the matrix-matrix products are done on a smaller matrix
+    small = max(n // 10, 1)
+    for density in DENSITIES:
+        triples = random_triples(n, density)
+        sparse = SparseMatrix(triples, (n, n))
+        dense = to_dense(n, triples)
+        vector = [random.random() for _ in range(n)]
+        dense_vector = numpy.array(vector) if numpy is not None else vector
+        small_triples = random_triples(small, density, seed=2)
+        small_sparse = SparseMatrix(small_triples, (small, small))
+        small_dense = to_dense(small, small_triples)
+        print('{:>8} {:>9.1f} {:>9.1f} {:>9.2f}ms {:>9.2f}ms '
+              '{:>9.2f}ms {:>9.2f}ms'.format(
+                  density,
+                  size(lambda: SparseMatrix(triples, (n, n))),
+                  size(lambda: to_dense(n, triples)),
+                  best_time(sparse.dot, vector),
+                  best_time(dense_product, dense, dense_vector),
+                  best_time(small_sparse.dot, small_sparse),
+                  best_time(dense_product, small_dense, small_dense)))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
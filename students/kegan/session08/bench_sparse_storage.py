@@ -0,0 +1,108 @@
+"""
+Kathryn Egan
+
+Compares the kinds of storage for SparseArray's non-zero values
+(and the dict SparseArray used to use): memory, random lookups, and
+changes in the middle.
+
+run it with the number of non-zero values:
+
+    python bench_sparse_storage.py 1000000
+"""
+import random
+import sys
+import time
+import tracemalloc
+from sparse_storage import ArrayStorage, BlockStorage
+
+
+class DictStorage(dict):
+    """ The old way: a dict of index : value. """
+
+    @classmethod
+    def from_items(cls, items):
+        return cls(items)
+
+
+def items(m, kind):
+    """ Yields m index, value pairs spread out over 10 * m indexes.
+    Args:
+        m (int) : number of pairs
+        kind (type) : int or float values
+    Yields:
+        (int, int or float) : the pairs, in order of index
+    """
+    for i in range(m):
+        yield i * 10, kind(i % 1000 + 1000)
+
+
+def memory(storage, m, kind):
+    """ Returns bytes per value used building storage, counting the
+    index and value objects it keeps.
+    Args:
+        storage (class) : kind of storage
+        m (int) : number of values
+        kind (type) : int or float values
+    Returns:
+        float : bytes per value
+    """
+    tracemalloc.start()
+    try:
+        built = storage.from_items(items(m, kind))
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del built
+    return size / m
+
+
+def lookups(storage, pairs, n=100000):
+    """ Returns the time per random lookup, in microseconds. """
+    built = storage.from_items(pairs)
+    rand = random.Random(1)
+    indexes = [rand.randrange(len(pairs) * 10) for _ in range(n)]
+    get = built.get
+    start = time.perf_counter()
+    for index in indexes:
+        get(index, 0)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def inserts(storage, pairs, n=1000):
+    """ Returns the time per insert in the middle (moving every
+    index after it up one), in microseconds. """
+    built = storage.from_items(pairs)
+    middle = len(pairs) * 5
+    if storage is DictStorage:
+        def insert():
+            moved = {k + 1 if k >= middle else k: v
+                     for k, v in built.items()}
+            built.clear()
+            built.update(moved)
+        n = max(n // 100, 1)  # it's slow
+    else:
+        def insert():
+            built.shift(middle, 1)
+    start = time.perf_counter()
+    for _ in range(n):
+        insert()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def main(m=1000000):
+    print('{:,} non-zero values'.format(m))
+    print('{:<14} {:<6} {:>12} {:>12} {:>12}'.format(
+        'storage', 'values', 'bytes/value', 'lookup us', 'insert us'))
+    for kind in (int, float):
+        pairs = list(items(m, kind))
+        for storage in (DictStorage, BlockStorage, ArrayStorage):
+            print('{:<14} {:<6} {:>12.1f} {:>12.2f} {:>12.1f}'.format(
+                storage.__name__, kind.__name__, memory(storage, m, kind),
+                lookups(storage, pairs), inserts(storage, pairs)))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
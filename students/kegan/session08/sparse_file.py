@@ -0,0 +1,133 @@
+"""
+Kathryn Egan
+
+Saving SparseArrays to disk and loading them back.
+
+The file is a 32 byte header, then the indexes of the non-zero values
+as 64 bit ints, then the values themselves as 64 bit ints or doubles,
+all little-endian:
+
+    magic    8 bytes   b'SPARSEAR'
+    version  4 bytes   1
+    kind     1 byte    b'q' for int values, b'd' for float values
+    padding  3 bytes
+    length   8 bytes   length of the array w/ zeros
+    nnz      8 bytes   number of non-zero values
+    indexes  8 * nnz bytes
+    values   8 * nnz bytes
+
+A file can also be opened memory-mapped, so only the parts of it that
+get used are read in -- looking up a value reads a few pages of the
+indexes and one of the values, however big the file is.
+"""
+import mmap
+import struct
+import sys
+from array import array
+from SparseArray import SparseArray
+from sparse_storage import ArrayStorage, pack_values
+
+MAGIC = b'SPARSEAR'
+VERSION = 1
+HEADER = struct.Struct('<8sIc3xQQ')
+
+
+def save(sparse, path):
+    """ Saves a SparseArray to a file. The values must be all ints
+    (that fit in 64 bits) or all floats. O(r)
+    Args:
+        sparse (SparseArray) : array to save
+        path (str) : file to save it in
+    """
+    items = list(sparse.nonzero())
+    indexes = array('q', [index for index, _ in items])
+    values = pack_values([value for _, value in items])
+    if not isinstance(values, array):
+        raise TypeError('Values must be all ints or all floats')
+    if sys.byteorder == 'big':
+        indexes.byteswap()
+        values.byteswap()
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, values.typecode.encode(),
+                            len(sparse), len(items)))
+        indexes.tofile(f)
+        values.tofile(f)
+
+
+def _read_header(header):
+    """ Returns kind of values, length and nnz from a file header.
+    Raises ValueError if it isn't a SparseArray file.
+    Args:
+        header (bytes) : first HEADER.size bytes of the file
+    Returns:
+        (str, int, int) : typecode of values, length, nnz
+    """
+    if len(header) < HEADER.size:
+        raise ValueError('Not a SparseArray file')
+    magic, version, kind, length, nnz = HEADER.unpack(header[:HEADER.size])
+    if magic != MAGIC:
+        raise ValueError('Not a SparseArray file')
+    if version != VERSION:
+        raise ValueError('Unknown SparseArray file version {}'.format(version))
+    if kind not in (b'q', b'd'):
+        raise ValueError('Not a SparseArray file')
+    return kind.decode(), length, nnz
+
+
+def load(path, storage=None):
+    """ Loads a SparseArray saved with save. Raises ValueError if
+    the file isn't one, or is cut short. O(r)
+    Args:
+        path (str) : file to load
+        storage (class) :
+            kind of storage for the SparseArray, None for ArrayStorage
+    Returns:
+        SparseArray : array saved in the file
+    """
+    with open(path, 'rb') as f:
+        kind, length, nnz = _read_header(f.read(HEADER.size))
+        indexes = array('q')
+        values = array(kind)
+        try:
+            indexes.fromfile(f, nnz)
+            values.fromfile(f, nnz)
+        except (EOFError, ValueError):
+            # (ValueError when it stops part way through a value)
+            raise ValueError('SparseArray file is cut short') from None
+    if sys.byteorder == 'big':
+        indexes.byteswap()
+        values.byteswap()
+    data = ArrayStorage.from_arrays(indexes, values)
+    sparse = SparseArray._from_storage(length, data)
+    if storage not in (None, ArrayStorage):
+        sparse = SparseArray(sparse, storage)
+    return sparse
+
+
+def open_mapped(path):
+    """ Opens a SparseArray saved with save, memory-mapped: nothing is
+    read until it is used. The array's values stay in the file; if it
+    gets changed, it gets its own copy of them first, and the file is
+    left alone. O(1)
+    Args:
+        path (str) : file to open
+    Returns:
+        SparseArray : array saved in the file
+    """
+    if sys.byteorder == 'big':
+        raise ValueError('Memory-mapped files need a little-endian machine')
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        kind, length, nnz = _read_header(mapped[:HEADER.size])
+        start = HEADER.size
+        middle = start + 8 * nnz
+        if len(mapped) < middle + 8 * nnz:
+            raise ValueError('SparseArray file is cut short')
+    except ValueError:
+        mapped.close()
+        raise
+    view = memoryview(mapped)
+    data = ArrayStorage.view(view[start:middle].cast('q'),
+                             view[middle:middle + 8 * nnz].cast(kind))
+    return SparseArray._from_storage(length, data)
@@ -0,0 +1,558 @@
+"""
+Kathryn Egan
+
+Storage for the non-zero values of a SparseArray.
+
+There are two kinds, with the same methods, so SparseArray can use
+either one: BlockStorage (below) and ArrayStorage, which keeps the
+indexes and values in two compact arrays instead of lists of Python
+objects -- much less memory and fast lookups, but O(m) to change, so
+it's best built all at once and then frozen.
+
+Inserting or deleting in the middle of a SparseArray moves every
+non-zero value after that point over by one. With a dict of
+index : value that means rebuilding the whole dict. BlockStorage keeps
+the indexes in sorted blocks instead, each with an offset that is
+added to all of its indexes, so moving everything after a point only
+touches one block plus the offsets -- and the offsets are kept in a
+Fenwick tree, so changing all the ones after a block is O(log b).
+
+For all O notation,
+  m = number of non-zero values stored
+  b = number of blocks (about m / BLOCK_SIZE)
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+
+# blocks get split in two when they get to twice this size
+BLOCK_SIZE = 256
+
+
+class BlockStorage:
+    """ Stores index : value pairs in sorted blocks, with the
+    offsets of the blocks in a Fenwick tree so that all indexes
+    after a point can be shifted quickly.
+    """
+
+    def __init__(self):
+        """ Initializes empty storage. O(1) """
+        self._keys = []  # blocks of sorted indexes, less the block offset
+        self._values = []  # blocks of values, parallel to _keys
+        self._tree = [0]  # Fenwick tree of block offsets, 1-based
+        self._len = 0  # number of values stored
+        self.frozen = False  # values can't be changed
+
+    @classmethod
+    def from_items(cls, items):
+        """ Builds storage from index, value pairs in increasing
+        order of index. O(m)
+        Args:
+            items (iterable) : (index, value) pairs sorted by index
+        Returns:
+            BlockStorage : storage holding the given pairs
+        """
+        storage = cls()
+        keys = []
+        values = []
+        for index, value in items:
+            keys.append(index)
+            values.append(value)
+        for start in range(0, len(keys), BLOCK_SIZE):
+            storage._keys.append(keys[start:start + BLOCK_SIZE])
+            storage._values.append(values[start:start + BLOCK_SIZE])
+        storage._len = len(keys)
+        storage._build_tree([0] * len(storage._keys))
+        return storage
+
+    def freeze(self):
+        """ Stops the stored values from being changed. Once frozen,
+        set, pop and shift raise TypeError. O(1)
+        Returns:
+            BlockStorage : this storage
+        """
+        self.frozen = True
+        return self
+
+    def _check_frozen(self):
+        """ Raises TypeError if this storage is frozen. """
+        if self.frozen:
+            raise TypeError('Storage is frozen')
+
+    def _build_tree(self, offsets):
+        """ Builds the Fenwick tree from the offset of each block. O(b)
+        Args:
+            offsets (list of int) : offset of each block
+        """
+        # the tree holds the differences between neighboring offsets,
+        # so that an offset is the sum of everything up to its block
+        tree = [0] * (len(offsets) + 1)
+        previous = 0
+        for i, offset in enumerate(offsets, 1):
+            tree[i] += offset - previous
+            previous = offset
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _offset(self, block):
+        """ Returns the offset of the given block. O(log b)
+        Args:
+            block (int) : block number
+        Returns:
+            int : amount added to all the indexes in the block
+        """
+        total = 0
+        i = block + 1
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _add_offset(self, block, amount):
+        """ Adds amount to the offsets of the given block and all
+        the blocks after it. O(log b)
+        Args:
+            block (int) : first block to change
+            amount (int) : amount to add
+        """
+        i = block + 1
+        tree = self._tree
+        while i < len(tree):
+            tree[i] += amount
+            i += i & -i
+
+    def _offsets(self):
+        """ Returns the offsets of all the blocks. O(b log b)
+        Returns:
+            list of int : offset of each block
+        """
+        return [self._offset(block) for block in range(len(self._keys))]
+
+    def _find_block(self, index):
+        """ Returns the last block whose first index is at or
+        before the given index, or -1 if there is none. O(log b * log b)
+        Args:
+            index (int) : index to look for
+        Returns:
+            int : block number
+        """
+        low, high = 0, len(self._keys)
+        while low < high:
+            middle = (low + high) // 2
+            if self._keys[middle][0] + self._offset(middle) <= index:
+                low = middle + 1
+            else:
+                high = middle
+        return low - 1
+
+    def __len__(self):
+        """ Returns the number of values stored. O(1)
+        Returns:
+            int : number of values stored
+        """
+        return self._len
+
+    def get(self, index, default=0):
+        """ Returns the value stored at the given index. O(log b * log b)
+        Args:
+            index (int) : index of value
+            default : value to return if there is nothing at index
+        Returns:
+            value at index, or default if there is none
+        """
+        block = self._find_block(index)
+        if block < 0:
+            return default
+        key = index - self._offset(block)
+        keys = self._keys[block]
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            return self._values[block][i]
+        return default
+
+    def __contains__(self, index):
+        """ Returns whether a value is stored at the given index.
+        Args:
+            index (int) : index to look for
+        Returns:
+            bool : whether there is a value at index
+        """
+        marker = object()
+        return self.get(index, marker) is not marker
+
+    def set(self, index, value):
+        """ Stores value at the given index. O(log b * log b + BLOCK_SIZE)
+        Args:
+            index (int) : index of value
+            value : value to store
+        """
+        self._check_frozen()
+        if not self._keys:
+            self._keys.append([index])
+            self._values.append([value])
+            self._build_tree([0])
+            self._len = 1
+            return
+        block = max(self._find_block(index), 0)
+        key = index - self._offset(block)
+        keys = self._keys[block]
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            self._values[block][i] = value
+            return
+        keys.insert(i, key)
+        self._values[block].insert(i, value)
+        self._len += 1
+        if len(keys) > 2 * BLOCK_SIZE:
+            self._split(block)
+
+    def _split(self, block):
+        """ Splits the given block in two. O(b log b) """
+        offsets = self._offsets()
+        keys = self._keys[block]
+        values = self._values[block]
+        self._keys[block:block + 1] = [keys[:BLOCK_SIZE], keys[BLOCK_SIZE:]]
+        self._values[block:block + 1] = [values[:BLOCK_SIZE],
+                                         values[BLOCK_SIZE:]]
+        offsets.insert(block, offsets[block])
+        self._build_tree(offsets)
+
+    def pop(self, index, default=None):
+        """ Removes and returns the value at the given index.
+        O(log b * log b + BLOCK_SIZE)
+        Args:
+            index (int) : index of value
+            default : value to return if there is nothing at index
+        Returns:
+            value that was at index, or default if there was none
+        """
+        self._check_frozen()
+        block = self._find_block(index)
+        if block < 0:
+            return default
+        key = index - self._offset(block)
+        keys = self._keys[block]
+        i = bisect_left(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return default
+        del keys[i]
+        value = self._values[block].pop(i)
+        self._len -= 1
+        if not keys:
+            # get rid of the empty block
+            offsets = self._offsets()
+            del offsets[block]
+            del self._keys[block]
+            del self._values[block]
+            self._build_tree(offsets)
+        return value
+
+    def shift(self, index, amount):
+        """ Adds amount to every stored index at or after the given index.
+        O(log b * log b + BLOCK_SIZE)
+        Args:
+            index (int) : first index to move
+            amount (int) :
+                how far to move them -- moving down must not move
+                an index onto or past one before index
+        """
+        self._check_frozen()
+        block = self._find_block(index)
+        if block >= 0:
+            # move the ones in this block by hand
+            keys = self._keys[block]
+            key = index - self._offset(block)
+            for i in range(bisect_left(keys, key), len(keys)):
+                keys[i] += amount
+        # and all the blocks after it with the offsets
+        self._add_offset(block + 1, amount)
+
+    def items(self, start=0, stop=None, reverse=False):
+        """ Yields index, value pairs in order of index, for the
+        indexes from start up to (not including) stop. O(log b * log b)
+        to start, then O(1) per pair.
+        Args:
+            start (int) : first index
+            stop (int) : index to stop at, None for no limit
+            reverse (bool) : yield in reverse order
+        Yields:
+            (int, value) : index and value
+        """
+        if reverse:
+            yield from self._items_reversed(start, stop)
+            return
+        block = max(self._find_block(start), 0)
+        for block in range(block, len(self._keys)):
+            offset = self._offset(block)
+            keys = self._keys[block]
+            values = self._values[block]
+            i = bisect_left(keys, start - offset)
+            for i in range(i, len(keys)):
+                index = keys[i] + offset
+                if stop is not None and index >= stop:
+                    return
+                yield index, values[i]
+
+    def _items_reversed(self, start, stop):
+        """ Yields index, value pairs from stop (exclusive) down to start.
+        """
+        if stop is None:
+            block = len(self._keys) - 1
+        else:
+            block = self._find_block(stop - 1)
+        for block in range(block, -1, -1):
+            offset = self._offset(block)
+            keys = self._keys[block]
+            values = self._values[block]
+            if stop is None:
+                i = len(keys)
+            else:
+                i = bisect_right(keys, stop - 1 - offset)
+            for i in range(i - 1, -1, -1):
+                index = keys[i] + offset
+                if index < start:
+                    return
+                yield index, values[i]
+
+    def values(self):
+        """ Yields all the stored values, in order of index. O(m) """
+        for block in self._values:
+            yield from block
+
+
+def pack_values(values):
+    """ Returns the values in the most compact container that holds
+    them as they are: an array of 64 bit ints if they are all ints
+    that fit, an array of doubles if they are all floats, or else a
+    list. O(m)
+    Args:
+        values (list) : values to pack
+    Returns:
+        array or list : the values
+    """
+    if all(type(value) is int for value in values):
+        try:
+            return array('q', values)
+        except OverflowError:
+            pass
+    elif all(type(value) is float for value in values):
+        return array('d', values)
+    return list(values)
+
+
+class ArrayStorage:
+    """ Stores index : value pairs in two parallel compact arrays
+    (COO format), sorted by index: an array of 64 bit ints for the
+    indexes, and an array of ints or doubles for the values (or a
+    list, for values that are neither). Lookups bisect the indexes.
+    """
+
+    def __init__(self):
+        """ Initializes empty storage. O(1) """
+        self._keys = array('q')  # sorted indexes
+        self._values = array('q')  # values, parallel to _keys
+        self.frozen = False  # values can't be changed
+
+    @classmethod
+    def from_items(cls, items):
+        """ Builds storage from index, value pairs in increasing
+        order of index. O(m)
+        Args:
+            items (iterable) : (index, value) pairs sorted by index
+        Returns:
+            ArrayStorage : storage holding the given pairs
+        """
+        storage = cls()
+        values = []
+        for index, value in items:
+            storage._keys.append(index)
+            values.append(value)
+        storage._values = pack_values(values)
+        return storage
+
+    @classmethod
+    def from_arrays(cls, keys, values):
+        """ Makes storage on sorted index and value arrays, without
+        copying them. O(1)
+        Args:
+            keys (array of int) : sorted indexes
+            values (array or list) : values, parallel to keys
+        Returns:
+            ArrayStorage : storage using keys and values
+        """
+        storage = cls()
+        storage._keys = keys
+        storage._values = values
+        return storage
+
+    @classmethod
+    def view(cls, keys, values):
+        """ Makes frozen storage on sorted indexes and values that
+        belong to something else, such as memoryviews on part of bigger
+        arrays, without copying them. O(1)
+        Args:
+            keys (sequence of int) : sorted indexes
+            values (sequence) : values, parallel to keys
+        Returns:
+            ArrayStorage : frozen storage using keys and values
+        """
+        storage = cls.from_arrays(keys, values)
+        storage.frozen = True
+        return storage
+
+    def freeze(self):
+        """ Stops the stored values from being changed, and packs
+        them as compactly as they will go. Once frozen, set, pop and
+        shift raise TypeError. O(m), or O(1) if already frozen or the
+        values aren't in a list (e.g. a view on a memory-mapped file,
+        which packing would read all into memory)
+        Returns:
+            ArrayStorage : this storage
+        """
+        if self.frozen or not isinstance(self._values, list):
+            self.frozen = True
+            return self
+        self._values = pack_values(self._values)
+        self.frozen = True
+        return self
+
+    def _check_frozen(self):
+        """ Raises TypeError if this storage is frozen. """
+        if self.frozen:
+            raise TypeError('Storage is frozen')
+
+    def __len__(self):
+        """ Returns the number of values stored. O(1)
+        Returns:
+            int : number of values stored
+        """
+        return len(self._keys)
+
+    def _find(self, index):
+        """ Returns where the given index is (or would go) in the
+        stored indexes, and whether it is there. O(log m)
+        Args:
+            index (int) : index to look for
+        Returns:
+            (int, bool) : position in _keys, whether index is stored
+        """
+        i = bisect_left(self._keys, index)
+        return i, i < len(self._keys) and self._keys[i] == index
+
+    def get(self, index, default=0):
+        """ Returns the value stored at the given index. O(log m)
+        Args:
+            index (int) : index of value
+            default : value to return if there is nothing at index
+        Returns:
+            value at index, or default if there is none
+        """
+        i, found = self._find(index)
+        return self._values[i] if found else default
+
+    def __contains__(self, index):
+        """ Returns whether a value is stored at the given index.
+        Args:
+            index (int) : index to look for
+        Returns:
+            bool : whether there is a value at index
+        """
+        return self._find(index)[1]
+
+    def set(self, index, value):
+        """ Stores value at the given index. O(m)
+        Args:
+            index (int) : index of value
+            value : value to store
+        """
+        self._check_frozen()
+        i, found = self._find(index)
+        if not self._fits(value):
+            # (empty values can start over as whatever fits value best)
+            self._values = list(self._values) or pack_values([value])[:0]
+        try:
+            self._put(i, found, value)
+        # int too big for the array
+        except OverflowError:
+            self._values = list(self._values)
+            self._put(i, found, value)
+        if not found:
+            self._keys.insert(i, index)
+
+    def _fits(self, value):
+        """ Returns whether value can go in the values as it is. O(1)
+        Args:
+            value : value to store
+        Returns:
+            bool : whether the values container can hold value
+        """
+        typecode = getattr(self._values, 'typecode', None)
+        if typecode == 'q':
+            return type(value) is int
+        if typecode == 'd':
+            return type(value) is float
+        return True
+
+    def _put(self, i, found, value):
+        """ Puts value at position i in the values, replacing
+        what is there if found. O(m)
+        """
+        if found:
+            self._values[i] = value
+        else:
+            self._values.insert(i, value)
+
+    def pop(self, index, default=None):
+        """ Removes and returns the value at the given index. O(m)
+        Args:
+            index (int) : index of value
+            default : value to return if there is nothing at index
+        Returns:
+            value that was at index, or default if there was none
+        """
+        self._check_frozen()
+        i, found = self._find(index)
+        if not found:
+            return default
+        del self._keys[i]
+        return self._values.pop(i)
+
+    def shift(self, index, amount):
+        """ Adds amount to every stored index at or after the given index.
+        O(m)
+        Args:
+            index (int) : first index to move
+            amount (int) :
+                how far to move them -- moving down must not move
+                an index onto or past one before index
+        """
+        self._check_frozen()
+        i = bisect_left(self._keys, index)
+        self._keys[i:] = array('q', [key + amount for key in self._keys[i:]])
+
+    def items(self, start=0, stop=None, reverse=False):
+        """ Yields index, value pairs in order of index, for the
+        indexes from start up to (not including) stop. O(log m)
+        to start, then O(1) per pair.
+        Args:
+            start (int) : first index
+            stop (int) : index to stop at, None for no limit
+            reverse (bool) : yield in reverse order
+        Yields:
+            (int, value) : index and value
+        """
+        low = bisect_left(self._keys, start)
+        if stop is None:
+            high = len(self._keys)
+        else:
+            high = max(bisect_left(self._keys, stop), low)
+        if reverse:
+            for i in range(high - 1, low - 1, -1):
+                yield self._keys[i], self._values[i]
+        else:
+            yield from zip(self._keys[low:high], self._values[low:high])
+
+    def values(self):
+        """ Yields all the stored values, in order of index. O(m) """
+        yield from self._values
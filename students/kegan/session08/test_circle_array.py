@@ -0,0 +1,158 @@
+"""
+Kathryn Egan
+"""
+import random
+from math import pi
+import pytest
+from Circle import Circle, Sphere
+from CircleArray import CircleArray, SphereArray
+
+
+def test_build():
+    a = CircleArray([1, 2.5, Circle(3)])
+    assert len(a) == 3
+    assert list(a.radius) == [1, 2.5, 3]
+    assert len(CircleArray()) == 0
+    assert CircleArray.from_diameters([2, 5]).radius.tolist() == [1, 2.5]
+    with pytest.raises(ValueError):
+        CircleArray([1, 0])
+    with pytest.raises(ValueError):
+        CircleArray([-1])
+
+
+def test_properties_match_circles():
+    radii = [random.uniform(0.1, 100) for _ in range(50)]
+    a = CircleArray(radii)
+    circles = [Circle(r) for r in radii]
+    assert list(a.diameter) == [c.diameter for c in circles]
+    assert list(a.area) == [c.area for c in circles]
+    s = SphereArray(radii)
+    spheres = [Sphere(r) for r in radii]
+    assert list(s.area) == [sp.area for sp in spheres]
+    assert list(s.volume) == [sp.volume for sp in spheres]
+    assert SphereArray.from_volumes([4 / 3 * pi * 8])[0].radius == \
+        pytest.approx(2)
+
+
+def test_views():
+    a = CircleArray([1, 2, 3])
+    c = a[-1]
+    assert isinstance(c, Circle)
+    assert c.radius == 3
+    assert c.area == Circle(3).area
+    assert c == Circle(3)
+    assert c > a[0]
+    c.radius = 5
+    assert a.radius.tolist() == [1, 2, 5]
+    c.diameter = 2
+    assert a.radius.tolist() == [1, 2, 1]
+    with pytest.raises(ValueError):
+        c.radius = 0
+    assert a.radius.tolist() == [1, 2, 1]
+    # arithmetic on a view makes a new Circle
+    assert (c + 1).radius == 2
+    assert a[2].radius == 1
+    with pytest.raises(IndexError):
+        a[3]
+    s = SphereArray([2])
+    assert isinstance(s[0], Sphere)
+    assert s[0].volume == Sphere(2).volume
+    assert [c.radius for c in a] == [1, 2, 1]
+
+
+def test_setter_and_mutation():
+    a = CircleArray([1, 2, 3])
+    a[0] = Circle(4)
+    a[-1] = 6
+    assert a.radius.tolist() == [4, 2, 6]
+    with pytest.raises(ValueError):
+        a[1] = 0
+    del a[1]
+    assert a.radius.tolist() == [4, 6]
+    a.append(1)
+    a.extend([Circle(2), 3])
+    a.extend(CircleArray([9]))
+    assert a.radius.tolist() == [4, 6, 1, 2, 3, 9]
+    with pytest.raises(ValueError):
+        a.extend([1, -1])
+    assert len(a) == 6
+    a.radius = range(1, 7)
+    assert a.radius.tolist() == [1, 2, 3, 4, 5, 6]
+    with pytest.raises(ValueError):
+        a.radius = [1]
+
+
+def test_slicing():
+    a = CircleArray([1, 2, 3, 4, 5])
+    assert a[1:4].radius.tolist() == [2, 3, 4]
+    assert a[::-2].radius.tolist() == [5, 3, 1]
+    assert isinstance(SphereArray([1, 2])[:1], SphereArray)
+    # a slice is a copy
+    b = a[:2]
+    b[0] = 10
+    assert a[0].radius == 1
+
+
+def test_arithmetic():
+    a = CircleArray([1, 2, 3])
+    b = CircleArray([4, 5, 6])
+    assert (a + b).radius.tolist() == [5, 7, 9]
+    assert (a + 1).radius.tolist() == [2, 3, 4]
+    assert (a + Circle(1)).radius.tolist() == [2, 3, 4]
+    assert (1 + a).radius.tolist() == [2, 3, 4]
+    assert (a * b).radius.tolist() == [4, 10, 18]
+    assert (a * 2).radius.tolist() == [2, 4, 6]
+    assert (2 * a).radius.tolist() == [2, 4, 6]
+    assert (b / 2).radius.tolist() == [2, 2.5, 3]
+    assert (b / a).radius.tolist() == [4, 2.5, 2]
+    assert isinstance(SphereArray([1]) * 2, SphereArray)
+    with pytest.raises(ValueError):
+        a + CircleArray([1])
+    with pytest.raises(ValueError):
+        a * -1
+    view = a[0]
+    a += 1
+    assert a.radius.tolist() == [2, 3, 4]
+    assert view.radius == 2
+    a *= b
+    assert a.radius.tolist() == [8, 15, 24]
+    assert a.total() == Circle(47)
+    assert sum([a, a]).radius.tolist() == [16, 30, 48]
+    assert isinstance(SphereArray([1]).total(), Sphere)
+
+
+def test_sorting():
+    radii = [random.uniform(0.1, 100) for _ in range(100)]
+    a = CircleArray(radii)
+    order = a.argsort()
+    assert [radii[i] for i in order] == sorted(radii)
+    assert a.take(order).radius.tolist() == sorted(radii)
+    assert a.argsort(reverse=True) == sorted(
+        range(100), key=radii.__getitem__, reverse=True)
+    # sorted the same as the Circles
+    assert [c.radius for c in sorted(Circle(r) for r in radii)] == \
+        sorted(radii)
+    a.sort()
+    assert a.radius.tolist() == sorted(radii)
+    a.sort(reverse=True)
+    assert a.radius.tolist() == sorted(radii, reverse=True)
+
+
+def test_filtering():
+    a = CircleArray([5, 1, 4, 2, 3])
+    assert a.compress([True, False, True, False, False]).radius.tolist() \
+        == [5, 4]
+    assert a.compress(r > 2 for r in a.radius).radius.tolist() == [5, 4, 3]
+    assert a.between(2, 4).radius.tolist() == [4, 2, 3]
+    assert a.between(low=4).radius.tolist() == [5, 4]
+    assert a.between(high=Circle(1)).radius.tolist() == [1]
+    assert len(a.between(10)) == 0
+
+
+def test_eq_and_str():
+    assert CircleArray([1, 2]) == CircleArray([1.0, 2.0])
+    assert CircleArray([1, 2]) != CircleArray([2, 1])
+    assert CircleArray([1]) != SphereArray([1])
+    assert CircleArray([1]) != [1]
+    assert str(CircleArray([1, 2.25])) == 'CircleArray, r=[1.0, 2.2]'
+    assert repr(SphereArray([1])) == 'SphereArray([1.0])'
@@ -0,0 +1,168 @@
+"""
+Kathryn Egan
+"""
+import random
+import pytest
+from RunArray import RunArray
+
+
+def runs(p):
+    """ Returns a list as (start, length, value) runs. """
+    result = []
+    for i, value in enumerate(p):
+        if result and result[-1][2] == value:
+            result[-1][1] += 1
+        else:
+            result.append([i, 1, value])
+    return [tuple(run) for run in result]
+
+
+def test_build():
+    p = [1, 1, 1, 0, 0, 5, 1, 1]
+    a = RunArray(p)
+    assert len(a) == len(p)
+    assert list(a) == p
+    assert list(a.runs()) == [(0, 3, 1), (3, 2, 0), (5, 1, 5), (6, 2, 1)]
+    assert list(RunArray().runs()) == []
+    assert RunArray(a) == p
+
+
+def test_getter():
+    p = [1, 1, 1, 0, 0, 5, 1, 1]
+    a = RunArray(p)
+    for i in range(-len(p), len(p)):
+        assert a[i] == p[i]
+    with pytest.raises(IndexError):
+        a[8]
+    with pytest.raises(IndexError):
+        a[-9]
+
+
+def test_slicing():
+    p = [1, 1, 1, 0, 0, 5, 1, 1, 2, 2]
+    a = RunArray(p)
+    tests = [None] + list(range(-11, 12, 2)) + [0, 4]
+    with pytest.raises(ValueError):
+        a[::0]
+    for start in tests:
+        for stop in tests:
+            for step in tests:
+                if step == 0:
+                    continue
+                s = a[start:stop:step]
+                assert s == p[start:stop:step]
+                assert list(s.runs()) == runs(p[start:stop:step])
+    assert a[1:3, ::-4] == p[1:3] + p[::-4]
+
+
+def test_setter():
+    p = [1, 1, 1, 0, 0, 5, 1, 1]
+    a = RunArray(p)
+    for index, value in [(1, 2), (0, 2), (2, 2), (5, 0), (4, 7), (-1, 9),
+                         (3, 2), (4, 2), (5, 2), (6, 2), (7, 2)]:
+        a[index] = value
+        p[index] = value
+        assert list(a.runs()) == runs(p)
+    assert list(a.runs()) == [(0, 8, 2)]
+    with pytest.raises(IndexError):
+        a[8] = 1
+
+
+def test_delete():
+    p = [1, 1, 0, 2, 0, 0, 1]
+    a = RunArray(p)
+    for index in [3, 2, 0, -1, 1, 0, 0]:
+        del a[index]
+        del p[index]
+        assert list(a.runs()) == runs(p)
+    assert len(a) == 0
+    with pytest.raises(IndexError):
+        del a[0]
+
+
+def test_insert_append_extend():
+    p = [1, 1, 0]
+    a = RunArray(p)
+    for index, value in [(0, 1), (0, 2), (1, 1), (3, 0), (4, 1), (100, 0),
+                         (-2, 3), (-100, 2), (2, 5)]:
+        a.insert(index, value)
+        p.insert(index, value)
+        assert list(a.runs()) == runs(p)
+    a.append(0)
+    p.append(0)
+    a.extend([0, 4, 4])
+    p.extend([0, 4, 4])
+    a.extend(RunArray([4, 1]))
+    p.extend([4, 1])
+    assert list(a.runs()) == runs(p)
+
+
+def test_random_changes():
+    rand = random.Random(5)
+    p = [rand.choice([0, 1]) for _ in range(50)]
+    a = RunArray(p)
+    for _ in range(1000):
+        action = rand.random()
+        value = rand.choice([0, 1, 2])
+        if action < 0.4 and p:
+            index = rand.randrange(len(p))
+            a[index] = value
+            p[index] = value
+        elif action < 0.7:
+            index = rand.randrange(len(p) + 1)
+            a.insert(index, value)
+            p.insert(index, value)
+        elif p:
+            index = rand.randrange(len(p))
+            del a[index]
+            del p[index]
+        assert list(a.runs()) == runs(p)
+
+
+def test_reverse():
+    p = [1, 1, 0, 2, 2, 2]
+    a = RunArray(p)
+    assert list(reversed(a)) == p[::-1]
+    a.reverse()
+    p.reverse()
+    assert a == p
+    assert list(a.runs()) == runs(p)
+
+
+def test_search():
+    p = [1, 1, 0, 2, 2, 2, 1]
+    a = RunArray(p)
+    for value in [0, 1, 2, 3]:
+        assert (value in a) == (value in p)
+        assert a.count(value) == p.count(value)
+        if value in p:
+            assert a.index(value) == p.index(value)
+    with pytest.raises(ValueError):
+        a.index(3)
+
+
+def test_operators():
+    p = [1, 1, 0]
+    a = RunArray(p)
+    assert a + [0, 2] == p + [0, 2]
+    assert a * 3 == p * 3
+    assert 2 * a == 2 * p
+    a += [0]
+    p += [0]
+    assert a == p
+    assert str(a) == str(p)
+
+
+def test_comparisons():
+    arrays = [[], [0], [0, 0], [0, 1], [1], [1, 1, 1], [0, 1, 0], [2]]
+    for p1 in arrays:
+        for p2 in arrays:
+            a1 = RunArray(p1)
+            for other in (p2, RunArray(p2)):
+                assert (a1 == other) == (p1 == p2)
+                assert (a1 != other) == (p1 != p2)
+                assert (a1 < other) == (p1 < p2)
+                assert (a1 > other) == (p1 > p2)
+                assert (a1 <= other) == (p1 <= p2)
+                assert (a1 >= other) == (p1 >= p2)
+            assert (p1 < a1) == (p1 < p1)
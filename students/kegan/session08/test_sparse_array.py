@@ -1,8 +1,17 @@
 """
 Kathryn Egan
 """
+from bisect import bisect_left
 import pytest
 from SparseArray import SparseArray
+from sparse_storage import ArrayStorage, BlockStorage
+
+
+@pytest.fixture(autouse=True, params=[BlockStorage, ArrayStorage])
+def storage(request, monkeypatch):
+    """ Runs every test with each kind of storage. """
+    monkeypatch.setattr(SparseArray, 'storage', request.param)
+    return request.param
 
 
 def test_length():
@@ -362,3 +371,378 @@ def test_ireverse():
     assert s1._ireverse(0) == 3
     assert s1._ireverse(-1) == 4
     assert s1._ireverse(4) == -1
+
+
+def test_reversed_changes():
+    p = [0, 1, 2, 0, 3]
+    a = SparseArray(p)
+    a.reverse()
+    p.reverse()
+    a[0] = 7
+    p[0] = 7
+    assert a == p
+    del a[1]
+    del p[1]
+    assert a == p
+    a.insert(1, 5)
+    p.insert(1, 5)
+    assert a == p
+    a.append(9)
+    p.append(9)
+    assert a == p
+    a.reverse()
+    p.reverse()
+    assert a == p
+
+
+def test_many_middle_changes():
+    p = [i % 7 for i in range(3000)]
+    a = SparseArray(p)
+    for i in range(1000):
+        a.insert(1500, i % 3)
+        p.insert(1500, i % 3)
+        del a[700]
+        del p[700]
+    assert len(a) == len(p)
+    assert a.data == {i: v for i, v in enumerate(p) if v != 0}
+
+
+def test_slice_is_view():
+    p = [0, 1, 0, 2, 3, 0, 0, 4]
+    a = SparseArray(p)
+    s = a[1:7:2]
+    assert s._data is a._data
+    assert s == p[1:7:2]
+    assert s[::-1]._data is a._data
+    assert s[::-1] == p[1:7:2][::-1]
+
+
+def test_slice_copy_on_write():
+    p = [0, 1, 0, 2, 3, 0, 0, 4]
+    a = SparseArray(p)
+    s = a[::-2]
+    s[0] = 9
+    s.insert(1, 8)
+    del s[-1]
+    q = p[::-2]
+    q[0] = 9
+    q.insert(1, 8)
+    del q[-1]
+    assert s == q
+    assert a == p
+    s = a[2:]
+    a[3] = 0
+    a.append(5)
+    assert s == p[2:]
+    p[3] = 0
+    p.append(5)
+    assert a == p
+
+
+def test_write_after_view_is_gone():
+    p = [0, 1, 0, 2, 3, 0, 0, 4]
+    a = SparseArray(p)
+    data = a._data
+    s = a[2:5]
+    a[1] = 5  # the view is still around, so the values are copied
+    assert a._data is not data
+    assert s == p[2:5]
+    data = a._data
+    s = a[::-1]
+    del s
+    a[3] = 6
+    a.append(7)
+    assert a._data is data
+    assert a == [0, 5, 0, 6, 3, 0, 0, 4, 7]
+    assert a._count_nonzero() == 5
+
+
+def test_slice_of_slice():
+    p = [i % 4 for i in range(50)]
+    a = SparseArray(p)
+    steps = [None, 1, 2, 3, -1, -2, -5]
+    for step in steps:
+        for inner in steps:
+            assert a[3:47:step][::inner] == p[3:47:step][::inner]
+            assert a[-3::step][1:-1:inner] == p[-3::step][1:-1:inner]
+    a.reverse()
+    p.reverse()
+    assert a[5:40:3][::-2] == p[5:40:3][::-2]
+
+
+def test_tuple_slicing():
+    p = [0, 1, 2, 3, 0, 0, 4, 0]
+    a = SparseArray(p)
+    assert a[1:3, ::-1, 5:] == p[1:3] + p[::-1] + p[5:]
+    assert a[2:6, 4:0:-2].data == {0: 2, 1: 3, 5: 2}
+
+
+def test_huge_slice():
+    a = SparseArray()
+    a._length = 10 ** 7
+    for i in range(0, 10 ** 7, 10 ** 5):
+        a[i] = i + 1
+    s = a[::-3]
+    assert len(s) == len(range(10 ** 7 - 1, -1, -3))
+    assert s.data == {(10 ** 7 - 1 - i) // 3: i + 1
+                      for i in range(0, 10 ** 7, 10 ** 5)
+                      if (10 ** 7 - 1 - i) % 3 == 0}
+    assert s.count(9 * 10 ** 5 + 1) == 1
+    assert 10 ** 5 + 1 not in s
+    assert 0 in s
+
+
+def test_add():
+    p1 = [0, 1, 0, 2, -3, 0]
+    p2 = [4, 0, 0, -2, 3, 0]
+    a1 = SparseArray(p1)
+    a2 = SparseArray(p2)
+    assert a1.add(a2) == [x + y for x, y in zip(p1, p2)]
+    assert a1.add(a2).data == {0: 4, 1: 1}  # zero sums not stored
+    assert a1.add(p2) == [x + y for x, y in zip(p1, p2)]
+    assert a1.add(0) == p1
+    assert a1.add(2) == [x + 2 for x in p1]
+    assert a1[::-1].add(a2[::-1]) == [x + y for x, y in zip(p1, p2)][::-1]
+    with pytest.raises(ValueError):
+        a1.add([1, 2])
+
+
+def test_multiply_elementwise():
+    p1 = [0, 1, 0, 2, -3, 0]
+    p2 = [4, 5, 0, 0, 3, 1]
+    a1 = SparseArray(p1)
+    a2 = SparseArray(p2)
+    assert a1.multiply(a2) == [x * y for x, y in zip(p1, p2)]
+    assert a1.multiply(a2).data == {1: 5, 4: -9}
+    assert a1.multiply(3) == [x * 3 for x in p1]
+    assert a1.multiply(0).data == {}
+    assert a1 == p1
+
+
+def test_dot():
+    p1 = [0, 1, 0, 2, -3, 0]
+    p2 = [4, 5, 0, 0, 3, 1]
+    a1 = SparseArray(p1)
+    assert a1.dot(SparseArray(p2)) == sum(x * y for x, y in zip(p1, p2))
+    assert a1.dot(p2) == -4
+    assert SparseArray().dot([]) == 0
+
+
+def test_reductions():
+    p = [0, 1, 0, 2, -3, 0]
+    a = SparseArray(p)
+    assert a.sum() == sum(p)
+    assert a.min() == -3
+    assert a.max() == 2
+    assert SparseArray([-1, -2]).max() == -1
+    assert SparseArray([0, -1]).max() == 0
+    assert a.norm() == pytest.approx(14 ** 0.5)
+    assert a.norm(1) == 6
+    assert a.norm(float('inf')) == 3
+    assert SparseArray([0, 0]).norm() == 0
+    with pytest.raises(ValueError):
+        SparseArray().min()
+
+
+def test_big_numeric():
+    a = SparseArray()
+    a._length = 10 ** 7
+    b = SparseArray()
+    b._length = 10 ** 7
+    for i in range(0, 10 ** 7, 10 ** 5):
+        a[i] = 2
+        b[i + 7] = 3
+    assert a.dot(b) == 0
+    assert a.multiply(b).data == {}
+    assert a.add(b).sum() == 500
+    assert a.add(b).max() == 3
+
+
+def test_dense():
+    p = [0, 1.5, 0, 2, 0]
+    assert SparseArray.from_dense(p) == p
+    numpy = pytest.importorskip('numpy')
+    dense = numpy.array(p)
+    a = SparseArray.from_dense(dense)
+    assert a.data == {1: 1.5, 3: 2}
+    assert (a.to_dense() == dense).all()
+    assert (a[::-1].to_dense() == dense[::-1]).all()
+
+
+def test_nonzero():
+    p = [0, 1, 0, 0, 2, 3, 0]
+    a = SparseArray(p)
+    assert list(a.nonzero()) == [(1, 1), (4, 2), (5, 3)]
+    assert list(a[::-2].nonzero()) == [(1, 2)]
+    assert list(a[::-1].nonzero()) == [(1, 3), (2, 2), (5, 1)]
+    assert list(SparseArray([0, 0]).nonzero()) == []
+
+
+def test_dense_iteration():
+    for p in [[], [0], [1], [0, 0, 5, 0, 6, 6, 0, 0], [1, 0, 0, 2]]:
+        a = SparseArray(p)
+        assert list(a) == p
+        assert list(reversed(a)) == p[::-1]
+        assert list(a[1::2]) == p[1::2]
+        assert str(a) == str(p)
+    assert str(SparseArray([0, 1.5, 'a'])) == str([0, 1.5, 'a'])
+
+
+def test_compare_sparse_arrays():
+    arrays = [[], [0], [0, 0], [0, 1], [1], [0, 0, 0, 2], [0, 1, 0],
+              [-1, 5], [0, 1, 0, 0, 0, 0, 7]]
+    for p1 in arrays:
+        for p2 in arrays:
+            a1 = SparseArray(p1)
+            a2 = SparseArray(p2)
+            assert (a1 == a2) == (p1 == p2)
+            assert (a1 != a2) == (p1 != p2)
+            assert (a1 < a2) == (p1 < p2)
+            assert (a1 > a2) == (p1 > p2)
+            assert (a1 <= a2) == (p1 <= p2)
+            assert (a1 >= a2) == (p1 >= p2)
+            assert (a1 < p2) == (p1 < p2)
+            assert (a1 >= p2) == (p1 >= p2)
+
+
+def test_compare_and_reversed_make_no_views():
+    p = [0, 1, 0, 2, 3, 0, 0, 4]
+    a = SparseArray(p)
+    b = SparseArray(p[:5])
+    data = a._data
+    assert a > b and b < a
+    assert list(reversed(a)) == p[::-1]
+    assert list(reversed(a[5:0:-2])) == p[5:0:-2][::-1]
+    a[0] = 9
+    assert a._data is data
+
+
+def test_equals_iterator():
+    a = SparseArray([0, 1, 0])
+    assert a == iter([0, 1, 0])
+    assert a != iter([0, 1, 0, 0])
+    assert a != iter([0, 1])
+
+
+def test_index_zero():
+    assert SparseArray([1, 2, 0, 3]).index(0) == 2
+    assert SparseArray([1, 2, 3, 0]).index(0) == 3
+    assert SparseArray([1, 2, 3, 0])[::-1].index(3) == 1
+    with pytest.raises(ValueError):
+        SparseArray([1, 2]).index(0)
+
+
+def test_storage_kind(storage):
+    a = SparseArray([0, 1, 2, 0])
+    assert type(a._data) is storage
+    assert type(a[::-1]._data) is storage
+    assert type(a.add(a)._data) is storage
+    other = BlockStorage if storage is ArrayStorage else ArrayStorage
+    b = SparseArray(a, other)
+    assert type(b._data) is other
+    assert b == a
+    assert type(b.multiply(2)._data) is other
+
+
+def test_freeze():
+    p = [0, 1, 0, 2.5, 0]
+    a = SparseArray(p).freeze()
+    data = a._data
+    with pytest.raises(TypeError):
+        data.set(0, 1)
+    s = a[1:]
+    a[0] = 7
+    del a[1]
+    assert a == [7, 0, 2.5, 0]
+    assert a._data is not data
+    assert not a._data.frozen
+    assert s == p[1:]
+    s.insert(0, 3)
+    assert s == [3] + p[1:]
+    assert s._data is not data
+
+
+def test_value_index():
+    p = [0, 3, 1, 0, 3, 2, 0]
+    a = SparseArray(p).index_values()
+    assert 3 in a
+    assert 4 not in a
+    assert a.index(3) == 1
+    assert a.count(3) == 2
+    assert a.count(0) == 3
+    with pytest.raises(ValueError):
+        a.index(4)
+    a[1] = 0
+    p[1] = 0
+    assert a.index(3) == 4
+    a.insert(0, 3)
+    p.insert(0, 3)
+    assert a.index(3) == 0
+    del a[0]
+    del p[0]
+    del a[0]
+    del p[0]
+    assert a.index(3) == p.index(3)
+    assert a.index(2) == p.index(2)
+    a.reverse()
+    p.reverse()
+    assert a.index(1) == p.index(1)
+    a.extend(SparseArray([7, 0, 7]))
+    p.extend([7, 0, 7])
+    assert a.count(7) == 2
+    assert a.index(7) == p.index(7)
+
+
+def test_value_index_random():
+    import random
+    rand = random.Random(3)
+    p = [rand.choice([0, 0, 1, 2, 3]) for _ in range(100)]
+    a = SparseArray(p).index_values()
+    for _ in range(500):
+        action = rand.random()
+        value = rand.choice([0, 1, 2, 3])
+        index = rand.randrange(len(p))
+        if action < 0.3:
+            a[index] = value
+            p[index] = value
+        elif action < 0.5:
+            a.insert(index, value)
+            p.insert(index, value)
+        elif action < 0.7:
+            del a[index]
+            del p[index]
+        else:
+            a.append(value)
+            p.append(value)
+        for v in range(5):
+            assert (v in a) == (v in p)
+            assert a.count(v) == p.count(v)
+            if v in p:
+                assert a.index(v) == p.index(v)
+    assert a._positions is not None
+
+
+def test_value_index_append(monkeypatch):
+    import SparseArray as module
+    calls = []
+
+    def counting_bisect_left(positions, index):
+        calls.append(index)
+        return bisect_left(positions, index)
+
+    monkeypatch.setattr(module, 'bisect_left', counting_bisect_left)
+    a = SparseArray().index_values()
+    a.count(1)  # builds the index
+    p = []
+    for i in range(2000):
+        a.append(i + 0.5)
+        p.append(i + 0.5)
+    # appending shifts nothing, however many values there are
+    assert calls == []
+    assert a.index(1999.5) == 1999
+    # inserting shifts only the values after the insert
+    a.insert(1990, 7)
+    p.insert(1990, 7)
+    assert len(calls) == 10
+    for value in (0.5, 1989.5, 1990.5, 1999.5, 7):
+        assert a.index(value) == p.index(value)
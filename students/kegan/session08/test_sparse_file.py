@@ -0,0 +1,131 @@
+"""
+Kathryn Egan
+"""
+import mmap
+import pytest
+import sparse_file
+from SparseArray import SparseArray
+from sparse_storage import ArrayStorage, BlockStorage
+
+
+@pytest.fixture(params=[sparse_file.load, sparse_file.open_mapped])
+def opener(request):
+    return request.param
+
+
+def test_round_trip(tmp_path, opener):
+    path = str(tmp_path / 'a.sparse')
+    for p in [[], [0, 0], [0, 1, 0, -2, 3, 0], [0, 1.5, 0, 2.5],
+              [2 ** 62, 0, -2 ** 62]]:
+        sparse_file.save(SparseArray(p), path)
+        a = opener(path)
+        assert a == p
+        assert len(a) == len(p)
+        assert [type(x) for x in a] == [type(x) for x in p]
+
+
+def test_save_view(tmp_path, opener):
+    path = str(tmp_path / 'a.sparse')
+    p = [i % 3 for i in range(30)]
+    sparse_file.save(SparseArray(p)[25:2:-3], path)
+    assert opener(path) == p[25:2:-3]
+
+
+def test_bad_values(tmp_path):
+    path = str(tmp_path / 'a.sparse')
+    with pytest.raises(TypeError):
+        sparse_file.save(SparseArray([1, 2.5]), path)
+    with pytest.raises(TypeError):
+        sparse_file.save(SparseArray(['a']), path)
+
+
+def test_bad_file(tmp_path, opener):
+    path = tmp_path / 'a.sparse'
+    path.write_bytes(b'not a sparse array file at all, no it is not')
+    with pytest.raises(ValueError):
+        opener(str(path))
+    path.write_bytes(b'short')
+    with pytest.raises(ValueError):
+        opener(str(path))
+
+
+def test_cut_short(tmp_path, opener):
+    path = tmp_path / 'a.sparse'
+    sparse_file.save(SparseArray([0, 1, 0, 2, 3]), str(path))
+    whole = path.read_bytes()
+    for size in (len(whole) - 1, len(whole) - 8 * 3):
+        path.write_bytes(whole[:size])
+        with pytest.raises(ValueError, match='cut short'):
+            opener(str(path))
+
+
+def test_mapped_closed_on_error(tmp_path, monkeypatch):
+    opened = []
+
+    class Recording(mmap.mmap):
+        def __new__(cls, *args, **kwargs):
+            mapped = super().__new__(cls, *args, **kwargs)
+            opened.append(mapped)
+            return mapped
+    monkeypatch.setattr(sparse_file.mmap, 'mmap', Recording)
+    path = tmp_path / 'a.sparse'
+    sparse_file.save(SparseArray([0, 1, 0, 2]), str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        sparse_file.open_mapped(str(path))
+    path.write_bytes(b'not a sparse array file at all, no it is not')
+    with pytest.raises(ValueError):
+        sparse_file.open_mapped(str(path))
+    assert len(opened) == 2
+    assert all(mapped.closed for mapped in opened)
+
+
+def test_load_storage(tmp_path):
+    path = str(tmp_path / 'a.sparse')
+    sparse_file.save(SparseArray([0, 1, 0, 2]), path)
+    assert type(sparse_file.load(path)._data) is ArrayStorage
+    a = sparse_file.load(path, BlockStorage)
+    assert type(a._data) is BlockStorage
+    assert a == [0, 1, 0, 2]
+    a.insert(0, 5)
+    assert a == [5, 0, 1, 0, 2]
+
+
+def test_mapped_copy_on_write(tmp_path):
+    path = str(tmp_path / 'a.sparse')
+    p = [0, 1, 0, 2, 0]
+    sparse_file.save(SparseArray(p), path)
+    a = sparse_file.open_mapped(path)
+    assert a._data.frozen
+    assert a[3] == 2
+    assert a[::-1] == p[::-1]
+    a[0] = 7
+    del a[1]
+    assert a == [7, 0, 2, 0]
+    assert sparse_file.open_mapped(path) == p
+
+
+def test_mapped_freeze(tmp_path):
+    path = str(tmp_path / 'a.sparse')
+    sparse_file.save(SparseArray([0, 1.5, 0, 2.5]), path)
+    a = sparse_file.open_mapped(path)
+    values = a._data._values
+    assert a.freeze() is a
+    assert a._data._values is values
+    assert isinstance(a._data._values, memoryview)
+    assert a == [0, 1.5, 0, 2.5]
+
+
+def test_mapped_big(tmp_path):
+    path = str(tmp_path / 'a.sparse')
+    a = SparseArray()
+    block = SparseArray([0] * 10 ** 6)
+    for i in range(1000):
+        block[0] = i + 1
+        a.extend(block)
+    sparse_file.save(a, path)
+    b = sparse_file.open_mapped(path)
+    assert len(b) == 10 ** 9
+    assert b[5 * 10 ** 6] == 6
+    assert b[5 * 10 ** 6 + 1] == 0
+    assert b.count(7) == 1
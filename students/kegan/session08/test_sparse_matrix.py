@@ -0,0 +1,137 @@
+"""
+Kathryn Egan
+"""
+import pytest
+from SparseArray import SparseArray
+from SparseMatrix import SparseMatrix
+
+DENSE = [[0, 1, 0, 0],
+         [2, 0, 0, 3],
+         [0, 0, 0, 0],
+         [0, 4, 5, 0],
+         [6, 0, 0, 7]]
+
+
+@pytest.fixture(params=['csr', 'csc'])
+def matrix(request):
+    return SparseMatrix.from_dense(DENSE, request.param)
+
+
+def dense(matrix):
+    """ Returns matrix as a list of lists. """
+    return [list(row) for row in matrix]
+
+
+def test_build(matrix):
+    assert matrix.shape == (5, 4)
+    assert matrix.nnz == 7
+    assert len(matrix) == 5
+    assert dense(matrix) == DENSE
+
+
+def test_triples():
+    m = SparseMatrix([(1, 2, 3), (0, 0, 1), (1, 2, 4), (2, 1, 5),
+                      (2, 1, -5)], shape=(3, 3))
+    assert dense(m) == [[1, 0, 0], [0, 0, 7], [0, 0, 0]]
+    assert m.nnz == 2
+    assert SparseMatrix([(1, 3, 2)]).shape == (2, 4)
+    assert SparseMatrix().shape == (0, 0)
+    with pytest.raises(IndexError):
+        SparseMatrix([(5, 0, 1)], shape=(2, 2))
+    with pytest.raises(ValueError):
+        SparseMatrix(format='coo')
+
+
+def test_get(matrix):
+    for i, row in enumerate(DENSE):
+        for j, value in enumerate(row):
+            assert matrix[i, j] == value
+    assert matrix[-1, -1] == 7
+    with pytest.raises(IndexError):
+        matrix[5, 0]
+    with pytest.raises(IndexError):
+        matrix[0, 4]
+
+
+def test_rows_and_columns(matrix):
+    for i, row in enumerate(DENSE):
+        assert matrix.row(i) == row
+        assert matrix[i] == row
+        assert matrix[i, 1::2] == row[1::2]
+    for j in range(4):
+        column = [row[j] for row in DENSE]
+        assert matrix.column(j) == column
+        assert matrix[::-2, j] == column[::-2]
+
+
+def test_row_view():
+    m = SparseMatrix.from_dense(DENSE)
+    row = m.row(1)
+    assert isinstance(row, SparseArray)
+    assert row._data.frozen
+    row[0] = 9
+    assert row == [9, 0, 0, 3]
+    assert m.row(1) == DENSE[1]
+    assert m[1, 0] == 2
+
+
+def test_part(matrix):
+    slices = [slice(None), slice(1, 4), slice(None, None, -1),
+              slice(4, 0, -2), slice(0, 5, 3), slice(3, 1)]
+    for rows in slices:
+        for columns in slices:
+            part = matrix[rows, columns]
+            assert part.format == matrix.format
+            assert dense(part) == [row[columns] for row in DENSE[rows]]
+    assert dense(matrix[1:3]) == DENSE[1:3]
+
+
+def test_transpose(matrix):
+    t = matrix.T
+    assert t.shape == (4, 5)
+    assert t.format != matrix.format
+    assert dense(t) == [list(column) for column in zip(*DENSE)]
+    assert dense(t.T) == DENSE
+
+
+def test_convert(matrix):
+    assert dense(matrix.to_csr()) == DENSE
+    assert matrix.to_csr().format == 'csr'
+    assert dense(matrix.to_csc()) == DENSE
+    assert matrix.to_csc().format == 'csc'
+
+
+def test_vector_product(matrix):
+    vector = [1, 0, 2, -1]
+    expected = [sum(a * b for a, b in zip(row, vector)) for row in DENSE]
+    assert matrix.dot(vector) == expected
+    assert matrix @ SparseArray(vector) == expected
+    with pytest.raises(ValueError):
+        matrix.dot([1, 2])
+
+
+def test_matrix_product(matrix):
+    other = [[1, 0], [0, 2], [3, 0], [0, -1]]
+    expected = [[sum(row[k] * other[k][j] for k in range(4))
+                 for j in range(2)] for row in DENSE]
+    product = matrix @ SparseMatrix.from_dense(other, 'csc')
+    assert product.shape == (5, 2)
+    assert dense(product) == expected
+    assert dense(matrix @ matrix.T) == [
+        [sum(a * b for a, b in zip(r1, r2)) for r2 in DENSE] for r1 in DENSE]
+    with pytest.raises(ValueError):
+        matrix @ matrix
+
+
+def test_values():
+    m = SparseMatrix.from_dense([[0, 1.5], [2.5, 0]])
+    assert m[0, 1] == 1.5
+    assert m.row(1) == [2.5, 0]
+    m = SparseMatrix.from_dense([[0, 'a'], [1, 0]])
+    assert m.row(0) == [0, 'a']
+
+
+def test_dense():
+    numpy = pytest.importorskip('numpy')
+    m = SparseMatrix.from_dense(numpy.array(DENSE))
+    assert (m.to_dense() == numpy.array(DENSE)).all()
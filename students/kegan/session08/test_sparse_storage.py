@@ -0,0 +1,142 @@
+"""
+Kathryn Egan
+"""
+import random
+import pytest
+import sparse_storage
+from array import array
+from sparse_storage import ArrayStorage, BlockStorage
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """ Makes blocks small so splitting and merging get tested. """
+    monkeypatch.setattr(sparse_storage, 'BLOCK_SIZE', 4)
+
+
+@pytest.fixture(params=[BlockStorage, ArrayStorage])
+def Storage(request, small_blocks):
+    """ Runs a test with each kind of storage. """
+    return request.param
+
+
+def test_empty(Storage):
+    s = Storage()
+    assert len(s) == 0
+    assert s.get(3) == 0
+    assert s.pop(3) is None
+    assert list(s.items()) == []
+    s.shift(0, 5)
+    assert list(s.items()) == []
+
+
+def test_from_items(Storage):
+    pairs = [(i * 3, i + 1) for i in range(20)]
+    s = Storage.from_items(pairs)
+    assert len(s) == 20
+    assert list(s.items()) == pairs
+    assert list(s.values()) == [v for _, v in pairs]
+    assert s.get(9) == 4
+    assert s.get(10) == 0
+    assert 9 in s
+    assert 10 not in s
+
+
+def test_set_and_pop(Storage):
+    s = Storage()
+    for i in [10, 2, 30, 4, 5, 1, 0, 22, 17, 8, 9]:
+        s.set(i, i * 10)
+    assert [i for i, _ in s.items()] == [0, 1, 2, 4, 5, 8, 9, 10, 17, 22, 30]
+    s.set(4, 'four')
+    assert s.get(4) == 'four'
+    assert len(s) == 11
+    assert s.pop(4) == 'four'
+    assert s.pop(4) is None
+    assert len(s) == 10
+    for i in [0, 1, 2, 5, 8]:
+        s.pop(i)
+    assert list(s.items()) == [(9, 90), (10, 100), (17, 170),
+                               (22, 220), (30, 300)]
+
+
+def test_shift(Storage):
+    s = Storage.from_items((i * 2, i) for i in range(20))
+    s.shift(11, 3)
+    expected = [(i * 2 + (3 if i * 2 >= 11 else 0), i) for i in range(20)]
+    assert list(s.items()) == expected
+    s.shift(14, -2)
+    expected = [(i - 2 if i >= 14 else i, v) for i, v in expected]
+    assert list(s.items()) == expected
+    s.shift(-5, 1)
+    expected = [(i + 1, v) for i, v in expected]
+    assert list(s.items()) == expected
+
+
+def test_items_range(Storage):
+    pairs = [(i * 2, i) for i in range(20)]
+    s = Storage.from_items(pairs)
+    assert list(s.items(7, 15)) == [p for p in pairs if 7 <= p[0] < 15]
+    assert list(s.items(7)) == [p for p in pairs if 7 <= p[0]]
+    assert (list(s.items(7, 15, reverse=True)) ==
+            [p for p in reversed(pairs) if 7 <= p[0] < 15])
+    assert list(s.items(reverse=True)) == pairs[::-1]
+    assert list(s.items(100)) == []
+    assert list(s.items(0, -1, reverse=True)) == []
+
+
+def test_against_dict(Storage):
+    """ Random sets, pops and shifts give the same as a dict. """
+    rand = random.Random(7)
+    s = Storage()
+    d = {}
+    for _ in range(2000):
+        action = rand.random()
+        index = rand.randrange(200)
+        if action < 0.4:
+            s.set(index, index + 1)
+            d[index] = index + 1
+        elif action < 0.7:
+            assert s.pop(index) == d.pop(index, None)
+        elif action < 0.85:
+            s.shift(index, 1)
+            d = {i + 1 if i >= index else i: v for i, v in d.items()}
+        elif index > 0 and index - 1 not in d:
+            s.shift(index, -1)
+            d = {i - 1 if i >= index else i: v for i, v in d.items()}
+        assert len(s) == len(d)
+    assert list(s.items()) == sorted(d.items())
+
+
+def test_freeze(Storage):
+    s = Storage.from_items([(1, 2), (5, 6)]).freeze()
+    assert s.frozen
+    with pytest.raises(TypeError):
+        s.set(3, 4)
+    with pytest.raises(TypeError):
+        s.pop(1)
+    with pytest.raises(TypeError):
+        s.shift(0, 1)
+    assert list(s.items()) == [(1, 2), (5, 6)]
+
+
+def test_array_values():
+    s = ArrayStorage.from_items([(1, 2), (5, 6)])
+    assert s._values.typecode == 'q'
+    s = ArrayStorage.from_items([(1, 2.5), (5, 6.0)])
+    assert s._values.typecode == 'd'
+    s.set(3, 1.5)
+    assert s._values.typecode == 'd'
+    # an int in with the floats stays an int
+    s.set(4, 7)
+    assert type(s.get(4)) is int
+    assert list(s.values()) == [2.5, 1.5, 7, 6.0]
+    s.pop(4)
+    s.freeze()
+    assert s._values.typecode == 'd'
+    s = ArrayStorage()
+    s.set(0, 2 ** 70)
+    s.set(1, 3)
+    assert list(s.values()) == [2 ** 70, 3]
+    s = ArrayStorage()
+    s.set(0, 1.5)
+    assert s._values == array('d', [1.5])